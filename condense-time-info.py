@@ -20,21 +20,8 @@ import argparse
 #...for the logging.
 import logging as lg
 
-# Import the JSON library.
-import json
-
-#...for the byte packing.
-import struct
-
-#...for the MATH.
-import math
-
-#...for the ROOT stuff.
-from ROOT import TFile, TTree, gSystem
-
-# Load in the (skeleton) Frame class - a bare-minimum class that
-# provides the ROOT file format interface.
-gSystem.Load('Frame_C')
+#...for the toolkit (its modules are only imported on first use).
+import timestuff
 
 if __name__ == "__main__":
 
@@ -49,6 +36,10 @@ if __name__ == "__main__":
     parser.add_argument("outputPath",      help="The path for the output files.")
     parser.add_argument("numFrames",       help="The number of frames to process (-1 for all).")
     parser.add_argument("startFrame",      help="The starting frame.")
+    parser.add_argument("--progress",      help="The time between progress reports [s] (0 for none).", type=float, default=10.0)
+    parser.add_argument("--status",        help="The progress status file (default: <outputPath>/status_condense-time-info.json).", default=None)
+    parser.add_argument("--textfile-dir",  help="Also export the run metrics to this node exporter textfile collector directory (default: $TIMESTUFF_TEXTFILE_DIR).", default=None)
+    parser.add_argument("--metrics-name",  help="Add this name (e.g. the run ID) to the run metrics' file names and labels (default: none).", default=None)
     parser.add_argument("-v", "--verbose", help="Increase output verbosity", action="store_true")
     args = parser.parse_args()
 
@@ -77,35 +68,26 @@ if __name__ == "__main__":
     # Configure the logging.
     lg.basicConfig(filename=os.path.join(outputpath, 'log_condense-time-info.log'), filemode='w', level=level)
 
-    print("*")
-    print("* Input path          : '%s'" % (datapath))
-    print("* Output path         : '%s'" % (outputpath))
-    print("*")
+    # Start the run's clock (for the metrics).
+    timestuff.reset_metrics()
 
-    ## The ROOT file itself.
-    f = TFile(datapath)
+    ## The progress reporter (None for no reports).
+    progress = None
+    #
+    if args.progress > 0:
 
-    ## The TTree containing the data.
-    chain = f.Get('MPXTree')
+        ## The path of the progress status file.
+        statuspath = args.status
+        #
+        if statuspath is None:
+            statuspath = os.path.join(outputpath, "status_condense-time-info.json")
 
-    ## The number of frames in the file.
-    n_frames = chain.GetEntriesFast()
-    #
-    if n_frames_to_process == -1:
-        n_frames_to_process = n_frames
-    #
-    if start_frame_number > n_frames_to_process:
-        raise IOError("* ERROR: start frame is greater than the number of frames present.")
+        progress = timestuff.ProgressReporter(os.path.basename(datapath), "frames", args.progress, statuspath)
 
-    # Update the user.
-    lg.info(" * Input path is                 : '%s'" % (datapath))
-    lg.info(" * The output is being written to: '%s'" % (outputpath))
-    lg.info(" *")
-    lg.info(" * Start frame            = %d" % (start_frame_number))
-    lg.info(" * Number of frames       = %d" % (n_frames_to_process))
-    lg.info(" *")
-    lg.info(" * Number of frames found = %d" % (n_frames))
-    lg.info(" *")
+    print("*")
+    print("* Input path          : '%s'" % (datapath))
+    print("* Output path         : '%s'" % (outputpath))
+    print("*")
 
     ## The run ID (from the file name).
     #
@@ -115,54 +97,12 @@ if __name__ == "__main__":
     ## The name of the dataset profile binary file.
     output_file = os.path.join(outputpath, "%s.bin" % (run_id))
 
-    ## The binary file to write to.
-    bf = open(output_file, "wb")
-
-    # Loop over the frames in the file.
-    for fn in range(start_frame_number, start_frame_number + n_frames_to_process):
-
-        # Load the TTree.
-        ientry = chain.LoadTree(fn)
-
-        # Copy the entry into memory.
-        nb = chain.GetEntry(fn)
-
-        if nb == 0:
-            break
-
-        ## The start time (nearest second) [s].
-        start_time_s = int(chain.FramesData.GetStartTime())
+    lg.info(" * Input path is                 : '%s'" % (datapath))
+    lg.info(" * The output is being written to: '%s'" % (output_file))
+    lg.info(" *")
 
-        ## The frame acquisition time.
-        acq_time = chain.FramesData.GetAcqTime()
+    # Condense the frames and write them to the binary file.
+    timestuff.write_condensed(output_file, timestuff.condense_dataset(datapath, start_frame_number, n_frames_to_process, progress))
 
-        # Encode the acquisition time.
-        #
-        # FIXME: make more elegant, perform error checking, etc.
-        if acq_time < 0.001:
-            log_acq_time = -3
-        elif acq_time < 0.01:
-            log_acq_time = -2
-        elif acq_time < 0.1:
-            log_acq_time = -1
-        elif acq_time < 1.0:
-            log_acq_time = 0
-        elif acq_time < 10.0:
-            log_acq_time = 1
-
-        ## The number of hit pixels in the frame.
-        n_pixels = len(chain.FramesData.GetFrameXC())
-
-        # If we do have a fully occupied frame, set it to one below to avoid
-        # a 2 byte penalty for the whole dataset(!).
-        if n_pixels == 256*256:
-            n_pixels = 256*256 - 1
-
-        #lg.info(" * Start time, acq. time, n_pixels: %d [s], %f [s] (%d), % 10d" % (int(start_time_s), acq_time, int(log_acq_time), int(n_pixels)))
-
-        # Write the start time, log(10) of the acq. time, and number of pixels
-        # to the binary file.
-        bf.write(struct.pack('IhH', int(start_time_s), int(log_acq_time), int(n_pixels)))
-
-    # Tidy up.
-    bf.close()
+    # Write the run's metrics (and export them for the node exporter).
+    timestuff.write_metrics(outputpath, "condense-time-info", args.textfile_dir, args.metrics_name)
@@ -12,10 +12,7 @@
 """
 
 # Import the code needed to manage files.
-import os, glob
-
-#...for writing out files.
-import codecs
+import os
 
 #...for parsing the arguments.
 import argparse
@@ -23,14 +20,17 @@ import argparse
 #...for the logging.
 import logging as lg
 
-# Import the JSON library.
-import json
+#...for reading the dataset profiles.
+from timestuff.catalog import get_catalog_path, read_catalog, read_json_profiles
+
+#...for only rebuilding the pages that have changed.
+from timestuff.site import SiteBuilder, write_stylesheet
 
-#...for the handler functions.
-from handlers import getPixelmanTimeString, make_time_dir
+#...for the page options.
+from helpers import PROFILE_PAGINATIONS
 
-#...for making the profile page.
-from helpers import make_profile_page
+#...for the toolkit (its modules are only imported on first use).
+import timestuff
 
 if __name__ == "__main__":
 
@@ -41,8 +41,13 @@ if __name__ == "__main__":
 
     # Get the datafile path from the command line.
     parser = argparse.ArgumentParser()
-    parser.add_argument("inputPath",       help="Path to the input dataset.")
+    parser.add_argument("inputPath",       help="Path to the dataset profiles (the directory or the catalog).")
     parser.add_argument("outputPath",      help="The path for the output files.")
+    parser.add_argument("--paginate",      help="Split the profiles into pages by month or chip.", choices=PROFILE_PAGINATIONS, default="month")
+    parser.add_argument("-f", "--force",   help="Rebuild all of the pages, even if their inputs haven't changed.", action="store_true")
+    parser.add_argument("--hash",          help="Compare the page inputs by content (not modification time).", action="store_true")
+    parser.add_argument("--inline-css",    help="Put the CSS in each page (no shared stylesheet).", action="store_true")
+    parser.add_argument("--site-root",     help="Where to write the shared stylesheet (default: the output path).", default=None)
     parser.add_argument("-v", "--verbose", help="Increase output verbosity", action="store_true")
     args = parser.parse_args()
 
@@ -68,34 +73,36 @@ if __name__ == "__main__":
     print("*")
     print("* Input path          : '%s'" % (datapath))
     print("* Output path         : '%s'" % (outputpath))
+    print("* Pagination          : '%s'" % (args.paginate))
     print("*")
 
-    # List the JSONs in the input directory.
+    ## The path to the profile catalog.
+    catalogpath = get_catalog_path(datapath)
 
-    ## Dictionary of the datasets.
-    jds = {}
+    if os.path.exists(catalogpath):
 
-    # Loop over the dataset JSON files found.
-    for jp in sorted(glob.glob(os.path.join(datapath, "*.json"))):
+        ## Dictionary of the datasets (read with a single open).
+        jds = read_catalog(catalogpath)
 
-        ## The JSON file name.
-        jfn = os.path.basename(jp)
-
-        ## Get the JSON information from the file.
-        jf = open(jp, "r")
-        jd = json.load(jf)
-        jf.close()
+    else:
 
-        ## The run ID of the dataset (from the file name).
-        run_id = jfn.split(".")[0]
+        print("* No catalog found - reading the JSON files (see migrate-profiles.py).")
 
-        # Add the dataset to the dictionary.
-        jds[run_id] = jd
+        ## Dictionary of the datasets.
+        jds = read_json_profiles(datapath)
 
+    for run_id in sorted(jds.keys()):
         lg.info(" * Run ID: '%s'" % (run_id))
 
-    ## The path to the HTML page for the dataset profiles.
-    html_path = os.path.join(outputpath, "profiles.html")
+    ## The site builder (only rebuilds the pages whose inputs have changed).
+    builder = SiteBuilder(outputpath, use_hashes=args.hash, force=args.force)
+
+    ## The shared stylesheet (None to put the CSS inline).
+    css_href = None
     #
-    with codecs.open(html_path, 'w', 'utf-8') as f:
-        f.write(make_profile_page(jds))
+    if not args.inline_css:
+        css_href = write_stylesheet(outputpath if args.site_root is None else args.site_root, outputpath)
+
+    timestuff.build_profile_pages(jds, outputpath, builder, args.paginate, css_href)
+
+    builder.save()
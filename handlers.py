@@ -56,6 +56,44 @@ def getPixelmanTimeString(st):
     return sec, sub, sts
 
 
+def getPixelmanTimeStrings(sts):
+    """
+    Get the timestrings in the Pixelman (custom) format for many start times.
+
+    As getPixelmanTimeString, but the (slow) time formatting is done once
+    per distinct second.
+
+    @param [in] sts The start times.
+
+    @return A list of (seconds, sub-seconds, timestring) tuples.
+    """
+
+    ## Dictionary of the formatted time parts { second:(before, after) }.
+    parts = {}
+
+    ## The list of time information to return.
+    ts = []
+
+    for st in sts:
+
+        ## The seconds from the start time provided.
+        sec = int(str(st).split(".")[0])
+
+        ## The sub-second value.
+        sub = ("%.6f" % st).strip().split(".")[1]
+
+        if sec not in parts:
+
+            ## The time represented as a Python time object.
+            mytime = time.gmtime(sec)
+
+            parts[sec] = (time.strftime("%a %b %d %H:%M:%S.", mytime), time.strftime(" %Y", mytime))
+
+        ts.append((sec, sub, parts[sec][0] + sub + parts[sec][1]))
+
+    return ts
+
+
 def make_time_dir(sec):
 
     ## The time represented as a Python time object.
@@ -12,22 +12,20 @@ See http://cernatschool.web.cern.ch for more information.
 #...for the time (being).
 import time
 
-#...for handling the time strings.
-from handlers import getPixelmanTimeString
-
-#...for the CSS generation.
-from timestamp.pages import make_css
+#...for building pages in memory.
+from io import StringIO
 
-def make_profile_page(jds):
+# Import the JSON library.
+import json
 
-    """
-    Make a dataset profile page.
+#...for handling the time strings.
+from handlers import getPixelmanTimeStrings
 
-    @param [in] jds Dictionary of JSON data for the datasets.
-    """
+#...for the CSS generation and image tags.
+from timestuff.pages import make_style, make_img_tag
 
-    ## The string to return for the page.
-    s = '''<!DOCTYPE html>
+## The profile page template, split at the table rows.
+PROFILE_PAGE_TEMPLATE = '''<!DOCTYPE html>
 <html>
 <head>
   <!-- <link rel="stylesheet" type="text/css" href="main.css"> -->
@@ -39,6 +37,7 @@ def make_profile_page(jds):
 
   <!-- Main Content -->
   <div id="main">
+{{NAV}}
     <table>
       <tr>
         <th>Run ID</th>
@@ -60,19 +59,72 @@ def make_profile_page(jds):
 
 </div>
 </html>
+'''.split('{{TABLE_ROWS}}')
+
+## The profile page table row template.
+PROFILE_ROW_TEMPLATE = '''
+      <tr>
+        <td>%s</td>
+        <!-- <td>%s</td> -->
+        <td class="number">%d</td>
+        <td class="number">%d</td>
+        <td>%s</td>
+        <td>%s</td>
+        <td class="number">%.2f</td>
+        <td class="number">%.4f</td>
+        <td>%s</td>
+      </tr>
 '''
 
-    ## The table contents (generated from the JSON information).
-    t = ""
+## The number of table rows to format (and write) at a time.
+PROFILE_ROW_BATCH = 1000
 
-    # Loop over the datasets.
-    for run_id in sorted(jds.keys()):
+def write_profile_page(f, runs, nav="", css_href=None):
 
-        ## The dataset JSON information.
-        jd = jds[run_id]
+    """
+    Write a dataset profile page, streaming the table rows to the file.
+
+    @param [in] f The (open) file to write the page to.
+    @param [in] runs Iterable of (run ID, dataset JSON information) pairs,
+    in the order they should appear in the table.
+    @param [in] nav HTML for the page navigation (above the table).
+    @param [in] css_href The shared stylesheet (None to put the CSS inline).
+    """
+
+    # The page head (with the CSS).
+    f.write(PROFILE_PAGE_TEMPLATE[0].replace('{{CSS}}', make_style(css_href)).replace('{{NAV}}', nav))
+
+    ## The batch of runs to format.
+    batch = []
+
+    for run in runs:
+        batch.append(run)
+        #
+        if len(batch) == PROFILE_ROW_BATCH:
+            f.write(make_profile_rows(batch))
+            batch = []
+
+    f.write(make_profile_rows(batch))
 
-        # The start time second, sub-second, and Pixelman timestamp.
-        st_s, st_sub, st_str = getPixelmanTimeString(jd["start_time_s"])
+    # The page tail.
+    f.write(PROFILE_PAGE_TEMPLATE[1])
+
+def make_profile_rows(runs):
+
+    """
+    Make the profile page table rows for a batch of runs.
+
+    @param [in] runs List of (run ID, dataset JSON information) pairs.
+    """
+
+    # The start time second, sub-second, and Pixelman timestamps (in bulk).
+    sts = getPixelmanTimeStrings([jd["start_time_s"] for run_id, jd in runs])
+
+    ## The table rows.
+    rows = []
+
+    # Loop over the datasets.
+    for (run_id, jd), (st_s, st_sub, st_str) in zip(runs, sts):
 
         ## The total length of the run.
         Delta_T = jd["Delta_T"]
@@ -86,43 +138,226 @@ def make_profile_page(jds):
         ## The (remainder) minutes in the run.
         mins = int((Delta_T%(60*60))/60)
 
-        #check_s = days*(24*60*60) + hours*(60*60) + mins*(60)
-        #print check_s, Delta_T
-
         ## String representing the run length.
         Delta_T_str = "%3d days, %3d hours, %2d mins." % (days, hours, mins)
 
         # Add the dataset information to the table.
-        t += '''
-      <tr>
-        <td>%s</td>
-        <!-- <td>%s</td> -->
-        <td class="number">%d</td>
-        <td class="number">%d</td>
-        <td>%s</td>
-        <td>%s</td>
-        <td class="number">%.2f</td>
-        <td class="number">%.4f</td>
-        <td>%s</td>
-      </tr>
-''' % \
-            (run_id, jd["chip_id"], jd["n_frames"], jd["file_size"], st_str, Delta_T_str, jd["Delta_t"], jd["delta_t"], jd["file_name"])
+        rows.append(PROFILE_ROW_TEMPLATE % \
+            (run_id, jd["chip_id"], jd["n_frames"], jd["file_size"], st_str, Delta_T_str, jd["Delta_t"], jd["delta_t"], jd["file_name"]))
 
-    # Add the table contents.
-    s = s.replace('{{TABLE_ROWS}}', t)
+    return "".join(rows)
 
-    # Add the CSS inline to the web page.
-    s = s.replace('{{CSS}}', make_css())
+def make_profile_page(jds):
 
-    return s
+    """
+    Make a dataset profile page.
+
+    @param [in] jds Dictionary of JSON data for the datasets.
+    """
+
+    ## The page (built in memory - use write_profile_page for large tables).
+    f = StringIO()
 
+    write_profile_page(f, ((run_id, jds[run_id]) for run_id in sorted(jds.keys())))
 
-def make_plot_page(plot_names):
+    return f.getvalue()
+
+
+## The ways of splitting up the profile pages.
+PROFILE_PAGINATIONS = ["none", "month", "chip"]
+
+## The fields of the runs in the profile search index.
+PROFILE_INDEX_FIELDS = ["run_id", "chip_id", "start_time_s", "n_frames", "file_size", "page"]
+
+def get_profile_page_key(jd, paginate):
+
+    """
+    Get the key of the profile page a dataset is listed on.
+
+    @param [in] jd The dataset's JSON information.
+    @param [in] paginate How the pages are split up (see PROFILE_PAGINATIONS).
+    """
+
+    if paginate == "month":
+        return time.strftime("%Y-%m", time.gmtime(jd["start_time_s"]))
+    elif paginate == "chip":
+        # Older profiles may not have identified the chip.
+        return str(jd.get("chip_id") or "unknown")
+
+    return "all"
+
+def get_profile_page_name(page_key):
+
+    """
+    Get the file name of a (paginated) profile page.
+
+    @param [in] page_key The page key (see get_profile_page_key).
+    """
+
+    return "profiles_%s.html" % (page_key)
+
+def make_profile_nav(page_keys, current=None):
+
+    """
+    Make the navigation links for the paginated profile pages.
+
+    @param [in] page_keys The (sorted) page keys.
+    @param [in] current The key of the page being shown.
+    """
+
+    ## The links, starting with the search page.
+    links = ['<a href="profiles.html">Search</a>']
+
+    for page_key in page_keys:
+        if page_key == current:
+            links.append('<strong>%s</strong>' % (page_key))
+        else:
+            links.append('<a href="%s">%s</a>' % (get_profile_page_name(page_key), page_key))
+
+    return '    <div class="nav">%s</div>' % (" | ".join(links))
+
+def make_profile_index(jds, paginate):
+
+    """
+    Make the (compact) search index of the datasets.
+
+    Each run is a list of values, in the order given by the "fields" entry,
+    so that the index stays small for large numbers of runs.
+
+    @param [in] jds Dictionary of JSON data for the datasets.
+    @param [in] paginate How the pages are split up (see PROFILE_PAGINATIONS).
+
+    @return Dictionary of the index { "fields", "pages":{ key:file name }, "runs" }.
+    """
+
+    ## The indexed runs.
+    runs = []
+
+    ## The pages { page key:file name }.
+    pages = {}
+
+    for run_id in sorted(jds.keys()):
+
+        jd = jds[run_id]
+
+        ## The key of the run's page.
+        page_key = get_profile_page_key(jd, paginate)
+        #
+        pages[page_key] = get_profile_page_name(page_key)
+
+        runs.append([run_id, jd.get("chip_id"), jd["start_time_s"], jd["n_frames"], jd["file_size"], page_key])
+
+    return {"fields":PROFILE_INDEX_FIELDS, "pages":pages, "runs":runs}
+
+def make_profile_search_page(index, max_rows=500, css_href=None):
+
+    """
+    Make the profile search page.
+
+    The runs are filtered and sorted on the client from the search index;
+    only the first max_rows matching runs are put into the table, with
+    links to their (paginated) profile pages.
+
+    @param [in] index The search index (see make_profile_index).
+    @param [in] max_rows The maximum number of table rows to show.
+    @param [in] css_href The shared stylesheet (None to put the CSS inline).
+    """
+
+    ## The string to return for the page.
+    s = '''<!DOCTYPE html>
+<html>
+<head>
+  <meta charset="utf-8">
+  <style>
+{{CSS}}
+  th { cursor: pointer; }
+  #search { margin: 20px; font-size: 14px; }
+  </style>
+</head>
+<div id="container">
+
+  <!-- Main Content -->
+  <div id="main">
+{{NAV}}
+    <div id="search">
+      <input id="query" type="search" placeholder="Run ID, chip or date (YYYY-MM-DD)" size="40">
+      <span id="count"></span>
+    </div>
+    <table>
+      <thead>
+        <tr>
+          <th data-f="0">Run ID</th>
+          <th data-f="1">Chip ID</th>
+          <th data-f="2">Start time</th>
+          <th data-f="3">Frames</th>
+          <th data-f="4">Size [B]</th>
+          <th data-f="5">Page</th>
+        </tr>
+      </thead>
+      <tbody id="runs">
+      </tbody>
+    </table>
+  </div>
+
+  <!-- Footer -->
+  <div id="footer">&copy; CERN@school 2015</div>
+
+</div>
+<script>
+var INDEX = {{INDEX}};
+var MAX_ROWS = {{MAX_ROWS}};
+var sortField = 2, sortDir = 1;
+
+function isoTime(t) { return new Date(t * 1000).toISOString().replace("T", " ").substring(0, 19); }
+
+function show() {
+  var q = document.getElementById("query").value.toLowerCase(), runs, html = [], i, r;
+  runs = INDEX.runs.filter(function(r) {
+    return q == "" || String(r[0]).toLowerCase().indexOf(q) >= 0 || String(r[1]).toLowerCase().indexOf(q) >= 0 || isoTime(r[2]).indexOf(q) == 0;
+  });
+  runs.sort(function(a, b) { return a[sortField] < b[sortField] ? -sortDir : (a[sortField] > b[sortField] ? sortDir : 0); });
+  for (i = 0; i < Math.min(runs.length, MAX_ROWS); i++) {
+    r = runs[i];
+    html.push("<tr><td>" + r[0] + "</td><td>" + (r[1] || "") + "</td><td>" + isoTime(r[2]) + "</td><td class=\\"number\\">" + r[3] +
+      "</td><td class=\\"number\\">" + r[4] + "</td><td><a href=\\"" + INDEX.pages[r[5]] + "\\">" + r[5] + "</a></td></tr>");
+  }
+  document.getElementById("runs").innerHTML = html.join("");
+  document.getElementById("count").innerHTML = runs.length + " of " + INDEX.runs.length + " runs" + (runs.length > MAX_ROWS ? " (showing the first " + MAX_ROWS + ")" : "");
+}
+
+var ths = document.getElementsByTagName("th");
+for (var i = 0; i < ths.length; i++) {
+  ths[i].onclick = function() {
+    var f = parseInt(this.getAttribute("data-f"));
+    sortDir = (f == sortField) ? -sortDir : 1; sortField = f; show();
+  };
+}
+document.getElementById("query").oninput = show;
+show();
+</script>
+</html>
+'''
+
+    # Add the search index.
+    s = s.replace('{{INDEX}}', json.dumps(index, separators=(',', ':')))
+
+    s = s.replace('{{MAX_ROWS}}', str(max_rows))
+
+    s = s.replace('{{NAV}}', make_profile_nav(sorted(index["pages"].keys())))
+
+    # Add the CSS to the web page.
+    s = s.replace('{{CSS}}', make_style(css_href))
+
+    return s
+
+def make_plot_page(plot_names, thumbs=None, css_href=None):
 
     """
     Make a plot profile page.
 
     @param [in] plot_names Dictionary of plot names { month_id:path }.
+    @param [in] thumbs Dictionary of the thumbnails { path:{ density:path } }.
+    @param [in] css_href The shared stylesheet (None to put the CSS inline).
     """
 
     ## The string to return for the page.
@@ -157,8 +392,14 @@ def make_plot_page(plot_names):
     # Loop over the plots.
     for i, month_id in enumerate(sorted(plot_names.keys())):
 
+        ## The plot's thumbnails (if any).
+        plot_thumbs = None
+        #
+        if thumbs is not None:
+            plot_thumbs = thumbs[plot_names[month_id]]
+
         # Add the image tag to the table.
-        t += "<td><img src=\"%s\" /></td>" % (plot_names[month_id])
+        t += "<td>%s</td>" % (make_img_tag(plot_names[month_id], plot_thumbs))
 
     t += "</tr>"
 
@@ -178,7 +419,7 @@ def make_plot_page(plot_names):
     # Add the table contents.
     s = s.replace('{{TABLE_ROWS}}', t)
 
-    # Add the CSS inline to the web page.
-    s = s.replace('{{CSS}}', make_css())
+    # Add the CSS to the web page.
+    s = s.replace('{{CSS}}', make_style(css_href))
 
     return s
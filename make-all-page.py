@@ -12,7 +12,7 @@
 """
 
 # Import the code needed to manage files.
-import os, glob
+import os
 
 #...for parsing the arguments.
 import argparse
@@ -20,11 +20,11 @@ import argparse
 #...for the logging.
 import logging as lg
 
-#...for the file writing.
-import codecs
+#...for only rebuilding the page if it has changed.
+from timestuff.site import SiteBuilder, write_stylesheet
 
-#...for making the plot HTML.
-from helpers import make_plot_page
+#...for the toolkit (its modules are only imported on first use).
+import timestuff
 
 if __name__ == "__main__":
 
@@ -37,6 +37,14 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("inputPath",       help="Path to the plot image files.")
     parser.add_argument("outputPath",      help="The path for the output files.")
+    parser.add_argument("-p", "--processes", help="The number of thumbnail processes (default: all cores).", type=int, default=None)
+    parser.add_argument("--no-thumbs",     help="Embed the full resolution plots (no thumbnails).", action="store_true")
+    parser.add_argument("-f", "--force",   help="Rebuild the page, even if its inputs haven't changed.", action="store_true")
+    parser.add_argument("--hash",          help="Compare the page inputs by content (not modification time).", action="store_true")
+    parser.add_argument("--inline-css",    help="Put the CSS in the page (no shared stylesheet).", action="store_true")
+    parser.add_argument("--site-root",     help="Where to write the shared stylesheet (default: the output path).", default=None)
+    parser.add_argument("--textfile-dir",  help="Also export the run metrics to this node exporter textfile collector directory (default: $TIMESTUFF_TEXTFILE_DIR).", default=None)
+    parser.add_argument("--metrics-name",  help="Add this name (e.g. the run ID) to the run metrics' file names and labels (default: none).", default=None)
     parser.add_argument("-v", "--verbose", help="Increase output verbosity", action="store_true")
     args = parser.parse_args()
 
@@ -59,6 +67,9 @@ if __name__ == "__main__":
     # Configure the logging.
     lg.basicConfig(filename=os.path.join(outputpath, 'log_make-pages.log'), filemode='w', level=level)
 
+    # Start the run's clock (for the metrics).
+    timestuff.reset_metrics()
+
     print("*")
     print("* Input path          : '%s'" % (datapath))
     print("* Output path         : '%s'" % (outputpath))
@@ -66,19 +77,18 @@ if __name__ == "__main__":
 
     # Make the web pages.
 
-    ## Dictionary for the plot images.
-    plot_paths = {}
+    ## The site builder (only rebuilds the page if its inputs have changed).
+    builder = SiteBuilder(outputpath, use_hashes=args.hash, force=args.force)
+
+    ## The shared stylesheet (None to put the CSS inline).
+    css_href = None
     #
-    for fn in sorted(glob.glob(os.path.join(datapath, "*.png"))):
+    if not args.inline_css:
+        css_href = write_stylesheet(outputpath if args.site_root is None else args.site_root, outputpath)
 
-        ## The month ID ("%Y-%m").
-        month_id = os.path.basename(fn).split(".")[0]
-        #
-        # Add the plot to the dictionary.
-        plot_paths[month_id] = os.path.basename(fn)
+    timestuff.build_plot_page(datapath, outputpath, builder, css_href, not args.no_thumbs, args.processes)
 
-    ## The path to the HTML page for the dataset profiles.
-    html_path = os.path.join(outputpath, "plots.html")
-    #
-    with codecs.open(html_path, 'w', 'utf-8') as f:
-        f.write(make_plot_page(plot_paths))
+    builder.save()
+
+    # Write the run's metrics (and export them for the node exporter).
+    timestuff.write_metrics(outputpath, "make-all-page", args.textfile_dir, args.metrics_name)
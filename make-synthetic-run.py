@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+
+ CERN@school - Making synthetic (condensed) runs for benchmarking.
+
+ See the README.md file and the GitHub wiki for more information.
+
+ http://cernatschool.web.cern.ch
+
+"""
+
+# Import the code needed to manage files.
+import os
+
+#...for parsing the arguments.
+import argparse
+
+#...for the logging.
+import logging as lg
+
+#...for the time (being).
+import time
+
+#...for the toolkit (its modules are only imported on first use).
+import timestuff
+
+if __name__ == "__main__":
+
+    print("*")
+    print("*==========================================*")
+    print("* CERN@school - make a synthetic data file *")
+    print("*==========================================*")
+
+    # Get the run's options from the command line.
+    parser = argparse.ArgumentParser()
+    parser.add_argument("outputPath",      help="The path for the output files.")
+    parser.add_argument("numFrames",       help="The number of frames (e.g. 1e6).")
+    parser.add_argument("--name",          help="The run ID (default: synth_<numFrames>).", default=None)
+    parser.add_argument("--start",         help="The start of the run (UTC, e.g. 2012-09-01, or seconds since the epoch).", default="2012-09-01")
+    parser.add_argument("--days",          help="The duration of the run [days].", type=float, default=28.0)
+    parser.add_argument("--acq-codes",     help="Comma-separated acquisition time codes (log10 of the acq. time [s]) to use, equally likely (default: the usual mix).", default=None)
+    parser.add_argument("--beyond-months", help="Let the run go past the months covered by the month plots (the benchmark skips the month stages).", action="store_true")
+    parser.add_argument("--seed",          help="The random number generator seed.", type=int, default=1)
+    parser.add_argument("-v", "--verbose", help="Increase output verbosity", action="store_true")
+    args = parser.parse_args()
+
+    ## The output path.
+    outputpath = args.outputPath
+
+    # Check if the output directory exists. If it doesn't, quit.
+    if not os.path.isdir(outputpath):
+        raise IOError("* ERROR: '%s' output directory does not exist!" % (outputpath))
+
+    ## The number of frames.
+    n_frames = int(float(args.numFrames))
+
+    ## The run ID.
+    run_id = args.name
+    #
+    if run_id is None:
+        run_id = "synth_%d" % (n_frames)
+
+    ## The path of the synthetic data file.
+    datapath = os.path.join(outputpath, "%s.bin" % (run_id))
+
+    # Set the logging level.
+    if args.verbose:
+        level=lg.DEBUG
+    else:
+        level=lg.INFO
+
+    # Configure the logging.
+    lg.basicConfig(filename=os.path.join(outputpath, 'log_make-synthetic-run.log'), filemode='w', level=level)
+
+    ## The start time of the run [s].
+    start_time = timestuff.parse_time(args.start)
+
+    ## The acquisition time codes and the fraction of fills using each.
+    acq_codes = timestuff.SYNTH_ACQ_CODES
+    #
+    if args.acq_codes is not None:
+        acq_codes = dict((int(code), 1.0) for code in args.acq_codes.split(","))
+
+    ## The duration of the run [s] (extended if the frames won't fit, but kept within the months covered).
+    duration = timestuff.fit_synthetic_duration(n_frames, int(args.days * 24 * 60 * 60), acq_codes, start_time, not args.beyond_months)
+
+    ## A note on the duration.
+    duration_note = ""
+    #
+    if duration > args.days * 86400:
+        duration_note = " (extended to fit the frames)"
+    elif duration < args.days * 86400:
+        duration_note = " (shortened to stay within the months covered)"
+
+    print("*")
+    print("* Output file         : '%s'" % (datapath))
+    print("* Number of frames    : %d" % (n_frames))
+    print("* Start time          : %s" % (time.asctime(time.gmtime(start_time))))
+    print("* Duration            : %.1f days%s" % (duration / 86400.0, duration_note))
+    print("*")
+
+    ## The time taken [s].
+    t0 = time.time()
+
+    timestuff.write_synthetic_run(datapath, n_frames, start_time, duration, args.seed, acq_codes, not args.beyond_months)
+
+    print("* Written %d frame(s) (%d B) in %.1f s." % (n_frames, os.path.getsize(datapath), time.time() - t0))
+    print("*")
@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+
+ CERN@school - Making the MoEDAL LHC Run 1 Timepix timeline tiles.
+
+ See the README.md file and the GitHub wiki for more information.
+
+ http://cernatschool.web.cern.ch
+
+"""
+
+# Import the code needed to manage files.
+import os
+
+#...for parsing the arguments.
+import argparse
+
+#...for the logging.
+import logging as lg
+
+#...for the toolkit (its modules are only imported on first use).
+import timestuff
+
+if __name__ == "__main__":
+
+    print("*")
+    print("*=======================================*")
+    print("* CERN@school - make the timeline tiles *")
+    print("*=======================================*")
+
+    # Get the datafile path from the command line.
+    parser = argparse.ArgumentParser()
+    parser.add_argument("inputPath",       help="Path to the binary input data.")
+    parser.add_argument("outputPath",      help="The path for the output files.")
+    parser.add_argument("-p", "--processes", help="The number of rendering processes (default: all cores).", type=int, default=None)
+    parser.add_argument("--levels",        help="Comma-separated zoom levels to generate (default: all).", default=None)
+    parser.add_argument("--y-max",         help="The pixels per second at the top of the tiles.", type=float, default=30.0)
+    parser.add_argument("--textfile-dir",  help="Also export the run metrics to this node exporter textfile collector directory (default: $TIMESTUFF_TEXTFILE_DIR).", default=None)
+    parser.add_argument("--metrics-name",  help="Add this name (e.g. the run ID) to the run metrics' file names and labels (default: none).", default=None)
+    parser.add_argument("-v", "--verbose", help="Increase output verbosity", action="store_true")
+    args = parser.parse_args()
+
+    ## The path to the data file.
+    datapath = args.inputPath
+
+    ## The output path.
+    outputpath = args.outputPath
+
+    # Check if the output directory exists. If it doesn't, quit.
+    if not os.path.isdir(outputpath):
+        raise IOError("* ERROR: '%s' output directory does not exist!" % (outputpath))
+
+    ## The zoom levels to generate.
+    levels = [level for level in timestuff.ROLLUP_LEVELS if args.levels is None or level in args.levels.split(",")]
+
+    # Set the logging level.
+    if args.verbose:
+        level=lg.DEBUG
+    else:
+        level=lg.INFO
+
+    # Configure the logging.
+    lg.basicConfig(filename=os.path.join(outputpath, 'log_make-tiles.log'), filemode='w', level=level)
+
+    # Start the run's clock (for the metrics).
+    timestuff.reset_metrics()
+
+    print("*")
+    print("* Input path          : '%s'" % (datapath))
+    print("* Output path         : '%s'" % (outputpath))
+    print("*")
+
+    ## The frames.
+    frames = timestuff.read_condensed(datapath)
+
+    lg.info(" * Making tiles for: '%s'" % (datapath))
+    lg.info(" *")
+    lg.info(" * Number of frames         : % 15d" % (len(frames)))
+    lg.info(" * Zoom levels              : %s" % (", ".join(levels)))
+    lg.info(" *")
+
+    # Make the tiles, rollup summaries and timeline page.
+    timestuff.build_tiles(frames, outputpath, levels, args.y_max, args.processes)
+
+    # Write the run's metrics (and export them for the node exporter).
+    timestuff.write_metrics(outputpath, "make-tiles", args.textfile_dir, args.metrics_name)
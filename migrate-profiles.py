@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+
+ CERN@school - Migrating the dataset profiles to the catalog.
+
+ See the README.md file and the GitHub wiki for more information.
+
+ http://cernatschool.web.cern.ch
+
+"""
+
+# Import the code needed to manage files.
+import os
+
+#...for parsing the arguments.
+import argparse
+
+#...for the logging.
+import logging as lg
+
+#...for the dataset profile catalog.
+from timestuff.catalog import get_catalog_path, migrate_json_profiles
+
+if __name__ == "__main__":
+
+    print("*")
+    print("*=================================================*")
+    print("* CERN@school - migrating the profiles to catalog *")
+    print("*=================================================*")
+
+    # Get the profile path from the command line.
+    parser = argparse.ArgumentParser()
+    parser.add_argument("inputPath",       help="Path to the dataset profile JSON files.")
+    parser.add_argument("-c", "--catalog", help="The path of the catalog (default: profiles.jsonl in the input path).", default=None)
+    parser.add_argument("-v", "--verbose", help="Increase output verbosity", action="store_true")
+    args = parser.parse_args()
+
+    ## The path to the profiles.
+    datapath = args.inputPath
+
+    # Check if the input directory exists. If it doesn't, quit.
+    if not os.path.isdir(datapath):
+        raise IOError("* ERROR: '%s' input directory does not exist!" % (datapath))
+
+    ## The path to the catalog.
+    catalogpath = args.catalog
+    #
+    if catalogpath is None:
+        catalogpath = get_catalog_path(datapath)
+
+    # Set the logging level.
+    if args.verbose:
+        level=lg.DEBUG
+    else:
+        level=lg.INFO
+
+    # Configure the logging.
+    lg.basicConfig(filename=os.path.join(datapath, 'log_migrate-profiles.log'), filemode='w', level=level)
+
+    print("*")
+    print("* Input path          : '%s'" % (datapath))
+    print("* Catalog             : '%s'" % (catalogpath))
+    print("*")
+
+    ## The number of profiles migrated.
+    n_migrated = migrate_json_profiles(datapath, catalogpath)
+
+    print("* Migrated %d dataset profile(s) to the catalog." % (n_migrated))
+    print("*")
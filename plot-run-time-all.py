@@ -20,17 +20,8 @@ import argparse
 #...for the logging.
 import logging as lg
 
-#...for the data unpacking.
-import struct
-
-#...for the MATH.
-import math
-
-#...for the time (being).
-import time
-
-#...for the extra time (stuff).
-from timestuff import month_start_times, DataMonth, MonthPlot
+#...for the toolkit (its modules are only imported on first use).
+import timestuff
 
 if __name__ == "__main__":
 
@@ -45,6 +36,17 @@ if __name__ == "__main__":
     parser.add_argument("outputPath",      help="The path for the output files.")
     parser.add_argument("numFrames",       help="The number of frames to process (-1 for all).")
     parser.add_argument("startFrame",      help="The starting frame.")
+    parser.add_argument("-p", "--processes", help="The number of plotting processes (default: all cores).", type=int, default=None)
+    parser.add_argument("--profile",       help="The render profile ('fast' or 'publication' - needs LaTeX).", choices=["fast", "publication"], default="fast")
+    parser.add_argument("--formats",       help="Comma-separated output formats to render now (png, svg, ps, pdf).", default="png")
+    parser.add_argument("--defer",         help="Comma-separated output formats to defer to the render queue ('' for none).", default="ps")
+    parser.add_argument("--queue",         help="The deferred render queue directory (default: <outputPath>/deferred).", default=None)
+    parser.add_argument("-f", "--force",   help="Re-render plots even if their data hasn't changed.", action="store_true")
+    parser.add_argument("--no-templates",  help="Build every figure from scratch (no reused templates).", action="store_true")
+    parser.add_argument("--progress",      help="The time between progress reports [s] (0 for none).", type=float, default=10.0)
+    parser.add_argument("--status",        help="The progress status file (default: <outputPath>/status_plot-run-time-all.json).", default=None)
+    parser.add_argument("--textfile-dir",  help="Also export the run metrics to this node exporter textfile collector directory (default: $TIMESTUFF_TEXTFILE_DIR).", default=None)
+    parser.add_argument("--metrics-name",  help="Add this name (e.g. the run ID) to the run metrics' file names and labels (default: none).", default=None)
     parser.add_argument("-v", "--verbose", help="Increase output verbosity", action="store_true")
     args = parser.parse_args()
 
@@ -64,6 +66,18 @@ if __name__ == "__main__":
     ## The start frame.
     start_frame_number = int(args.startFrame)
 
+    ## The output formats to render now.
+    output_formats = [fmt for fmt in args.formats.split(",") if fmt != ""]
+
+    ## The output formats to defer (e.g. for publication).
+    deferred_formats = [fmt for fmt in args.defer.split(",") if fmt != ""]
+
+    ## The deferred render queue directory.
+    queuepath = args.queue
+    #
+    if queuepath is None:
+        queuepath = os.path.join(outputpath, "deferred")
+
     # Set the logging level.
     if args.verbose:
         level=lg.DEBUG
@@ -73,18 +87,30 @@ if __name__ == "__main__":
     # Configure the logging.
     lg.basicConfig(filename=os.path.join(outputpath, 'log_plot-run-time.log'), filemode='w', level=level)
 
+    # Start the run's clock (for the metrics).
+    timestuff.reset_metrics()
+
+    ## The progress reporter (None for no reports).
+    progress = None
+    #
+    if args.progress > 0:
+
+        ## The path of the progress status file.
+        statuspath = args.status
+        #
+        if statuspath is None:
+            statuspath = os.path.join(outputpath, "status_plot-run-time-all.json")
+
+        progress = timestuff.ProgressReporter(os.path.basename(datapath), "plots", args.progress, statuspath)
+
     print("*")
     print("* Input path          : '%s'" % (datapath))
     print("* Output path         : '%s'" % (outputpath))
     print("*")
 
     ## The total number of frames.
-    n_frames = os.path.getsize(datapath) / 8
+    n_frames = os.path.getsize(datapath) // 8
 
-    # Error handling.
-    if n_frames_to_process == -1:
-        n_frames_to_process = n_frames
-    #
     if start_frame_number > n_frames:
         raise IOError("* ERROR! Starting frame number greater than the number of frames.")
 
@@ -93,58 +119,8 @@ if __name__ == "__main__":
     lg.info(" * File size                : % 15d [B]" % (os.path.getsize(datapath)))
     lg.info(" * Number of frames         : % 15d"     % (n_frames))
 
-    ## The month start times.
-    start_times = sorted(month_start_times.values())
-
     ## Dictionary of the month wrapper objects.
-    months = {}
-    #
-    # Populate it.
-    for i, st_s in enumerate(start_times):
-        try:
-            end_time_s = start_times[i+1] - 1
-        except:
-            break
-
-        ## The month ID (for the dictionary key).
-        month_id = time.strftime("%Y-%m", time.gmtime(st_s))
-
-        # Add the month.
-        months[month_id] = DataMonth(st_s, end_time_s)
-
-
-    # Read the information from the binary dataset profile.
-    with open(datapath, "rb") as bf:
-
-        ## The frame count.
-        frame_count = 0
-
-        while True:
-
-            ## The eight bytes representing the next frame.
-            bs = bf.read(8)
-
-            # Skip frames before the start frame (FIXME).
-            if frame_count < start_frame_number:
-                frame_count += 1
-                continue
-
-            # Quit if we're at the end of the file or frame count.
-            if not bs or frame_count > (n_frames_to_process + start_frame_number - 1): break
-
-            ## The frame's data - 8 bytes, eh? Nice.
-            data = struct.unpack("IhH", bs)
-
-            ## The start time (seconds since epoch) - 4 byte unsigned integer.
-            start_time_s = data[0]
-
-            ## The month ID.
-            month_id = time.strftime("%Y-%m", time.gmtime(start_time_s))
-
-            # Add the frame to the month.
-            months[month_id].addFrame(start_time_s)
-
-            frame_count += 1
+    months = timestuff.make_months(timestuff.read_condensed(datapath, start_frame_number, n_frames_to_process))
 
     ## The number of frames processed - check.
     n_frames_check = 0
@@ -159,13 +135,9 @@ if __name__ == "__main__":
     lg.info(" * Total number of frames : %d" % (n_frames))
     lg.info(" *                  Check : %d" % (n_frames_check))
 
-    # Create the plots for each month.
-    for month_id in sorted(months.keys()):
-
-        ## The plot for the current month.
-        m_plot = MonthPlot(months[month_id], y_max=16000, y_label="Frames")
-
-        # Save the plot.
-        m_plot.save_plot(outputpath, "%s" % (months[month_id].getName()))
+    # Render and save the plots for each month, and queue up the deferred
+    # (publication) formats.
+    timestuff.render_plots(timestuff.make_month_plot_jobs(months, outputpath, output_formats, profile=args.profile), args.processes, not args.no_templates, not args.force, deferred_formats, queuepath, progress)
 
-        #break
+    # Write the run's metrics (and export them for the node exporter).
+    timestuff.write_metrics(outputpath, "plot-run-time-all", args.textfile_dir, args.metrics_name)
@@ -20,22 +20,11 @@ import argparse
 #...for the logging.
 import logging as lg
 
-#...for the data unpacking.
-import struct
-
-#...for the MATH.
-import math
-
 #...for the time (being).
 import time
 
-#...for the extra time (stuff).
-#
-from timestuff.constants import *
-#
-from timestuff.wrappers import DataDay
-#
-from timestuff.plots import HourPlot
+#...for the toolkit (its modules are only imported on first use).
+import timestuff
 
 if __name__ == "__main__":
 
@@ -51,6 +40,20 @@ if __name__ == "__main__":
     parser.add_argument("day",             help="The day to plot for.")
     parser.add_argument("numFrames",       help="The number of frames to process (-1 for all).")
     parser.add_argument("startFrame",      help="The starting frame.")
+    parser.add_argument("-p", "--processes", help="The number of plotting processes (default: all cores).", type=int, default=None)
+    parser.add_argument("--profile",       help="The render profile ('fast' or 'publication' - needs LaTeX).", choices=["fast", "publication"], default="fast")
+    parser.add_argument("--formats",       help="Comma-separated output formats to render now (png, svg, ps, pdf).", default="png")
+    parser.add_argument("--defer",         help="Comma-separated output formats to defer to the render queue ('' for none).", default="ps")
+    parser.add_argument("--queue",         help="The deferred render queue directory (default: <outputPath>/deferred).", default=None)
+    parser.add_argument("--renderer",      help="The hour strip renderer ('matplotlib', or 'raster' for the fast PNG-only rasterizer).", choices=["matplotlib", "raster"], default="matplotlib")
+    parser.add_argument("--lod",           help="Level of detail - bin frames narrower than a pixel ('auto', 'on' or 'off').", choices=["auto", "on", "off"], default="auto")
+    parser.add_argument("--payload",       help="Also write the day's compact data payload (for the canvas day page).", action="store_true")
+    parser.add_argument("-f", "--force",   help="Re-render plots even if their data hasn't changed.", action="store_true")
+    parser.add_argument("--no-templates",  help="Build every figure from scratch (no reused templates).", action="store_true")
+    parser.add_argument("--progress",      help="The time between progress reports [s] (0 for none).", type=float, default=10.0)
+    parser.add_argument("--status",        help="The progress status file (default: <outputPath>/<day>/status_plot-run-time-day.json).", default=None)
+    parser.add_argument("--textfile-dir",  help="Also export the run metrics to this node exporter textfile collector directory (default: $TIMESTUFF_TEXTFILE_DIR).", default=None)
+    parser.add_argument("--metrics-name",  help="Add this name (e.g. the run ID) to the run metrics' file names and labels (default: none).", default=None)
     parser.add_argument("-v", "--verbose", help="Increase output verbosity", action="store_true")
     args = parser.parse_args()
 
@@ -67,17 +70,8 @@ if __name__ == "__main__":
     ## The day to plot.
     day_string = args.day
     #
-    ## Time object for the day's start time.
-    day_t = time.strptime(day_string, "%Y-%m-%d")
-
     ## String representing the day's start time.
-    day_str = time.asctime(day_t)
-
-    ## The start time (seconds since epoch) of the specified day [s].
-    day_start_s = time.mktime(day_t)
-
-    ## The end time (seconds since epoch) of the specified day [s].
-    day_end_s = day_start_s + (SECONDS_IN_A_MINUTE * MINUTES_IN_AN_HOUR * HOURS_IN_A_DAY) - 1
+    day_str = time.asctime(time.strptime(day_string, "%Y-%m-%d"))
 
     ## The day's output directory.
     day_output_path = os.path.join(outputpath, day_string)
@@ -91,6 +85,18 @@ if __name__ == "__main__":
     ## The start frame.
     start_frame_number = int(args.startFrame)
 
+    ## The output formats to render now.
+    output_formats = [fmt for fmt in args.formats.split(",") if fmt != ""]
+
+    ## The output formats to defer (e.g. for publication).
+    deferred_formats = [fmt for fmt in args.defer.split(",") if fmt != ""]
+
+    ## The deferred render queue directory.
+    queuepath = args.queue
+    #
+    if queuepath is None:
+        queuepath = os.path.join(outputpath, "deferred")
+
     # Set the logging level.
     if args.verbose:
         level=lg.DEBUG
@@ -100,6 +106,22 @@ if __name__ == "__main__":
     # Configure the logging.
     lg.basicConfig(filename=os.path.join(outputpath, 'log_plot-run-time-day.log'), filemode='w', level=level)
 
+    # Start the run's clock (for the metrics).
+    timestuff.reset_metrics()
+
+    ## The progress reporter (None for no reports).
+    progress = None
+    #
+    if args.progress > 0:
+
+        ## The path of the progress status file.
+        statuspath = args.status
+        #
+        if statuspath is None:
+            statuspath = os.path.join(day_output_path, "status_plot-run-time-day.json")
+
+        progress = timestuff.ProgressReporter(os.path.basename(datapath), "plots", args.progress, statuspath)
+
     print("*")
     print("* Input path          : '%s'" % (datapath))
     print("* Output path         : '%s'" % (outputpath))
@@ -108,12 +130,8 @@ if __name__ == "__main__":
     print("*")
 
     ## The total number of frames.
-    n_frames = os.path.getsize(datapath) / 8
+    n_frames = os.path.getsize(datapath) // 8
 
-    # Error handling.
-    if n_frames_to_process == -1:
-        n_frames_to_process = n_frames
-    #
     if start_frame_number > n_frames:
         raise IOError("* ERROR! Starting frame number greater than the number of frames.")
 
@@ -123,63 +141,19 @@ if __name__ == "__main__":
     lg.info(" * Number of frames         : % 15d"     % (n_frames))
 
     ## The day to profile.
-    my_day = DataDay(day_start_s, day_end_s)
-
-    # Read the information from the binary dataset profile.
-    with open(datapath, "rb") as bf:
-
-        ## The frame count.
-        frame_count = 0
-
-        while True:
-
-            ## The eight bytes representing the next frame.
-            bs = bf.read(8)
-
-            # Skip frames before the start frame (FIXME).
-            if frame_count < start_frame_number:
-                frame_count += 1
-                continue
-
-            # Quit if we're at the end of the file or frame count.
-            if not bs or frame_count > (n_frames_to_process + start_frame_number - 1): break
-
-            ## The frame's data - 8 bytes, eh? Nice.
-            data = struct.unpack("IhH", bs)
-
-            ## The start time (seconds since epoch) - 4 byte unsigned integer.
-            start_time_s = data[0]
-
-            ## The acquisition time (decoded 2 byte signed integer).
-            acq_time = math.pow(10, int(data[1]))
-
-            ## The number of hit pixels (2 byte unsigned integer).
-            n_pixels = int(data[2])
-
-            # Check if the start time is within the day.
-            if day_start_s <= start_time_s <= day_end_s:
-                my_day.addFrame(start_time_s, acq_time, n_pixels)
-
-            frame_count += 1
-
-    ## The number of frames processed - check.
-    n_frames_check = 0
-
-    ## Dictionary of the hour plots.
-    hour_plots = {}
+    my_day = timestuff.make_day(timestuff.read_condensed(datapath, start_frame_number, n_frames_to_process), day_string)
 
     # Loop over the hours in the day.
-    #
-    for hour, frames in my_day.getFramesInEachHour().iteritems():
-        #
-        n_frames_check += frames
-        #
+    for hour, frames in sorted(my_day.getFramesInEachHour().items()):
         lg.info(" * Frames in hour %02d: % 10d" % (hour, frames))
 
-        # Make the plot for the hour.
-        hour_plots[hour] = HourPlot(my_day.getHour(hour), y_label="Pixels per second / [$\\textrm{s}^{-1}$]", y_max=30)
+    # Render and save the hour plots (to the day's output directory), and
+    # queue up the deferred (publication) formats.
+    timestuff.render_plots(timestuff.make_hour_plot_jobs(my_day, day_output_path, output_formats, args.renderer, profile=args.profile, lod=args.lod), args.processes, not args.no_templates, not args.force, deferred_formats, queuepath, progress)
 
-        # Save the profile plot to the output directory.
-        hour_plots[hour].save_plot(day_output_path, hour)
+    # Write the day's data payload (for the canvas day page).
+    if args.payload:
+        timestuff.write_day_payload(my_day, day_output_path)
 
-        #break
+    # Write the run's metrics (and export them for the node exporter).
+    timestuff.write_metrics(outputpath, "plot-run-time-day", args.textfile_dir, args.metrics_name)
@@ -23,11 +23,11 @@ import logging as lg
 # Import the JSON library.
 import json
 
-#...for the ROOT stuff.
-from ROOT import TFile, TTree
+#...for the toolkit (its modules are only imported on first use).
+import timestuff
 
-#... handler functions.
-from handlers import getPixelmanTimeString, make_time_dir
+#...for the dataset profile catalog.
+from timestuff.catalog import get_catalog_path, add_to_catalog
 
 if __name__ == "__main__":
 
@@ -42,6 +42,11 @@ if __name__ == "__main__":
     parser.add_argument("outputPath",      help="The path for the output files.")
     parser.add_argument("numFrames",       help="The number of frames to process (-1 for all).")
     parser.add_argument("startFrame",      help="The starting frame.")
+    parser.add_argument("--json",          help="Also write the (old style) per-dataset JSON file.", action="store_true")
+    parser.add_argument("--progress",      help="The time between progress reports [s] (0 for none).", type=float, default=10.0)
+    parser.add_argument("--status",        help="The progress status file (default: <outputPath>/status_profile-dataset.json).", default=None)
+    parser.add_argument("--textfile-dir",  help="Also export the run metrics to this node exporter textfile collector directory (default: $TIMESTUFF_TEXTFILE_DIR).", default=None)
+    parser.add_argument("--metrics-name",  help="Add this name (e.g. the run ID) to the run metrics' file names and labels (default: none).", default=None)
     parser.add_argument("-v", "--verbose", help="Increase output verbosity", action="store_true")
     args = parser.parse_args()
 
@@ -70,132 +75,47 @@ if __name__ == "__main__":
     # Configure the logging.
     lg.basicConfig(filename=os.path.join(outputpath, 'log_profile-dataset.log'), filemode='w', level=level)
 
-    print("*")
-    print("* Input path          : '%s'" % (datapath))
-    print("* Output path         : '%s'" % (outputpath))
-    print("*")
-
-    ## The ROOT file containing the dataset to be profiled.
-    f = TFile(datapath, "READ")
-
-    ## The TTree containing the data.
-    dataset_chain = f.Get('dscData')
+    # Start the run's clock (for the metrics).
+    timestuff.reset_metrics()
 
-    ## The number of frames in the file.
-    n_frames = dataset_chain.GetEntriesFast()
-
-    # Error handling.
-    if n_frames_to_process == -1:
-        n_frames_to_process = n_frames
+    ## The progress reporter (None for no reports).
+    progress = None
     #
-    if start_frame_number > dataset_chain.GetEntriesFast():
-        raise IOError("* ERROR! Starting frame number greater than the number of frames.")
-
-    ## The chip ID, determined from the dataset filename.
-    chip_id = None
-
-    ## The dataset filename.
-    dataset_file_name = os.path.basename(datapath)
-
-    if   dataset_file_name[0:5] == "tpx01":
-        chip_id = "F03-W0098"
-    elif dataset_file_name[0:5] == "tpx02":
-        chip_id = "F04-W0098"
-    else:
-        raise IOError("* ERROR! Invalid chip ID!")
-
-    lg.info(" *")
-    lg.info(" * Input path          : '%s'" % (datapath))
-    lg.info(" * Output path         : '%s'" % (outputpath))
-    lg.info(" *")
-    lg.info(" * Chip ID             : '%s'" % (chip_id))
-    lg.info(" *")
-    lg.info(" * Number of frames in the dataset  : % 15d" % (n_frames))
-    lg.info(" * Starting frame                   : % 15d" % (start_frame_number))
-    lg.info(" * Frames to be processed           : % 15d" % (n_frames_to_process))
-    lg.info(" *")
-
-    ## List of the start times.
-    st_s = []
-
-    # Loop over the frames.
-    for fn in range(start_frame_number, n_frames_to_process):
-
-        # Load the TTree.
-        ientry = dataset_chain.LoadTree(fn)
-
-        # Copy the entry into memory.
-        nb = dataset_chain.GetEntry(fn)
-
-        ## The start time of the frame.
-        st = float(dataset_chain.Start_time)
-
-        # Add the start timt to the list.
-        st_s.append(st)
-
-        #start_time_s, start_time_subsec, start_time_str = getPixelmanTimeString(st)
+    if args.progress > 0:
 
-        #acq_time = float(dataset_chain.Acq_time)
+        ## The path of the progress status file.
+        statuspath = args.status
+        #
+        if statuspath is None:
+            statuspath = os.path.join(outputpath, "status_profile-dataset.json")
 
-        #lg.info(" * Frame % 15d: %s (%f), %f [s]" % (fn, start_time_str, st, acq_time))
+        progress = timestuff.ProgressReporter(os.path.basename(datapath), "frames", args.progress, statuspath)
 
-    ## The acquisition time for the frame (from the last frame).
-    delta_t = dataset_chain.Acq_time
-
-    # Close the ROOT file.
-    f.Close()
-
-    # Sort the list of start times.
-    st_s = sorted(st_s)
-
-    # Get the first frame's start time information.
-    first_start_time_s, first_start_time_subsec, first_start_time_str = getPixelmanTimeString(st_s[0])
-
-    # Get the last frame's start time information.
-    last_start_time_s, last_start_time_subsec, last_start_time_str = getPixelmanTimeString(st_s[-1])
+    print("*")
+    print("* Input path          : '%s'" % (datapath))
+    print("* Output path         : '%s'" % (outputpath))
+    print("*")
 
-    ## The total length of time covered by the dataset [s].
-    Delta_T = st_s[-1] - st_s[0]
+    ## The run ID and dataset information.
+    run_id, dataset_info_dict = timestuff.profile_dataset(datapath, start_frame_number, n_frames_to_process, progress)
 
-    ## The average time between frames [s].
-    Delta_t = Delta_T / (len(st_s) - 1)
+    lg.info(" * Run ID          : '%s'" % (run_id))
+    lg.info(" * Chip ID         : '%s'" % (dataset_info_dict["chip_id"]))
+    lg.info(" *")
+    lg.info(" * Number of frames: % 15d" % (dataset_info_dict["n_frames"]))
+    lg.info(" * File size       : % 15d [B]" % (dataset_info_dict["file_size"]))
 
-    ## The file size [B].
-    file_size = os.path.getsize(datapath)
+    # Add the dataset information to the catalog.
+    add_to_catalog(get_catalog_path(outputpath), run_id, dataset_info_dict)
 
-    # Create the dataset information JSON.
-    dataset_info_dict = {}
-    #
-    dataset_info_dict["chip_id"] = chip_id
-    #
-    dataset_info_dict["start_time_s"] = first_start_time_s
-    #
-    dataset_info_dict["Delta_T"] = Delta_T
-    #
-    dataset_info_dict["Delta_t"] = Delta_t
-    #
-    dataset_info_dict["delta_t"] = delta_t
-    #
-    dataset_info_dict["file_name"] = dataset_file_name
-    #
-    dataset_info_dict["n_frames"] = n_frames
-    #
-    dataset_info_dict["file_size"] = file_size
+    if args.json:
 
-    lg.info(" * Chip ID         : '%s'" % (chip_id))
-    lg.info(" *")
-    lg.info(" * First start time: %s (%f)" % (first_start_time_str, st_s[ 0]))
-    lg.info(" * Last  start time: %s (%f)" % (last_start_time_str,  st_s[-1]))
-    lg.info(" *")
-    lg.info(" * Delta_{T} = %f [s]" % (Delta_T))
-    lg.info(" *")
-    lg.info(" * Delta_{t} = %f [s]" % (Delta_t))
-    lg.info(" *")
-    lg.info(" * File size = %d [B]" % (file_size))
+        ## The JSON file name.
+        json_file_name = "%s.json" % (run_id)
+        #
+        # Write out the frame information to a JSON file.
+        with open(os.path.join(outputpath, json_file_name), "w") as jf:
+            json.dump(dataset_info_dict, jf)
 
-    ## The JSON file name.
-    json_file_name = "%s_%s.json" % (chip_id, make_time_dir(st_s[0]))
-    #
-    # Write out the frame information to a JSON file.
-    with open(os.path.join(outputpath, json_file_name), "w") as jf:
-        json.dump(dataset_info_dict, jf)
+    # Write the run's metrics (and export them for the node exporter).
+    timestuff.write_metrics(outputpath, "profile-dataset", args.textfile_dir, args.metrics_name)
@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+
+ CERN@school - Querying the condensed data by time.
+
+ See the README.md file and the GitHub wiki for more information.
+
+ http://cernatschool.web.cern.ch
+
+"""
+
+# Import the code needed to manage files.
+import os
+
+#...for parsing the arguments.
+import argparse
+
+#...for the logging.
+import logging as lg
+
+# Import the JSON library.
+import json
+
+#...for the toolkit (its modules are only imported on first use).
+import timestuff
+
+#...for the profile catalog.
+from timestuff.catalog import get_catalog_path
+
+if __name__ == "__main__":
+
+    print("*")
+    print("*================================================*")
+    print("* CERN@school - query the condensed data by time *")
+    print("*================================================*")
+
+    # Get the query from the command line.
+    parser = argparse.ArgumentParser()
+    parser.add_argument("inputPath",       help="Path to the binary input data (.bin) files.")
+    parser.add_argument("startTime",       help="The start of the time window (UTC, e.g. 2012-09-01T13:00:00, or seconds since the epoch).")
+    parser.add_argument("endTime",         help="The end of the time window (exclusive).")
+    parser.add_argument("--chip",          help="Only count the frames from this chip (e.g. F04-W0098).", default=None)
+    parser.add_argument("--catalog",       help="The profile catalog (default: profiles.jsonl in the input path).", default=None)
+    parser.add_argument("--frames",        help="Write the frames in the window to this (condensed) binary file.", default=None)
+    parser.add_argument("--json",          help="Print the totals as JSON.", action="store_true")
+    parser.add_argument("-v", "--verbose", help="Increase output verbosity", action="store_true")
+    args = parser.parse_args()
+
+    ## The path to the data files.
+    datapath = args.inputPath
+
+    # Check if the input directory exists. If it doesn't, quit.
+    if not os.path.isdir(datapath):
+        raise IOError("* ERROR: '%s' input directory does not exist!" % (datapath))
+
+    ## The path to the profile catalog.
+    catalogpath = args.catalog
+    #
+    if catalogpath is None:
+        catalogpath = get_catalog_path(datapath)
+
+    ## The time window [s].
+    t_start, t_end = timestuff.parse_time(args.startTime), timestuff.parse_time(args.endTime)
+
+    # Set the logging level.
+    if args.verbose:
+        level=lg.DEBUG
+    else:
+        level=lg.WARNING
+
+    # Configure the logging (no output directory, so to the console).
+    lg.basicConfig(level=level)
+
+    print("*")
+    print("* Input path          : '%s'" % (datapath))
+    print("* Time window         : %d - %d [s]" % (t_start, t_end))
+    print("* Chip ID             : %s" % (args.chip))
+    print("*")
+
+    ## The query.
+    query = timestuff.FrameQuery(datapath, catalogpath)
+
+    if args.frames is not None:
+
+        ## The frames in the window.
+        frames = query.getFrames(t_start, t_end, args.chip)
+        #
+        frames.tofile(args.frames)
+
+        print("* Written %d frame(s) to '%s'." % (len(frames), args.frames))
+
+    else:
+
+        ## The totals for the window.
+        totals = query.getTotals(t_start, t_end, args.chip)
+
+        if args.json:
+            print(json.dumps(totals, sort_keys=True))
+        else:
+            print("* Runs                : % 15d" % (totals["runs"]))
+            print("* Frames              : % 15d" % (totals["frames"]))
+            print("* Noisy frames        : % 15d" % (totals["noisy"]))
+            print("* Pixels              : % 15d" % (totals["pixels"]))
+            print("* Live time [s]       : % 15.3f" % (totals["live_time"]))
+
+    print("*")
@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+
+ CERN@school - Rendering the deferred (publication) plots.
+
+ See the README.md file and the GitHub wiki for more information.
+
+ http://cernatschool.web.cern.ch
+
+"""
+
+# Import the code needed to manage files.
+import os
+
+#...for parsing the arguments.
+import argparse
+
+#...for the logging.
+import logging as lg
+
+#...for the toolkit (its modules are only imported on first use).
+import timestuff
+
+if __name__ == "__main__":
+
+    print("*")
+    print("*=====================================*")
+    print("* CERN@school - render deferred plots *")
+    print("*=====================================*")
+
+    # Get the datafile path from the command line.
+    parser = argparse.ArgumentParser()
+    parser.add_argument("queuePath",       help="Path to the deferred render queue.")
+    parser.add_argument("-p", "--processes", help="The number of plotting processes (default: all cores).", type=int, default=None)
+    parser.add_argument("-v", "--verbose", help="Increase output verbosity", action="store_true")
+    args = parser.parse_args()
+
+    ## The path to the deferred render queue.
+    queuepath = args.queuePath
+
+    # Check if the queue directory exists. If it doesn't, quit.
+    if not os.path.isdir(queuepath):
+        raise IOError("* ERROR: '%s' queue directory does not exist!" % (queuepath))
+
+    # Set the logging level.
+    if args.verbose:
+        level=lg.DEBUG
+    else:
+        level=lg.INFO
+
+    # Configure the logging.
+    lg.basicConfig(filename=os.path.join(queuepath, 'log_render-deferred.log'), filemode='w', level=level)
+
+    print("*")
+    print("* Queue path          : '%s'" % (queuepath))
+    print("*")
+
+    ## The names of the rendered plots.
+    names = timestuff.render_deferred_plot_jobs(queuepath, args.processes)
+
+    print("* Rendered %d deferred plot(s)." % (len(names)))
+    print("*")
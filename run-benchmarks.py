@@ -0,0 +1,175 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+
+ CERN@school - Benchmarking the toolkit's stages.
+
+ See the README.md file and the GitHub wiki for more information.
+
+ http://cernatschool.web.cern.ch
+
+"""
+
+# Import the code needed to manage files.
+import os, sys
+
+#...for parsing the arguments.
+import argparse
+
+#...for the logging.
+import logging as lg
+
+# Import the JSON library.
+import json
+
+#...for the toolkit (its modules are only imported on first use).
+import timestuff
+
+if __name__ == "__main__":
+
+    print("*")
+    print("*==============================================*")
+    print("* CERN@school - benchmark the toolkit's stages *")
+    print("*==============================================*")
+
+    # Get the datafile path from the command line.
+    parser = argparse.ArgumentParser()
+    parser.add_argument("inputPath",       help="Path to the binary input data (e.g. from make-synthetic-run.py).")
+    parser.add_argument("outputPath",      help="The path for the output files.")
+    parser.add_argument("--stages",        help="Comma-separated stages to run (default: all).", default=None)
+    parser.add_argument("--max-struct-frames", help="The maximum number of frames for the one-at-a-time stages (condense, profile, decode_struct).", type=int, default=1000000)
+    parser.add_argument("--baseline",      help="The baseline results to compare to (default: <outputPath>/bench-baseline.json).", default=None)
+    parser.add_argument("--save-baseline", help="Save the results as the new baseline.", action="store_true")
+    parser.add_argument("--tolerance",     help="The allowed fractional slowdown (or memory growth).", type=float, default=0.2)
+    parser.add_argument("-v", "--verbose", help="Increase output verbosity", action="store_true")
+    args = parser.parse_args()
+
+    ## The path to the data file.
+    datapath = args.inputPath
+
+    ## The output path.
+    outputpath = args.outputPath
+
+    # Check if the input file and output directory exist. If they don't, quit.
+    if not os.path.isfile(datapath):
+        raise IOError("* ERROR: '%s' input file does not exist!" % (datapath))
+    #
+    if not os.path.isdir(outputpath):
+        raise IOError("* ERROR: '%s' output directory does not exist!" % (outputpath))
+
+    ## The path to the baseline results.
+    baselinepath = args.baseline
+    #
+    if baselinepath is None:
+        baselinepath = os.path.join(outputpath, "bench-baseline.json")
+
+    ## The directory for the stages' outputs (plots and pages).
+    workpath = os.path.join(outputpath, "bench")
+    #
+    if not os.path.isdir(workpath):
+        os.mkdir(workpath)
+
+    # Set the logging level.
+    if args.verbose:
+        level=lg.DEBUG
+    else:
+        level=lg.INFO
+
+    # Configure the logging.
+    lg.basicConfig(filename=os.path.join(outputpath, 'log_run-benchmarks.log'), filemode='w', level=level)
+
+    print("*")
+    print("* Input path          : '%s'" % (datapath))
+    print("* Output path         : '%s'" % (outputpath))
+    print("* Baseline            : '%s'" % (baselinepath))
+    print("*")
+
+    ## The stages to run.
+    stages = timestuff.BENCH_STAGES
+    #
+    if args.stages is not None:
+        stages = args.stages.split(",")
+        #
+        for stage in stages:
+            if stage not in timestuff.BENCH_STAGES:
+                raise IOError("* ERROR: unknown stage '%s' (one of %s)!" % (stage, ", ".join(timestuff.BENCH_STAGES)))
+
+    ## The results.
+    results = timestuff.run_benchmarks(datapath, workpath, stages, args.max_struct_frames)
+
+    with open(os.path.join(outputpath, "bench-results.json"), "w") as rf:
+        json.dump(results, rf, sort_keys=True, indent=1)
+
+    ## The baseline results.
+    baseline = {}
+    #
+    if os.path.exists(baselinepath):
+        with open(baselinepath, "r") as bf:
+            baseline = json.load(bf)
+
+    # Only compare to a baseline measured on the same input.
+    if len(baseline) > 0 and not timestuff.is_same_input(results, baseline):
+
+        if not args.save_baseline:
+            raise IOError("* ERROR: '%s' was measured on a different input (%s frames, %s B) - use --save-baseline to replace it!" % (baselinepath, baseline.get("frames"), baseline.get("file_size")))
+
+        print("* The old baseline was measured on a different input - not comparing.")
+        print("*")
+
+        baseline = {}
+
+    print("* Frames in the file  : %d (%d B)" % (results["frames"], results["file_size"]))
+    print("*")
+    print("* %-14s % 12s % 10s % 14s % 12s % 10s" % ("Stage", "Frames", "Time [s]", "Frames/s", "Peak [MB]", "vs. base"))
+    #
+    for stage in [s for s in timestuff.BENCH_STAGES if s in results["stages"]]:
+
+        ## The stage's results.
+        r = results["stages"][stage]
+
+        ## The change in throughput from the baseline.
+        change = ""
+        #
+        if stage in baseline.get("stages", {}) and baseline["stages"][stage]["frames_per_s"] > 0:
+            change = "%+.1f%%" % (100.0 * (r["frames_per_s"] / baseline["stages"][stage]["frames_per_s"] - 1.0))
+
+        print("* %-14s % 12d % 10.3f % 14.0f % 12.1f % 10s" % (stage, r["frames"], r["time"], r["frames_per_s"], r["peak_rss_mb"], change))
+    #
+    for stage in [s for s in timestuff.BENCH_STAGES if s in results["skipped"]]:
+        print("* %-14s skipped: %s" % (stage, results["skipped"][stage]))
+    #
+    print("*")
+
+    # The tree accesses made per entry by the ingest stages.
+    for stage in [s for s in timestuff.BENCH_STAGES if "accesses" in results["stages"].get(s, {})]:
+
+        print("* %-14s %-26s % 8s % 10s" % (stage + " tree", "Access", "Calls", "Time [us]"))
+        #
+        for name, cost in sorted(results["stages"][stage]["accesses"].items()):
+            print("* %-14s %-26s % 8.2f % 10.3f" % ("", name, cost["calls"], cost["us"]))
+        #
+        print("*")
+
+    ## The regressions from the baseline.
+    regressions = []
+    #
+    if len(baseline) > 0:
+        regressions = timestuff.compare_to_baseline(results, baseline, args.tolerance)
+
+    for stage, metric, base, now in regressions:
+        print("* REGRESSION: %-14s %s %.1f -> %.1f" % (stage, metric, base, now))
+        #
+        lg.warning(" * Regression: %s %s %.1f -> %.1f" % (stage, metric, base, now))
+
+    if args.save_baseline:
+
+        with open(baselinepath, "w") as bf:
+            json.dump(results, bf, sort_keys=True, indent=1)
+
+        print("* Saved the results as the baseline.")
+
+    print("*")
+
+    if len(regressions) > 0 and not args.save_baseline:
+        sys.exit(1)
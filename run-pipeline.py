@@ -0,0 +1,166 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+
+ CERN@school - Running the whole toolkit pipeline.
+
+ See the README.md file and the GitHub wiki for more information.
+
+ http://cernatschool.web.cern.ch
+
+"""
+
+# Import the code needed to manage files.
+import os, glob
+
+#...for parsing the arguments.
+import argparse
+
+#...for the logging.
+import logging as lg
+
+#...for the time (being).
+import time
+
+#...for the pipeline.
+from timestuff.pipeline import STAGES, run_pipeline, make_mafalda_tasks, make_dsc_tasks
+
+#...for the toolkit (its modules are only imported on first use).
+import timestuff
+
+if __name__ == "__main__":
+
+    print("*")
+    print("*=========================================*")
+    print("* CERN@school - running the data pipeline *")
+    print("*=========================================*")
+
+    # Get the paths from the command line.
+    parser = argparse.ArgumentParser()
+    parser.add_argument("outputPath",      help="The path for the output files.")
+    parser.add_argument("--mafalda",       help="A directory of (Mafalda) run ROOT files to condense and plot.", action="append", default=[])
+    parser.add_argument("--dsc",           help="A directory of (DSC) dataset ROOT files to profile.", action="append", default=[])
+    parser.add_argument("-p", "--processes", help="The number of tasks to run at once.", type=int, default=1)
+    parser.add_argument("-f", "--force",   help="Run every task, even if it is up to date.", action="store_true")
+    parser.add_argument("-n", "--dry-run", help="Only list the tasks that would be run.", action="store_true")
+    parser.add_argument("--in-process",    help="Run every stage in this process, with no intermediate files read back (no staleness checks).", action="store_true")
+    parser.add_argument("--textfile-dir",  help="Also export the run metrics to this node exporter textfile collector directory (default: $TIMESTUFF_TEXTFILE_DIR).", default=None)
+    parser.add_argument("-v", "--verbose", help="Increase output verbosity", action="store_true")
+    args = parser.parse_args()
+
+    ## The output path.
+    outputpath = args.outputPath
+
+    # Check if the directories exist. If they don't, quit.
+    if not os.path.isdir(outputpath):
+        raise IOError("* ERROR: '%s' output directory does not exist!" % (outputpath))
+    #
+    for path in args.mafalda + args.dsc:
+        if not os.path.isdir(path):
+            raise IOError("* ERROR: '%s' input directory does not exist!" % (path))
+
+    # Running in-process has no task list to show, so it can't be a dry run.
+    if args.in_process and args.dry_run:
+        raise IOError("* ERROR: --dry-run can't be used with --in-process!")
+
+    # Set the logging level.
+    if args.verbose:
+        level=lg.DEBUG
+    else:
+        level=lg.INFO
+
+    # Configure the logging.
+    lg.basicConfig(filename=os.path.join(outputpath, 'log_run-pipeline.log'), filemode='w', level=level)
+
+    # Start the run's clock (for the metrics).
+    timestuff.reset_metrics()
+
+    # Pass the textfile collector directory on to the tasks' scripts.
+    if args.textfile_dir is not None:
+        os.environ["TIMESTUFF_TEXTFILE_DIR"] = args.textfile_dir
+
+    print("*")
+    print("* Output path         : '%s'" % (outputpath))
+    print("* Mafalda paths       : %s" % (", ".join(args.mafalda)))
+    print("* DSC paths           : %s" % (", ".join(args.dsc)))
+    print("*")
+
+    ## The (Mafalda) runs to condense and plot.
+    mafalda_paths = []
+    #
+    for path in args.mafalda:
+        mafalda_paths += sorted(glob.glob(os.path.join(path, "*.root")))
+
+    ## The (DSC) datasets to profile.
+    dsc_paths = []
+    #
+    for path in args.dsc:
+        dsc_paths += sorted(glob.glob(os.path.join(path, "*.root")))
+
+    ## The time taken [s].
+    t0 = time.time()
+
+    if args.in_process:
+
+        ## The pipeline report { stage:totals } (all of the stages for each input).
+        report = {}
+
+        for rootpath in mafalda_paths:
+
+            ## The time taken by each stage for the run [s].
+            times = timestuff.process_mafalda_file(rootpath, outputpath, processes=args.processes, force=args.force)
+
+            for stage, dt in times.items():
+                report.setdefault(stage, {"run":0, "skipped":0, "failed":0, "time":0.0})["run"] += 1
+                report[stage]["time"] += dt
+
+            print("* %-40s done (%.1f s)" % (os.path.basename(rootpath), sum(times.values())))
+
+        if len(dsc_paths) > 0:
+
+            ## The time taken for the datasets [s].
+            t_dsc = time.time()
+
+            timestuff.process_dsc_files(dsc_paths, outputpath, force=args.force)
+
+            report["profile"] = {"run":len(dsc_paths), "skipped":0, "failed":0, "time":time.time() - t_dsc}
+
+    else:
+
+        ## The pipeline tasks.
+        tasks = []
+        #
+        for rootpath in mafalda_paths:
+            tasks += make_mafalda_tasks(rootpath, outputpath)
+        #
+        if len(dsc_paths) > 0:
+            tasks += make_dsc_tasks(dsc_paths, outputpath)
+
+        ## The pipeline report { stage:totals }.
+        report = run_pipeline(tasks, outputpath, args.processes, args.force, args.dry_run)
+
+    print("*")
+    print("* %-10s % 6s % 8s % 7s % 10s" % ("Stage", "Run", "Skipped", "Failed", "Time [s]"))
+    #
+    for stage in [s for s in STAGES if s in report]:
+
+        ## The stage's totals.
+        totals = report[stage]
+
+        print("* %-10s % 6d % 8d % 7d % 10.1f" % (stage, totals["run"], totals["skipped"], totals["failed"], totals["time"]))
+
+        lg.info(" * Stage %-10s: %d run, %d skipped, %d failed, %.1f s." % (stage, totals["run"], totals["skipped"], totals["failed"], totals["time"]))
+
+        # Record the stage's totals in the run metrics.
+        timestuff.add_time(stage, totals["time"], totals["run"])
+        #
+        for state in ["run", "skipped", "failed"]:
+            timestuff.add_count("tasks_%s" % (state), totals[state])
+    #
+    print("*")
+    print("* Total time: %.1f s." % (time.time() - t0))
+    print("*")
+
+    # Write the run's metrics (and export them for the node exporter).
+    timestuff.write_metrics(outputpath, "run-pipeline", args.textfile_dir)
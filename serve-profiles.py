@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+
+ CERN@school - Serving the dataset profiles and plots (locally).
+
+ See the README.md file and the GitHub wiki for more information.
+
+ http://cernatschool.web.cern.ch
+
+"""
+
+# Import the code needed to manage files.
+import os
+
+#...for parsing the arguments.
+import argparse
+
+#...for the logging.
+import logging as lg
+
+#...for the toolkit (its modules are only imported on first use).
+import timestuff
+
+#...for the profile catalog.
+from timestuff.catalog import get_catalog_path
+
+if __name__ == "__main__":
+
+    print("*")
+    print("*==========================================*")
+    print("* CERN@school - serving the profiles/plots *")
+    print("*==========================================*")
+
+    # Get the paths from the command line.
+    parser = argparse.ArgumentParser()
+    parser.add_argument("inputPath",       help="Path to the binary input data (.bin) files.")
+    parser.add_argument("outputPath",      help="The path for the rendered plots (and the log).")
+    parser.add_argument("--catalog",       help="The profile catalog (default: profiles.jsonl in the input path).", default=None)
+    parser.add_argument("--port",          help="The port to listen on (on localhost).", type=int, default=8000)
+    parser.add_argument("-p", "--processes", help="The number of rendering processes (default: all cores).", type=int, default=None)
+    parser.add_argument("--cache-mb",      help="The size of the in-memory cache [MB].", type=int, default=64)
+    parser.add_argument("--disk-cache-mb", help="The size of the disk cache of rendered plots [MB].", type=int, default=1024)
+    parser.add_argument("-v", "--verbose", help="Increase output verbosity", action="store_true")
+    args = parser.parse_args()
+
+    ## The path to the data files.
+    datapath = args.inputPath
+
+    ## The output path.
+    outputpath = args.outputPath
+
+    # Check if the directories exist. If they don't, quit.
+    if not os.path.isdir(datapath):
+        raise IOError("* ERROR: '%s' input directory does not exist!" % (datapath))
+    #
+    if not os.path.isdir(outputpath):
+        raise IOError("* ERROR: '%s' output directory does not exist!" % (outputpath))
+
+    ## The path to the profile catalog.
+    catalogpath = args.catalog
+    #
+    if catalogpath is None:
+        catalogpath = get_catalog_path(datapath)
+
+    # Set the logging level.
+    if args.verbose:
+        level=lg.DEBUG
+    else:
+        level=lg.INFO
+
+    # Configure the logging.
+    lg.basicConfig(filename=os.path.join(outputpath, 'log_serve-profiles.log'), filemode='w', level=level)
+
+    print("*")
+    print("* Input path          : '%s'" % (datapath))
+    print("* Output path         : '%s'" % (outputpath))
+    print("* Catalog             : '%s'" % (catalogpath))
+    print("*")
+
+    ## The profile service.
+    service = timestuff.ProfileService(datapath, os.path.join(outputpath, "plots"), catalogpath, args.processes, args.cache_mb * 1024 * 1024, args.disk_cache_mb * 1024 * 1024)
+
+    ## The server.
+    server = timestuff.ProfileServer(service, args.port)
+
+    print("* Serving on http://127.0.0.1:%d/ (Ctrl-C to stop)." % (args.port))
+    print("*")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
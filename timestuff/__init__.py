@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+
+CERN@school: Data Profiling - Time Stuff.
+
+The toolkit's main names can be imported from the package itself, e.g.
+
+    from timestuff import month_start_times, DataMonth, MonthPlot
+
+or used as timestuff.<name>. Each module is only imported the first time
+one of its names is used, so that the heavy dependencies (matplotlib,
+numpy and ROOT) aren't loaded by the scripts until they are needed - i.e.
+not for --help or a bad path.
+
+See http://cernatschool.web.cern.ch for more information.
+
+"""
+
+#...for importing the modules on first use.
+import importlib
+
+## The names exported by the package { name:module }.
+EXPORTS = {
+    "SECONDS_IN_A_MINUTE"       : "constants",
+    "MINUTES_IN_AN_HOUR"        : "constants",
+    "HOURS_IN_A_DAY"            : "constants",
+    "month_start_times"         : "constants",
+    "DataMonth"                 : "wrappers",
+    "DataDay"                   : "wrappers",
+    "DataHour"                  : "wrappers",
+    "MonthPlot"                 : "plots",
+    "HourPlot"                  : "plots",
+    "FRAME_DTYPE"               : "rollup",
+    "ROLLUP_LEVELS"             : "rollup",
+    "read_condensed"            : "rollup",
+    "make_rollup"               : "rollup",
+    "make_plot_job"             : "scheduler",
+    "render_plot_jobs"          : "scheduler",
+    "defer_plot_jobs"           : "scheduler",
+    "render_deferred_plot_jobs" : "scheduler",
+    "FrameQuery"                : "query",
+    "parse_time"                : "query",
+    "read_catalog"              : "catalog",
+    "add_to_catalog"            : "catalog",
+    "ProfileService"            : "service",
+    "ProfileServer"             : "service",
+    "run_pipeline"              : "pipeline",
+    "condense_dataset"          : "stages",
+    "condense_tree"             : "stages",
+    "write_condensed"           : "stages",
+    "profile_dataset"           : "stages",
+    "profile_tree"              : "stages",
+    "make_months"               : "stages",
+    "make_day"                  : "stages",
+    "make_month_plot_jobs"      : "stages",
+    "make_hour_plot_jobs"       : "stages",
+    "render_plots"              : "stages",
+    "write_day_payload"         : "stages",
+    "build_plot_page"           : "stages",
+    "build_day_page"            : "stages",
+    "build_profile_pages"       : "stages",
+    "build_tiles"               : "stages",
+    "process_run"               : "stages",
+    "process_mafalda_file"      : "stages",
+    "process_dsc_files"         : "stages",
+    "FakeMPXTree"               : "trees",
+    "FakeDSCTree"               : "trees",
+    "AccessCounter"             : "trees",
+    "CountingTree"              : "trees",
+    "timed"                     : "metrics",
+    "add_time"                  : "metrics",
+    "add_count"                 : "metrics",
+    "get_metrics"               : "metrics",
+    "reset_metrics"             : "metrics",
+    "write_metrics"             : "metrics",
+    "ProgressReporter"          : "progress",
+    "read_status"               : "progress",
+    "SYNTH_ACQ_CODES"           : "synth",
+    "fit_synthetic_duration"    : "synth",
+    "make_synthetic_frames"     : "synth",
+    "write_synthetic_run"       : "synth",
+    "BENCH_STAGES"              : "bench",
+    "run_benchmarks"            : "bench",
+    "is_same_input"             : "bench",
+    "compare_to_baseline"       : "bench",
+    }
+
+__all__ = sorted(EXPORTS.keys())
+
+def __getattr__(name):
+    """ Get an exported name, importing its module the first time (PEP 562). """
+
+    if name not in EXPORTS:
+        raise AttributeError("module 'timestuff' has no attribute '%s'" % (name))
+
+    ## The name's value, from its module.
+    value = getattr(importlib.import_module("timestuff.%s" % (EXPORTS[name])), name)
+
+    # Keep it, so the next look up doesn't come through here.
+    globals()[name] = value
+
+    return value
+
+def __dir__():
+    return sorted(set(globals().keys()) | set(__all__))
@@ -0,0 +1,514 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+
+CERN@school: Data Profiling - Time Stuff - Throughput benchmarks.
+
+Each stage of the toolkit is timed on a condensed data file (e.g. a
+synthetic run - see synth.py):
+
+- condense, profile: the ingest stages, reading the frames from in-memory
+  (fake) MPXTree and dscData trees made from the file (see trees.py), up
+  to a maximum number of frames (condense reports its progress, as per
+  condense-time-info.py). The output is checked against the frames, and
+  the tree accesses made per entry are counted;
+- decode_struct: unpacking the frames one at a time, as per
+  profile-time-info.py (up to a maximum number of frames - it's slow);
+- decode_numpy: reading and decoding the frames a block at a time;
+- months: counting the frames in each day of each month (DataMonth);
+- day: collecting the frames of the busiest day, hour by hour (DataDay);
+- month_plots, hour_plots: rendering the month plots (MonthPlot) and the
+  busiest day's hour plots (HourPlot) as PNGs;
+- pages: the busiest day's payload and (canvas and plot) pages.
+
+The month stages are skipped if the run goes past the months covered by
+the month plots (see constants.month_start_times).
+
+Each stage is run in a fresh process, so that its peak memory can be
+measured - as the growth of the process's peak RSS from once the toolkit
+has been imported. The results can be compared to a stored baseline to
+spot regressions - including any extra tree accesses per entry.
+
+See http://cernatschool.web.cern.ch for more information.
+
+"""
+
+#...for the OS stuff.
+import os
+
+#...for the logging.
+import logging as lg
+
+# Import the JSON library.
+import json
+
+#...for the time (being).
+import time
+
+#...for the binary handling (as per profile-time-info.py).
+import struct, math
+
+#...for the peak memory use.
+import resource
+
+#...for running each stage in a fresh process.
+import multiprocessing
+
+#...for even more MATH.
+import numpy as np
+
+#...for reading the condensed data.
+from timestuff.rollup import FRAME_DTYPE, read_condensed, get_period_starts, get_period_key
+
+#...for the plot rendering.
+from timestuff.scheduler import render_plot_job
+
+#...for the pages.
+from timestuff.pages import make_day_canvas_page, make_day_plot_page
+
+#...for the fake trees.
+from timestuff.trees import FakeMPXTree, FakeDSCTree, CountingTree
+
+#...for the progress reporting.
+from timestuff.progress import ProgressReporter
+
+#...for the months covered by the month plots.
+from timestuff.constants import month_start_times
+
+#...for the stages.
+from timestuff.stages import condense_tree, profile_tree, make_months, make_day, make_month_plot_jobs, make_hour_plot_jobs, write_day_payload
+
+## The benchmark stages (in order).
+BENCH_STAGES = ["condense", "profile", "decode_struct", "decode_numpy", "months", "day", "month_plots", "hour_plots", "pages"]
+
+## The number of frames read at a time.
+BENCH_BLOCK = 1000000
+
+## The maximum number of frames for the stages that handle them one at a time.
+BENCH_MAX_STRUCT_FRAMES = 1000000
+
+## The stages that handle the frames one at a time (limited to BENCH_MAX_STRUCT_FRAMES).
+BENCH_PER_FRAME_STAGES = ["condense", "profile", "decode_struct"]
+
+## The stages that need the frames to be in the months covered by the month plots.
+BENCH_MONTH_STAGES = ["months", "month_plots"]
+
+## The number of frames read with the tree accesses counted (it slows the reading down).
+BENCH_COUNT_FRAMES = 10000
+
+## The (fake) DSC dataset file name - it needs a known chip ID.
+BENCH_DSC_FILE_NAME = "tpx01-bench.root"
+
+## The allowed slowdown (or memory growth) before a stage counts as a regression.
+BENCH_TOLERANCE = 0.2
+
+## The memory growth that is never counted as a regression [MB] (noise).
+BENCH_RSS_SLACK = 10.0
+
+def iter_blocks(datapath, block=BENCH_BLOCK):
+    """ Iterate over the frames of a condensed data file, a block at a time. """
+
+    ## The number of frames in the file.
+    n_frames = os.path.getsize(datapath) // FRAME_DTYPE.itemsize
+
+    for start in range(0, n_frames, block):
+        yield read_condensed(datapath, start, block)
+
+def get_months_skip_reason(datapath):
+    """
+    Check that the frames are all in the months covered by the month plots (see stages.make_months).
+
+    @param [in] datapath The path to the condensed data file.
+
+    @return Why the month stages can't be run (None if they can).
+    """
+
+    ## The month start times [s].
+    start_times = sorted(month_start_times.values())
+
+    ## The earliest and latest frame start times [s].
+    t_min, t_max = None, None
+
+    for frames in iter_blocks(datapath):
+
+        if len(frames) == 0:
+            continue
+
+        t_min = int(frames["start_time"].min()) if t_min is None else min(t_min, int(frames["start_time"].min()))
+        #
+        t_max = int(frames["start_time"].max()) if t_max is None else max(t_max, int(frames["start_time"].max()))
+
+    if t_min is not None and (t_min < start_times[0] or t_max >= start_times[-1]):
+        return "the run (%d to %d) goes past the months covered (%d to %d)" % (t_min, t_max, start_times[0], start_times[-1])
+
+    return None
+
+def get_busiest_day(datapath):
+    """
+    Get the frames of the day with the most frames.
+
+    @param [in] datapath The path to the condensed data file.
+
+    @return The day ("%Y-%m-%d") and a structured array of its frames.
+    """
+
+    ## The number of frames in each day { day start [s]:frames }.
+    counts = {}
+
+    for frames in iter_blocks(datapath):
+
+        ## The days in the block, and the number of frames in each.
+        days, n = np.unique(get_period_starts("day", frames["start_time"]), return_counts=True)
+
+        for day_start, n_day in zip(days.tolist(), n.tolist()):
+            counts[day_start] = counts.get(day_start, 0) + n_day
+
+    ## The start of the busiest day [s].
+    day_start = max(counts.keys(), key=lambda d: counts[d])
+
+    ## The day's frames.
+    day_frames = [f[get_period_starts("day", f["start_time"]) == day_start] for f in iter_blocks(datapath)]
+
+    return get_period_key("day", day_start), np.concatenate(day_frames)
+
+def bench_condense(datapath, workpath, max_frames=BENCH_MAX_STRUCT_FRAMES):
+    """ Condense the frames from a (fake) MPXTree. """
+
+    ## The frames.
+    frames = read_condensed(datapath, 0, max_frames if max_frames is not None else -1)
+
+    ## The tree.
+    tree = FakeMPXTree(frames)
+
+    ## The progress reporter (as per condense-time-info.py, so its cost is counted).
+    progress = ProgressReporter("bench", statuspath=os.path.join(workpath, "status_bench.json"), verbose=False)
+
+    t0 = time.time()
+
+    ## The condensed frames.
+    condensed = condense_tree(tree, progress=progress)
+
+    dt = time.time() - t0
+
+    if not np.array_equal(condensed, frames):
+        raise IOError("* ERROR: the condensed frames don't match the tree's frames!")
+
+    ## The tree, with the accesses counted.
+    counted = CountingTree(FakeMPXTree(frames[:BENCH_COUNT_FRAMES]))
+    #
+    condense_tree(counted)
+
+    return len(frames), dt, {"accesses":counted.counter.getCostsPerEntry()}
+
+def bench_profile(datapath, workpath, max_frames=BENCH_MAX_STRUCT_FRAMES):
+    """ Profile the frames from a (fake) dscData tree. """
+
+    ## The frames.
+    frames = read_condensed(datapath, 0, max_frames if max_frames is not None else -1)
+
+    ## The tree.
+    tree = FakeDSCTree(frames)
+
+    t0 = time.time()
+
+    run_id, jd = profile_tree(tree, BENCH_DSC_FILE_NAME, tree.getFileSize())
+
+    dt = time.time() - t0
+
+    if jd["n_frames"] != len(frames) or jd["Delta_T"] != float(frames["start_time"].max()) - float(frames["start_time"].min()):
+        raise IOError("* ERROR: the profile doesn't match the tree's frames!")
+
+    ## The tree, with the accesses counted.
+    counted = CountingTree(FakeDSCTree(frames[:BENCH_COUNT_FRAMES]))
+    #
+    profile_tree(counted, BENCH_DSC_FILE_NAME, tree.getFileSize())
+
+    return len(frames), dt, {"accesses":counted.counter.getCostsPerEntry()}
+
+def bench_decode_struct(datapath, workpath, max_frames=BENCH_MAX_STRUCT_FRAMES):
+    """ Decode the frames one at a time (as per profile-time-info.py). """
+
+    ## The number of frames decoded.
+    n = 0
+
+    t0 = time.time()
+
+    with open(datapath, "rb") as bf:
+
+        while max_frames is None or n < max_frames:
+
+            ## The eight bytes representing the next frame.
+            bs = bf.read(8)
+            #
+            if not bs:
+                break
+
+            ## The frame's data.
+            data = struct.unpack("IhH", bs)
+
+            ## The start time [s], acquisition time [s] and number of pixels.
+            start_time_s, acq_time, n_pixels = data[0], math.pow(10, int(data[1])), int(data[2])
+
+            n += 1
+
+    return n, time.time() - t0
+
+def bench_decode_numpy(datapath, workpath, max_frames=None):
+    """ Read and decode the frames a block at a time. """
+
+    ## The number of frames decoded.
+    n = 0
+
+    t0 = time.time()
+
+    for frames in iter_blocks(datapath):
+
+        ## The start times [s], acquisition times [s] and numbers of pixels.
+        sts, acq_times, nps = frames["start_time"], np.power(10.0, frames["acq_code"]), frames["n_pixels"]
+
+        n += len(frames)
+
+    return n, time.time() - t0
+
+def bench_months(datapath, workpath, max_frames=None):
+    """ Count the frames in each day of each month. """
+
+    ## The months.
+    months = None
+
+    ## The time taken [s] (not counting the reading).
+    dt = 0.0
+
+    for frames in iter_blocks(datapath):
+
+        t0 = time.time()
+        #
+        months = make_months(frames, months)
+        #
+        dt += time.time() - t0
+
+    return sum(m.getNumberOfFrames() for m in months.values()), dt
+
+def bench_day(datapath, workpath, max_frames=None):
+    """ Collect the frames of the busiest day, hour by hour. """
+
+    day_string, frames = get_busiest_day(datapath)
+
+    t0 = time.time()
+
+    make_day(frames, day_string)
+
+    return len(frames), time.time() - t0
+
+def bench_month_plots(datapath, workpath, max_frames=None):
+    """ Render the month plots. """
+
+    ## The months.
+    months = None
+    #
+    for frames in iter_blocks(datapath):
+        months = make_months(frames, months)
+
+    t0 = time.time()
+
+    for job in make_month_plot_jobs(months, workpath, ["png"]):
+        render_plot_job(job)
+
+    return sum(m.getNumberOfFrames() for m in months.values()), time.time() - t0
+
+def bench_hour_plots(datapath, workpath, max_frames=None):
+    """ Render the hour plots of the busiest day. """
+
+    day_string, frames = get_busiest_day(datapath)
+
+    ## The day.
+    day = make_day(frames, day_string)
+
+    t0 = time.time()
+
+    for job in make_hour_plot_jobs(day, workpath, ["png"]):
+        render_plot_job(job)
+
+    return len(frames), time.time() - t0
+
+def bench_pages(datapath, workpath, max_frames=None):
+    """ Make the busiest day's payload and pages. """
+
+    day_string, frames = get_busiest_day(datapath)
+
+    ## The day.
+    day = make_day(frames, day_string)
+
+    t0 = time.time()
+
+    with open(write_day_payload(day, workpath), "r") as pf:
+        make_day_canvas_page(json.load(pf))
+
+    make_day_plot_page(dict((hour, "%d.png" % (hour)) for hour in range(day.getNumberOfHours())))
+
+    return len(frames), time.time() - t0
+
+## The benchmark function for each stage.
+BENCH_FUNCTIONS = {
+    "condense"      : bench_condense,
+    "profile"       : bench_profile,
+    "decode_struct" : bench_decode_struct,
+    "decode_numpy"  : bench_decode_numpy,
+    "months"        : bench_months,
+    "day"           : bench_day,
+    "month_plots"   : bench_month_plots,
+    "hour_plots"    : bench_hour_plots,
+    "pages"         : bench_pages,
+    }
+
+def get_peak_rss():
+    """ Get the peak RSS of this process [MB]. """
+
+    # (ru_maxrss is in kB on Linux.)
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+def run_bench_stage(job):
+    """
+    Run a benchmark stage - (stage, data path, work path, max. frames) - in a worker.
+
+    @return Dictionary of the stage's results.
+    """
+
+    stage, datapath, workpath, max_frames = job
+
+    ## The peak RSS before the stage [MB].
+    rss0 = get_peak_rss()
+
+    ## The number of frames and the time taken [s] - and any extra results.
+    r = BENCH_FUNCTIONS[stage](datapath, workpath, max_frames)
+    #
+    n, dt = r[0], r[1]
+
+    lg.info(" * Benchmark %-12s: %d frame(s) in %.3f s." % (stage, n, dt))
+
+    ## The stage's results.
+    results = {
+        "stage"        : stage,
+        "frames"       : n,
+        "time"         : dt,
+        "frames_per_s" : n / dt if dt > 0 else 0.0,
+        "peak_rss_mb"  : get_peak_rss() - rss0,
+        }
+    #
+    if len(r) > 2:
+        results.update(r[2])
+
+    return results
+
+def run_benchmarks(datapath, workpath, stages=BENCH_STAGES, max_struct_frames=BENCH_MAX_STRUCT_FRAMES):
+    """
+    Run the benchmark stages, each in a fresh process.
+
+    @param [in] datapath The path to the condensed data file.
+    @param [in] workpath The directory for the stages' outputs.
+    @param [in] stages The stages to run (see BENCH_STAGES).
+    @param [in] max_struct_frames The maximum number of frames for the per-frame stages.
+
+    @return Dictionary of the results { "frames", "file_size", "stages":{ stage:results },
+    "skipped":{ stage:reason } } - a stage is skipped if it can't handle the input
+    (e.g. the months, if the run goes past the months covered).
+    """
+
+    ## The results.
+    results = {"frames":os.path.getsize(datapath) // FRAME_DTYPE.itemsize, "file_size":os.path.getsize(datapath), "stages":{}, "skipped":{}}
+
+    ## The "spawn" context - so each stage starts with a fresh peak RSS.
+    ctx = multiprocessing.get_context("spawn")
+
+    ## Why the month stages can't be run (None if they can).
+    months_skip_reason = get_months_skip_reason(datapath) if len(set(BENCH_MONTH_STAGES) & set(stages)) > 0 else None
+
+    for stage in [s for s in BENCH_STAGES if s in stages]:
+
+        if stage in BENCH_MONTH_STAGES and months_skip_reason is not None:
+
+            lg.warning(" * Skipped benchmark %s: %s" % (stage, months_skip_reason))
+
+            results["skipped"][stage] = months_skip_reason
+
+            continue
+
+        ## The stage's maximum number of frames.
+        max_frames = max_struct_frames if stage in BENCH_PER_FRAME_STAGES else None
+
+        ## The stage's worker.
+        pool = ctx.Pool(1)
+        #
+        try:
+            results["stages"][stage] = pool.apply(run_bench_stage, ((stage, datapath, workpath, max_frames),))
+        finally:
+            pool.close()
+            pool.join()
+
+    return results
+
+def is_same_input(results, baseline):
+    """
+    Were the benchmark results and the baseline measured on the same input?
+
+    (As far as can be told from the number of frames and file size.)
+
+    @param [in] results The benchmark results (see run_benchmarks).
+    @param [in] baseline The baseline results.
+    """
+
+    return results.get("frames") == baseline.get("frames") and results.get("file_size") == baseline.get("file_size")
+
+def compare_to_baseline(results, baseline, tolerance=BENCH_TOLERANCE):
+    """
+    Compare benchmark results to a baseline.
+
+    A stage has regressed if its throughput has dropped, or its peak memory
+    grown, by more than the tolerance - or if it makes more tree accesses
+    per entry (condense and profile).
+
+    @param [in] results The benchmark results (see run_benchmarks).
+    @param [in] baseline The baseline results.
+    @param [in] tolerance The allowed fractional change.
+
+    @return A list of the regressions - (stage, metric, baseline, now).
+    """
+
+    # The throughput and memory use depend on the input, so only compare like with like.
+    if not is_same_input(results, baseline):
+        raise IOError("* ERROR: the baseline was measured on a different input (%s frames, %s B - not %d frames, %d B)!" % (baseline.get("frames"), baseline.get("file_size"), results["frames"], results["file_size"]))
+
+    ## The regressions.
+    regressions = []
+
+    for stage, now in sorted(results["stages"].items()):
+
+        if stage not in baseline.get("stages", {}):
+            continue
+
+        ## The baseline for the stage.
+        base = baseline["stages"][stage]
+
+        # (The per-frame stages may have been limited to a different number of frames.)
+        if now["frames"] != base["frames"]:
+
+            lg.warning(" * Not comparing %s: %d frame(s) vs. %d in the baseline." % (stage, now["frames"], base["frames"]))
+
+            continue
+
+        if now["frames_per_s"] < base["frames_per_s"] * (1.0 - tolerance):
+            regressions.append((stage, "frames_per_s", base["frames_per_s"], now["frames_per_s"]))
+
+        if now["peak_rss_mb"] > max(base["peak_rss_mb"] * (1.0 + tolerance), base["peak_rss_mb"] + BENCH_RSS_SLACK):
+            regressions.append((stage, "peak_rss_mb", base["peak_rss_mb"], now["peak_rss_mb"]))
+
+        for name, cost in sorted(now.get("accesses", {}).items()):
+
+            ## The baseline's calls per entry (none if it didn't make the access).
+            base_calls = base.get("accesses", {}).get(name, {"calls":0.0})["calls"]
+
+            if cost["calls"] > base_calls + 1.0e-6:
+                regressions.append((stage, "calls:%s" % (name), base_calls, cost["calls"]))
+
+    return regressions
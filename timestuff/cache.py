@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+
+CERN@school: Data Profiling - Time Stuff - Render cache.
+
+See http://cernatschool.web.cern.ch for more information.
+
+"""
+
+#...for the OS stuff.
+import os
+
+# Import the JSON library.
+import json
+
+#...for the content hashes.
+import hashlib
+
+## The renderer version.
+#
+# Bump this whenever the appearance of the plots changes, so that all of
+# the cached plots are re-rendered.
+RENDERER_VERSION = "2"
+
+## The name of the render cache manifest file (one per output directory).
+MANIFEST_NAME = ".render_cache.json"
+
+def get_plot_data(plot_type, data):
+    """
+    Get the content of a plot's data slice as JSON-friendly values.
+
+    @param [in] plot_type The type of plot ("month" or "hour").
+    @param [in] data The data slice (DataMonth or DataHour object).
+    """
+
+    if plot_type == "month":
+        return [data.getStartTime(), data.getNumberOfDays(), sorted(data.getFramesInEachDay().items())]
+    elif plot_type in ["hour", "hour_raster"]:
+        return [data.getStartTime(), list(data.getStartTimes()), list(data.getAcqTimes()), list(data.getNumberOfPixels())]
+
+    raise IOError("* ERROR: unknown plot type '%s'!" % (plot_type))
+
+def get_plot_job_key(job):
+    """
+    Get the content-addressed key of a plot job.
+
+    The key is a hash of the data slice, the plot keyword arguments, the
+    output formats and the renderer version.
+
+    @param [in] job The plot job dictionary (see scheduler.make_plot_job).
+    """
+
+    ## The content to hash.
+    content = {
+        "renderer_version" : RENDERER_VERSION,
+        "plot_type"        : job["plot_type"],
+        "data"             : get_plot_data(job["plot_type"], job["data"]),
+        "kwargs"           : job["kwargs"],
+        "formats"          : job["formats"],
+        }
+
+    return hashlib.sha1(json.dumps(content, sort_keys=True).encode("utf-8")).hexdigest()
+
+class RenderCache:
+    """ Wrapper class for the render cache manifests. """
+
+    def __init__(self):
+        """ Constructor. """
+
+        ## Dictionary of the loaded manifests { output path:{ name:key } }.
+        self.__manifests = {}
+
+        ## The output paths with updated manifests.
+        self.__dirty = set()
+
+    def __getManifest(self, outputpath):
+
+        if outputpath not in self.__manifests:
+
+            ## The manifest path.
+            mp = os.path.join(outputpath, MANIFEST_NAME)
+
+            ## The manifest itself.
+            manifest = {}
+            #
+            if os.path.exists(mp):
+                with open(mp, "r") as mf:
+                    manifest = json.load(mf)
+
+            self.__manifests[outputpath] = manifest
+
+        return self.__manifests[outputpath]
+
+    def isCached(self, job, key):
+        """
+        Has the plot job already been rendered with this key?
+
+        @param [in] job The plot job dictionary.
+        @param [in] key The plot job's key (see get_plot_job_key).
+        """
+
+        if self.__getManifest(job["output_path"]).get(str(job["name"])) != key:
+            return False
+
+        # The rendered files must still be there.
+        for fmt in job["formats"]:
+            if not os.path.exists(os.path.join(job["output_path"], "%s.%s" % (job["name"], fmt))):
+                return False
+
+        return True
+
+    def add(self, job, key):
+        """
+        Record that the plot job has been rendered with this key.
+
+        @param [in] job The plot job dictionary.
+        @param [in] key The plot job's key (see get_plot_job_key).
+        """
+
+        self.__getManifest(job["output_path"])[str(job["name"])] = key
+
+        self.__dirty.add(job["output_path"])
+
+    def save(self):
+        """ Write out the updated manifests. """
+
+        for outputpath in sorted(self.__dirty):
+            with open(os.path.join(outputpath, MANIFEST_NAME), "w") as mf:
+                json.dump(self.__manifests[outputpath], mf, sort_keys=True)
+
+        self.__dirty = set()
@@ -0,0 +1,177 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+
+CERN@school: Data Profiling - Time Stuff - Dataset profile catalog.
+
+The dataset profiles are kept in a single JSON Lines file - one profile
+per line, tagged with its run ID - so that they can be read with a single
+open (rather than one per dataset). Profiles are appended as datasets are
+profiled; if a run is profiled again, the last line for it wins.
+
+See http://cernatschool.web.cern.ch for more information.
+
+"""
+
+#...for the OS stuff.
+import os, glob
+
+#...for the logging.
+import logging as lg
+
+# Import the JSON library.
+import json
+
+## The name of the catalog file (in the profile directory).
+CATALOG_NAME = "profiles.jsonl"
+
+## The chip IDs { dataset file name prefix:chip ID }.
+CHIP_IDS = {
+    "tpx01" : "F03-W0098",
+    "tpx02" : "F04-W0098",
+    }
+
+def get_chip_id(file_name):
+    """
+    Get the chip ID of a dataset from its file name (None if unknown).
+
+    @param [in] file_name The dataset's file name.
+    """
+
+    return CHIP_IDS.get(os.path.basename(file_name)[0:5])
+
+def get_catalog_path(datapath):
+    """
+    Get the path of the catalog in a profile directory.
+
+    @param [in] datapath The profile directory (or the catalog itself).
+    """
+
+    if os.path.isdir(datapath):
+        return os.path.join(datapath, CATALOG_NAME)
+
+    return datapath
+
+def add_to_catalog(catalogpath, run_id, jd):
+    """
+    Add (or update) a dataset's profile in the catalog.
+
+    @param [in] catalogpath The path of the catalog.
+    @param [in] run_id The run ID of the dataset.
+    @param [in] jd The dataset's JSON information.
+    """
+
+    ## The catalog entry.
+    entry = dict(jd)
+    #
+    entry["run_id"] = run_id
+
+    # Appending a single line means that several datasets can be profiled
+    # at once without clobbering each other's entries.
+    with open(catalogpath, "a") as cf:
+        cf.write(json.dumps(entry, sort_keys=True) + "\n")
+
+def read_catalog(catalogpath):
+    """
+    Read the dataset profiles from the catalog.
+
+    @param [in] catalogpath The path of the catalog.
+
+    @return Dictionary of the datasets' JSON information { run ID:info }.
+    """
+
+    ## Dictionary of the datasets.
+    jds = {}
+
+    with open(catalogpath, "r") as cf:
+        for line in cf:
+
+            if not line.strip():
+                continue
+
+            ## The catalog entry.
+            jd = json.loads(line)
+
+            # Later entries replace earlier ones.
+            jds[jd.pop("run_id")] = jd
+
+    lg.info(" * Read %d dataset profile(s) from '%s'." % (len(jds), catalogpath))
+
+    return jds
+
+def write_catalog(catalogpath, jds):
+    """
+    Write the catalog from scratch (one line per run, sorted by run ID).
+
+    @param [in] catalogpath The path of the catalog.
+    @param [in] jds Dictionary of the datasets' JSON information { run ID:info }.
+    """
+
+    ## The temporary catalog path (so the catalog is never half written).
+    tmp_path = catalogpath + ".tmp"
+
+    with open(tmp_path, "w") as cf:
+        for run_id in sorted(jds.keys()):
+
+            ## The catalog entry.
+            entry = dict(jds[run_id])
+            #
+            entry["run_id"] = run_id
+
+            cf.write(json.dumps(entry, sort_keys=True) + "\n")
+
+    os.rename(tmp_path, catalogpath)
+
+def read_json_profiles(datapath):
+    """
+    Read the (old style) per-dataset profile JSON files.
+
+    @param [in] datapath The profile directory.
+
+    @return Dictionary of the datasets' JSON information { run ID:info }.
+    """
+
+    ## Dictionary of the datasets.
+    jds = {}
+
+    # Loop over the dataset JSON files found.
+    for jp in sorted(glob.glob(os.path.join(datapath, "*.json"))):
+
+        ## The run ID of the dataset (from the file name).
+        run_id = os.path.basename(jp).split(".")[0]
+
+        with open(jp, "r") as jf:
+            jds[run_id] = json.load(jf)
+
+    return jds
+
+def migrate_json_profiles(datapath, catalogpath):
+    """
+    Migrate the per-dataset profile JSON files into the catalog.
+
+    The profiles already in the catalog are kept, unless there is a JSON
+    file for the same run. The catalog is then compacted (one line per run).
+
+    @param [in] datapath The profile directory.
+    @param [in] catalogpath The path of the catalog.
+
+    @return The number of profiles migrated.
+    """
+
+    ## The profiles already in the catalog.
+    jds = {}
+    #
+    if os.path.exists(catalogpath):
+        jds = read_catalog(catalogpath)
+
+    ## The profiles from the JSON files.
+    json_jds = read_json_profiles(datapath)
+
+    jds.update(json_jds)
+
+    write_catalog(catalogpath, jds)
+
+    lg.info(" * Migrated %d dataset profile(s) to '%s'." % (len(json_jds), catalogpath))
+
+    return len(json_jds)
@@ -0,0 +1,261 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+
+CERN@school: Data Profiling - Time Stuff - Run metrics.
+
+Lightweight instrumentation of the toolkit's hot paths, kept per process
+(like the logging):
+
+- timed(name): a context manager adding the time spent in a stage (e.g.
+  "read", "aggregate", "render", "write") to its total;
+- add_count(name, n): adds to a counter (e.g. "frames_read", "bytes_read");
+- the peak RSS, sampled as each timed stage finishes.
+
+The timers and counters are only touched once per block of frames (or
+plot, or page) - never per frame - so they cost next to nothing. At the
+end of a run, write_metrics writes them to metrics_<script>.json in the
+output directory and, if a directory is given (or set in the
+TIMESTUFF_TEXTFILE_DIR environment variable), to <script>.prom there for
+the Prometheus node exporter's textfile collector. Runs of the same
+script that share a directory (e.g. the pipeline's day plots) are given
+a name - the run (and day) ID - which is added to both file names
+(metrics_<script>_<name>.json, <script>_<name>.prom) and as a label.
+
+See http://cernatschool.web.cern.ch for more information.
+
+"""
+
+#...for the OS stuff.
+import os
+
+#...for the logging.
+import logging as lg
+
+# Import the JSON library.
+import json
+
+#...for the file names.
+import re
+
+#...for the time (being).
+import time
+
+#...for the peak memory use.
+import resource
+
+#...for the stage timers.
+from contextlib import contextmanager
+
+## The environment variable for the node exporter's textfile collector directory.
+TEXTFILE_DIR_ENV = "TIMESTUFF_TEXTFILE_DIR"
+
+## The prefix of the Prometheus metric names.
+PROM_PREFIX = "timestuff"
+
+## The stage timers { name:{ "seconds":total time [s], "calls":number of times } }.
+TIMERS = {}
+
+## The counters { name:count }.
+COUNTERS = {}
+
+## The peak RSS seen so far [MB].
+PEAK_RSS = {"self":0.0, "children":0.0}
+
+## The start time of the run [s] (when the metrics were last reset).
+START_TIME = time.time()
+
+def reset_metrics():
+    """ Clear the timers, counters and peak RSS, and restart the run's clock. """
+
+    global START_TIME
+
+    TIMERS.clear()
+    #
+    COUNTERS.clear()
+    #
+    PEAK_RSS.update({"self":0.0, "children":0.0})
+
+    START_TIME = time.time()
+
+def sample_rss():
+    """
+    Sample the peak RSS of this process and its (finished) children.
+
+    @return The peak RSS of this process [MB].
+    """
+
+    # (ru_maxrss is in kB on Linux.)
+    PEAK_RSS["self"] = max(PEAK_RSS["self"], resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0)
+    #
+    PEAK_RSS["children"] = max(PEAK_RSS["children"], resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024.0)
+
+    return PEAK_RSS["self"]
+
+@contextmanager
+def timed(name):
+    """
+    Time a stage - with timed("render"): ... - adding to its total.
+
+    @param [in] name The stage name.
+    """
+
+    t0 = time.time()
+
+    try:
+        yield
+    finally:
+        add_time(name, time.time() - t0)
+
+def add_time(name, seconds, calls=1):
+    """
+    Add to a stage's timer (e.g. for a stage timed elsewhere).
+
+    @param [in] name The stage name.
+    @param [in] seconds The time spent [s].
+    @param [in] calls The number of times the stage ran.
+    """
+
+    ## The stage's timer.
+    timer = TIMERS.setdefault(name, {"seconds":0.0, "calls":0})
+    #
+    timer["seconds"] += seconds
+    #
+    timer["calls"] += calls
+
+    sample_rss()
+
+def add_count(name, n=1):
+    """
+    Add to a counter.
+
+    @param [in] name The counter name (e.g. "frames_read").
+    @param [in] n The amount to add.
+    """
+
+    COUNTERS[name] = COUNTERS.get(name, 0) + n
+
+def get_metrics(script=None, name=None):
+    """
+    Get the run's metrics.
+
+    @param [in] script The name of the script (for the record).
+    @param [in] name The name of the run (e.g. the run ID - None for none).
+
+    @return Dictionary of the metrics - the timers, counters, the rate of each
+    counter over the run [/s], the run's wall time [s] and peak RSS [MB].
+    """
+
+    sample_rss()
+
+    ## The run's wall time [s].
+    wall_time = time.time() - START_TIME
+
+    return {
+        "script"               : script,
+        "name"                 : name,
+        "start_time"           : START_TIME,
+        "wall_time"            : wall_time,
+        "timers"               : dict((name, dict(timer)) for name, timer in TIMERS.items()),
+        "counters"             : dict(COUNTERS),
+        "rates"                : dict((name, n / wall_time if wall_time > 0 else 0.0) for name, n in COUNTERS.items()),
+        "peak_rss_mb"          : PEAK_RSS["self"],
+        "peak_rss_children_mb" : PEAK_RSS["children"],
+        }
+
+def make_prom_text(metrics):
+    """
+    Make the Prometheus (text exposition format) version of a run's metrics.
+
+    They're all gauges - each run replaces the last run's values.
+
+    @param [in] metrics The metrics (see get_metrics).
+
+    @return The text.
+    """
+
+    ## The script (and run name) labels.
+    label = 'script="%s"' % (metrics["script"])
+    #
+    if metrics.get("name") is not None:
+        label += ',name="%s"' % (metrics["name"])
+
+    ## The metric families - (name, help, [(extra labels, value)]).
+    families = [
+        ("stage_seconds", "Time spent in each stage of the last run [s].",
+            [('stage="%s"' % (name), timer["seconds"]) for name, timer in sorted(metrics["timers"].items())]),
+        ("stage_calls", "Number of times each stage ran in the last run.",
+            [('stage="%s"' % (name), timer["calls"]) for name, timer in sorted(metrics["timers"].items())]),
+        ("count", "Counters (frames, bytes, plots...) of the last run.",
+            [('counter="%s"' % (name), n) for name, n in sorted(metrics["counters"].items())]),
+        ("rate_per_second", "Counters of the last run over its wall time [/s].",
+            [('counter="%s"' % (name), r) for name, r in sorted(metrics["rates"].items())]),
+        ("wall_seconds", "Wall time of the last run [s].", [(None, metrics["wall_time"])]),
+        ("peak_rss_bytes", "Peak resident set size of the last run [B].", [(None, metrics["peak_rss_mb"] * 1024 * 1024)]),
+        ("peak_rss_children_bytes", "Peak resident set size of the last run's largest child process [B].", [(None, metrics["peak_rss_children_mb"] * 1024 * 1024)]),
+        ("last_run_timestamp_seconds", "When the last run finished [s since the epoch].", [(None, metrics["start_time"] + metrics["wall_time"])]),
+        ]
+
+    ## The lines of the text.
+    lines = []
+
+    for name, help_text, samples in families:
+
+        if len(samples) == 0:
+            continue
+
+        lines.append("# HELP %s_%s %s" % (PROM_PREFIX, name, help_text))
+        lines.append("# TYPE %s_%s gauge" % (PROM_PREFIX, name))
+        #
+        for labels, value in samples:
+            lines.append("%s_%s{%s} %s" % (PROM_PREFIX, name, label if labels is None else label + "," + labels, repr(float(value))))
+
+    return "\n".join(lines) + "\n"
+
+def write_metrics(outputpath, script, textfile_dir=None, name=None):
+    """
+    Write the run's metrics to metrics_<script>[_<name>].json (and the textfile collector).
+
+    @param [in] outputpath The output directory.
+    @param [in] script The name of the script.
+    @param [in] textfile_dir The node exporter's textfile collector directory
+    (None for the TIMESTUFF_TEXTFILE_DIR environment variable, if set).
+    @param [in] name The name of the run (e.g. the run ID - None for none),
+    so that runs of the same script don't overwrite each other's metrics.
+
+    @return The metrics (see get_metrics).
+    """
+
+    ## The metrics.
+    metrics = get_metrics(script, name)
+
+    ## The stem of the file names.
+    stem = script
+    #
+    if name is not None:
+        stem += "_" + re.sub(r"[^A-Za-z0-9_.-]", "_", name)
+
+    with open(os.path.join(outputpath, "metrics_%s.json" % (stem)), "w") as mf:
+        json.dump(metrics, mf, sort_keys=True, indent=1)
+
+    if textfile_dir is None:
+        textfile_dir = os.environ.get(TEXTFILE_DIR_ENV)
+
+    if textfile_dir is not None:
+
+        ## The path of the textfile.
+        prompath = os.path.join(textfile_dir, "%s.prom" % (stem))
+
+        # Write to a temporary file and move it into place, so the collector
+        # never reads half a file (it ignores anything not ending in .prom).
+        with open(prompath + ".%d.tmp" % (os.getpid()), "w") as pf:
+            pf.write(make_prom_text(metrics))
+        #
+        os.rename(prompath + ".%d.tmp" % (os.getpid()), prompath)
+
+        lg.info(" * Written the metrics to '%s'." % (prompath))
+
+    lg.info(" * Run metrics: %.1f s, peak RSS %.1f MB, %s." % (metrics["wall_time"], metrics["peak_rss_mb"], ", ".join("%s=%d" % (name, n) for name, n in sorted(metrics["counters"].items()))))
+
+    return metrics
@@ -12,6 +12,12 @@ See http://cernatschool.web.cern.ch for more information.
 #...for the time (being).
 import time
 
+#...for the MATH.
+import math
+
+# Import the JSON library.
+import json
+
 #...for handling the time strings.
 from handlers import getPixelmanTimeString
 
@@ -117,17 +123,67 @@ def make_css():
     font-family:Arial, Helvetica, sans-serif;
     text-align:center;
   }
+
+  .nav {
+    font-family:Arial, Helvetica, sans-serif;
+    margin: 20px;
+    font-size: 14px;
+  }
 '''
 
     return s
 
 
-def make_day_plot_page(plot_names):
+def make_style(css_href=None):
+    """
+    Get the contents of a page's style block.
+
+    @param [in] css_href The shared stylesheet (None to put the CSS inline).
+    """
+
+    if css_href is None:
+        return make_css()
+
+    # Importing the shared stylesheet lets the browser cache it.
+    return '  @import url("%s");' % (css_href)
+
+
+def make_img_tag(path, thumbs=None, style=""):
+    """
+    Make the (lazily loaded) image tag for a plot.
+
+    With thumbnails, the image shows the thumbnail (with a srcset for high
+    density displays) and links to the full resolution plot, which is only
+    loaded when clicked.
+
+    @param [in] path The path of the full resolution plot.
+    @param [in] thumbs Dictionary of the plot's thumbnails { density:path }.
+    @param [in] style The image's inline style.
+    """
+
+    ## The style attribute.
+    style_attr = ""
+    #
+    if style != "":
+        style_attr = " style=\"%s\"" % (style)
+
+    if thumbs is None:
+        return "<img%s loading=\"lazy\" src=\"%s\" />" % (style_attr, path)
+
+    ## The thumbnail source set.
+    srcset = ", ".join("%s %s" % (thumbs[density], density) for density in sorted(thumbs.keys()))
+
+    return "<a href=\"%s\"><img%s loading=\"lazy\" src=\"%s\" srcset=\"%s\" /></a>" % (path, style_attr, thumbs[sorted(thumbs.keys())[0]], srcset)
+
+
+def make_day_plot_page(plot_names, thumbs=None, css_href=None):
 
     """
     Make a plot profile page for a given day.
 
     @param [in] plot_names Dictionary of plot names { hour:path }.
+    @param [in] thumbs Dictionary of the thumbnails { path:{ density:path } }.
+    @param [in] css_href The shared stylesheet (None to put the CSS inline).
     """
 
     ## The string to return for the page.
@@ -165,14 +221,352 @@ def make_day_plot_page(plot_names):
         t += "    <tr>"
 
         # Add the image tag to the table.
-        t += "<td class=\"number\">%02d</td><td><img style=\"width: 100%%\" src=\"%s\" /></td>" % (int(hour), plot_names[hour])
+        ## The plot's thumbnails (if any).
+        plot_thumbs = None
+        #
+        if thumbs is not None:
+            plot_thumbs = thumbs[plot_names[hour]]
+
+        t += "<td class=\"number\">%02d</td><td>%s</td>" % (int(hour), make_img_tag(plot_names[hour], plot_thumbs, "width: 100%"))
 
     t += "</tr>\n"
 
     # Add the table contents.
     s = s.replace('{{TABLE_ROWS}}', t)
 
-    # Add the CSS inline to the web page.
-    s = s.replace('{{CSS}}', make_css())
+    # Add the CSS to the web page.
+    s = s.replace('{{CSS}}', make_style(css_href))
+
+    return s
+
+
+def make_day_payload(data_day):
+    """
+    Make the compact data payload for a day (for the canvas day page).
+
+    For each hour with frames, the frame start times are stored as
+    differences from the previous frame (starting from the hour's start
+    time), the acquisition times as run-length encoded [log10(acq. time),
+    count] pairs, and the numbers of pixels as they are.
+
+    @param [in] data_day DataDay object for the day.
+
+    @return Dictionary of the payload (ready for JSON).
+    """
+
+    ## The payload.
+    payload = {
+        "day"        : data_day.getName(),
+        "start_time" : int(data_day.getStartTime()),
+        "hours"      : {},
+        }
+
+    for hour in range(data_day.getNumberOfHours()):
+
+        ## The hour's data.
+        data_hour = data_day.getHour(hour)
+
+        if data_hour.getNumberOfFrames() == 0:
+            continue
+
+        ## The frame start time differences [s].
+        dts = []
+        #
+        ## The previous start time [s].
+        prev = data_hour.getStartTime()
+        #
+        for st in data_hour.getStartTimes():
+            dts.append(int(st) - int(prev))
+            prev = st
+
+        ## The run-length encoded acquisition time codes.
+        acqs = []
+        #
+        for acq_time in data_hour.getAcqTimes():
+
+            ## The acquisition time code (log10 of the acquisition time).
+            code = int(round(math.log10(acq_time)))
+
+            if len(acqs) > 0 and acqs[-1][0] == code:
+                acqs[-1][1] += 1
+            else:
+                acqs.append([code, 1])
+
+        payload["hours"]["%02d" % (hour)] = {
+            "t" : dts,
+            "a" : acqs,
+            "n" : [int(n) for n in data_hour.getNumberOfPixels()],
+            }
+
+    return payload
+
+
+def make_day_canvas_page(payload, y_max=30, css_href=None):
+    """
+    Make an interactive (canvas) plot page for a given day.
+
+    The hour strips are drawn in the browser from the compact payload (see
+    make_day_payload), so no images need to be rendered. Hover over a frame
+    for its details, use the mouse wheel to zoom, drag to pan and double
+    click to reset the view.
+
+    @param [in] payload Dictionary of the day's payload.
+    @param [in] y_max The pixels per second axis maximum.
+    @param [in] css_href The shared stylesheet (None to put the CSS inline).
+    """
+
+    ## The string to return for the page.
+    s = '''<!DOCTYPE html>
+<html>
+<head>
+  <meta charset="utf-8">
+  <style>
+{{CSS}}
+  canvas { width: 100%; height: 160px; display: block; }
+  #tip { position: fixed; display: none; background: #ffffee; border: 1px solid #cccccc; padding: 3px; font-family: Monospace; }
+  </style>
+</head>
+<div id="container">
+
+  <!-- Main Content -->
+  <div id="main">
+    <h2>{{DAY}}</h2>
+    <table id="hours">
+    </table>
+  </div>
+
+  <div id="tip"></div>
+
+  <!-- Footer -->
+  <div id="footer">&copy; CERN@school 2015</div>
+
+</div>
+<script>
+var DATA = {{PAYLOAD}};
+var Y_MAX = {{Y_MAX}};
+var tip = document.getElementById("tip");
+
+function pad(n) { return (n < 10 ? "0" : "") + n; }
+
+// Decode an hour's payload into frame arrays.
+function decode(h, hst) {
+  var n = h.n.length, st = new Float64Array(n), at = new Float64Array(n);
+  var t = hst, i, j = 0, k;
+  for (i = 0; i < n; i++) { t += h.t[i]; st[i] = t - hst; }
+  for (i = 0; i < h.a.length; i++) {
+    for (k = 0; k < h.a[i][1]; k++) { at[j++] = Math.pow(10, h.a[i][0]); }
+  }
+  return { st: st, at: at, np: h.n };
+}
+
+function Strip(canvas, hour, frames) {
+  this.c = canvas; this.hour = hour; this.f = frames;
+  this.x0 = 0; this.x1 = 3600;
+  var self = this;
+  canvas.addEventListener("wheel", function(e) {
+    e.preventDefault();
+    var x = self.toTime(e.offsetX), z = e.deltaY > 0 ? 1.25 : 0.8;
+    self.x0 = Math.max(0, x - (x - self.x0) * z);
+    self.x1 = Math.min(3600, x + (self.x1 - x) * z);
+    self.draw();
+  });
+  canvas.addEventListener("mousedown", function(e) { self.drag = e.offsetX; });
+  window.addEventListener("mouseup", function() { self.drag = null; });
+  canvas.addEventListener("mousemove", function(e) {
+    if (self.drag != null) {
+      var dt = (self.drag - e.offsetX) * (self.x1 - self.x0) / self.c.clientWidth;
+      dt = Math.max(-self.x0, Math.min(3600 - self.x1, dt));
+      self.x0 += dt; self.x1 += dt; self.drag = e.offsetX;
+      self.draw();
+    }
+    self.hover(e);
+  });
+  canvas.addEventListener("mouseleave", function() { tip.style.display = "none"; });
+  canvas.addEventListener("dblclick", function() { self.x0 = 0; self.x1 = 3600; self.draw(); });
+}
+
+Strip.prototype.toTime = function(px) {
+  return this.x0 + px * (this.x1 - this.x0) / this.c.clientWidth;
+};
+
+Strip.prototype.draw = function() {
+  var c = this.c, w = c.width = c.clientWidth, h = c.height = c.clientHeight;
+  var g = c.getContext("2d"), f = this.f, sx = w / (this.x1 - this.x0), sy = h / Y_MAX, i, x, bw, bh;
+  g.clearRect(0, 0, w, h);
+  // Gridlines every 100 s (or finer when zoomed in).
+  var step = Math.pow(10, Math.floor(Math.log(this.x1 - this.x0) / Math.LN10) - 1) * (this.x1 - this.x0 > 2000 ? 1 : 2);
+  g.strokeStyle = "#dddddd"; g.fillStyle = "#666666"; g.font = "10px sans-serif";
+  for (x = Math.ceil(this.x0 / step) * step; x <= this.x1; x += step) {
+    g.beginPath(); g.moveTo((x - this.x0) * sx, 0); g.lineTo((x - this.x0) * sx, h); g.stroke();
+    g.fillText(Math.round(x), (x - this.x0) * sx + 2, h - 2);
+  }
+  for (i = 0; i < f.np.length; i++) {
+    if (f.st[i] + f.at[i] < this.x0 || f.st[i] > this.x1) { continue; }
+    bw = Math.max(1, f.at[i] * sx); bh = Math.min(h, f.np[i] / f.at[i] * sy);
+    g.fillStyle = f.np[i] > 30000 ? "#882222" : "#44aa44";
+    g.fillRect((f.st[i] - this.x0) * sx, h - bh, bw, bh);
+  }
+};
+
+Strip.prototype.hover = function(e) {
+  var t = this.toTime(e.offsetX), f = this.f, tol = 2 * (this.x1 - this.x0) / this.c.clientWidth, i;
+  for (i = 0; i < f.np.length; i++) {
+    if (f.st[i] - tol <= t && t <= f.st[i] + f.at[i] + tol) {
+      var s = Math.floor(f.st[i]);
+      tip.innerHTML = pad(this.hour) + ":" + pad(Math.floor(s / 60)) + ":" + pad(s % 60) +
+        " &mdash; " + f.np[i] + " pixels in " + f.at[i] + " s";
+      tip.style.left = (e.clientX + 12) + "px"; tip.style.top = (e.clientY + 12) + "px";
+      tip.style.display = "block";
+      return;
+    }
+  }
+  tip.style.display = "none";
+};
+
+(function() {
+  var table = document.getElementById("hours"), strips = [], hour, key;
+  for (hour = 0; hour < 24; hour++) {
+    key = pad(hour);
+    if (!(key in DATA.hours)) { continue; }
+    var row = table.insertRow(-1), num = row.insertCell(-1), cell = row.insertCell(-1);
+    num.className = "number"; num.innerHTML = key;
+    var canvas = document.createElement("canvas");
+    cell.appendChild(canvas);
+    strips.push(new Strip(canvas, hour, decode(DATA.hours[key], DATA.start_time + hour * 3600)));
+  }
+  function drawAll() { for (var i = 0; i < strips.length; i++) { strips[i].draw(); } }
+  window.addEventListener("resize", drawAll);
+  drawAll();
+})();
+</script>
+</html>
+'''
+
+    # Add the day's data (as compact JSON).
+    s = s.replace('{{PAYLOAD}}', json.dumps(payload, separators=(',', ':')))
+
+    s = s.replace('{{Y_MAX}}', "%f" % (y_max))
+
+    s = s.replace('{{DAY}}', payload["day"])
+
+    # Add the CSS to the web page.
+    s = s.replace('{{CSS}}', make_style(css_href))
+
+    return s
+
+
+def make_tile_page(summaries, tile_dir="tiles", css_href=None):
+    """
+    Make the zoomable timeline page for a tile pyramid.
+
+    The page starts with the month tiles; click a tile to zoom in to its
+    days, hours and then minutes. Tiles are only loaded when their zoom
+    level is shown (and then lazily, as they scroll into view). Only the
+    month summaries are in the page - those of the finer levels are
+    loaded for each period as it's zoomed into (see tiles.write_tile_indexes).
+
+    @param [in] summaries Dictionary of the rollup summaries { level:{ key:totals } }.
+    @param [in] tile_dir The tile directory (relative to the page).
+    @param [in] css_href The shared stylesheet (None to put the CSS inline).
+    """
+
+    ## The string to return for the page.
+    s = '''<!DOCTYPE html>
+<html>
+<head>
+  <meta charset="utf-8">
+  <style>
+{{CSS}}
+  img.tile { width: 100%; height: 48px; image-rendering: pixelated; cursor: zoom-in; display: block; }
+  #crumbs { margin: 20px; font-size: 14px; }
+  </style>
+</head>
+<div id="container">
+
+  <!-- Main Content -->
+  <div id="main">
+    <div id="crumbs"></div>
+    <table id="tiles">
+    </table>
+  </div>
+
+  <!-- Footer -->
+  <div id="footer">&copy; CERN@school 2015</div>
+
+</div>
+<script>
+var INDEX = { "month/": {{INDEX}} };
+var HAS_LEVEL = {{HAS_LEVEL}};
+var TILE_DIR = "{{TILE_DIR}}";
+var LEVELS = ["month", "day", "hour", "minute"];
+var shown = null;
+
+// Called by the finer levels' index files (<level>/index-<parent>.js).
+function tileIndexLoaded(level, parent, part) {
+  INDEX[level + "/" + parent] = part;
+  if (shown && LEVELS[shown.d] == level && shown.p == parent) { show(shown.d, shown.p); }
+}
+
+function show(depth, parent) {
+  var level = LEVELS[depth], table = document.getElementById("tiles"), part, keys, i;
+  shown = { d: depth, p: parent };
+  while (table.rows.length > 0) { table.deleteRow(0); }
+  part = INDEX[level + "/" + parent];
+  if (!part) {
+    // Load the period's index (which then calls tileIndexLoaded).
+    var script = document.createElement("script");
+    script.src = TILE_DIR + "/" + level + "/index-" + parent + ".js";
+    document.body.appendChild(script);
+    part = {};
+  }
+  keys = Object.keys(part).sort();
+  for (i = 0; i < keys.length; i++) {
+    (function(key) {
+      var t = part[key], row = table.insertRow(-1), cap = row.insertCell(-1), cell = row.insertCell(-1);
+      cap.className = "number";
+      cap.innerHTML = key + "<br>" + t.frames + " frames" + (t.noisy > 0 ? " (" + t.noisy + " noisy)" : "");
+      var img = document.createElement("img");
+      img.className = "tile"; img.loading = "lazy"; img.alt = key;
+      img.src = TILE_DIR + "/" + level + "/" + key + ".png";
+      if (depth + 1 < LEVELS.length && HAS_LEVEL[LEVELS[depth + 1]]) {
+        img.onclick = function() { history.pushState({ d: depth + 1, p: key }, "", "#" + key); show(depth + 1, key); };
+      } else {
+        img.style.cursor = "default";
+      }
+      cell.appendChild(img);
+    })(keys[i]);
+  }
+  // The breadcrumbs back up the zoom levels.
+  var crumbs = document.getElementById("crumbs"), html = "<a href=\\"#\\" data-d=\\"0\\" data-p=\\"\\">All</a>";
+  for (i = 1; i <= depth; i++) {
+    var p = parent.substring(0, { 1: 7, 2: 10, 3: 13 }[i]);
+    html += " &rsaquo; <a href=\\"#" + p + "\\" data-d=\\"" + i + "\\" data-p=\\"" + p + "\\">" + p + "</a>";
+  }
+  crumbs.innerHTML = html;
+  var links = crumbs.getElementsByTagName("a");
+  for (i = 0; i < links.length; i++) {
+    links[i].onclick = function(e) {
+      e.preventDefault();
+      var d = parseInt(this.getAttribute("data-d")), p = this.getAttribute("data-p");
+      history.pushState({ d: d, p: p }, "", "#" + p); show(d, p);
+    };
+  }
+}
+
+window.onpopstate = function(e) { if (e.state) { show(e.state.d, e.state.p); } else { show(0, ""); } };
+show(0, "");
+</script>
+</html>
+'''
+
+    # Add the tile index (just the month summaries - the rest are loaded as needed).
+    s = s.replace('{{INDEX}}', json.dumps(summaries.get("month", {}), separators=(',', ':'), sort_keys=True))
+
+    s = s.replace('{{HAS_LEVEL}}', json.dumps(dict((level, True) for level in summaries.keys()), sort_keys=True))
+
+    s = s.replace('{{TILE_DIR}}', tile_dir)
+
+    # Add the CSS to the web page.
+    s = s.replace('{{CSS}}', make_style(css_href))
 
     return s
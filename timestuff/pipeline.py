@@ -0,0 +1,340 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+
+CERN@school: Data Profiling - Time Stuff - Pipeline orchestration.
+
+The toolkit's scripts (condense -> profile -> plot -> page) are modelled
+as a graph of tasks over files. As with make, a task is only run if it is
+stale - if one of its outputs is missing, or one of its inputs is newer
+than its stamp (written when the task last succeeded). Independent tasks
+(e.g. different runs and days) are run in parallel.
+
+See http://cernatschool.web.cern.ch for more information.
+
+"""
+
+#...for the OS stuff.
+import os, sys
+
+#...for the logging.
+import logging as lg
+
+#...for the time (being).
+import time
+
+#...for running the scripts.
+import subprocess
+
+#...for the pool of task workers.
+from multiprocessing.pool import ThreadPool
+
+#...for the profile catalog.
+from timestuff.catalog import CATALOG_NAME
+
+## The directory containing the toolkit's scripts.
+SCRIPT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+## The directory for the task stamps (in the output directory).
+STAMP_DIR = ".pipeline"
+
+## The pipeline stages (in order, for the report).
+STAGES = ["condense", "profile", "plot", "page", "tiles"]
+
+def make_task(name, stage, script, args, inputs, outputs=(), deps=(), expand=None):
+    """
+    Make a pipeline task.
+
+    @param [in] name The (unique) name of the task.
+    @param [in] stage The pipeline stage (see STAGES).
+    @param [in] script The script to run (e.g. "condense-time-info.py").
+    @param [in] args The script's arguments.
+    @param [in] inputs The paths of the files the task reads.
+    @param [in] outputs The paths of the files the task writes.
+    @param [in] deps The names of the tasks that must be run first.
+    @param [in] expand Function of the task returning the tasks that can only
+    be made once it has run (e.g. the day plots for a condensed run).
+
+    @return The task dictionary.
+    """
+
+    return {
+        "name"    : name,
+        "stage"   : stage,
+        "script"  : script,
+        "args"    : [str(a) for a in args],
+        "inputs"  : list(inputs),
+        "outputs" : list(outputs),
+        "deps"    : list(deps),
+        "expand"  : expand,
+        }
+
+def get_stamp_path(outputpath, task):
+    """ Get the path of a task's stamp file. """
+
+    return os.path.join(outputpath, STAMP_DIR, "%s.stamp" % (task["name"].replace("/", "_")))
+
+def is_task_stale(outputpath, task):
+    """
+    Does the task need to be run (make-style)?
+
+    @param [in] outputpath The output directory (for the stamps).
+    @param [in] task The task dictionary.
+    """
+
+    ## The stamp path.
+    stamp_path = get_stamp_path(outputpath, task)
+
+    if not os.path.exists(stamp_path):
+        return True
+
+    for path in task["outputs"]:
+        if not os.path.exists(path):
+            return True
+
+    ## The time the task last succeeded.
+    stamp_time = os.path.getmtime(stamp_path)
+
+    for path in task["inputs"]:
+        if not os.path.exists(path) or os.path.getmtime(path) > stamp_time:
+            return True
+
+    return False
+
+def run_task(task):
+    """
+    Run a task's script.
+
+    @param [in] task The task dictionary.
+
+    @return The task's (name, success, time taken [s]).
+    """
+
+    ## The command.
+    cmd = [sys.executable, os.path.join(SCRIPT_DIR, task["script"])] + task["args"]
+
+    lg.info(" * Running %s: %s" % (task["name"], " ".join(cmd)))
+
+    ## The time taken [s].
+    t0 = time.time()
+
+    with open(os.devnull, "w") as devnull:
+        rc = subprocess.call(cmd, stdout=devnull)
+
+    lg.info(" * Finished %s (exit code %d) in %.1f s." % (task["name"], rc, time.time() - t0))
+
+    return task["name"], rc == 0, time.time() - t0
+
+def run_pipeline(tasks, outputpath, processes=1, force=False, dry_run=False):
+    """
+    Run the stale tasks of a pipeline, in dependency order.
+
+    A task is skipped if it is up to date, and fails if any of the tasks it
+    depends on fail. The tasks made by a task's expand function are added
+    to the pipeline once the task has run (or been skipped).
+
+    @param [in] tasks List of the task dictionaries.
+    @param [in] outputpath The output directory (for the stamps).
+    @param [in] processes The number of tasks to run at once.
+    @param [in] force Run every task, whether it is stale or not.
+    @param [in] dry_run Only report the stale tasks (don't run them).
+
+    @return Dictionary of the report { stage:{ "run", "skipped", "failed", "time" } }.
+    """
+
+    ## The tasks { name:task }.
+    todo = dict((task["name"], task) for task in tasks)
+
+    ## The state of the finished tasks { name:"run"/"skipped"/"failed" }.
+    done = {}
+
+    ## The report { stage:totals }.
+    report = {}
+
+    ## The names of the tasks that were run (so their dependents are stale too).
+    rerun = set()
+
+    ## The pool of task workers.
+    pool = ThreadPool(processes)
+
+    ## The tasks being run { name:async result }.
+    running = {}
+
+    def finish(task, state, dt=0.0):
+
+        done[task["name"]] = state
+
+        totals = report.setdefault(task["stage"], {"run":0, "skipped":0, "failed":0, "time":0.0})
+        #
+        totals[state] += 1
+        #
+        totals["time"] += dt
+
+        if state == "run":
+
+            rerun.add(task["name"])
+
+            if dry_run:
+                return
+
+            ## The stamp path.
+            stamp_path = get_stamp_path(outputpath, task)
+            #
+            if not os.path.isdir(os.path.dirname(stamp_path)):
+                os.makedirs(os.path.dirname(stamp_path))
+            #
+            with open(stamp_path, "w") as sf:
+                sf.write("%f\n" % (time.time()))
+
+        if state != "failed" and task["expand"] is not None and not dry_run:
+            for new_task in task["expand"](task):
+                todo[new_task["name"]] = new_task
+
+    try:
+        while len(todo) > 0 or len(running) > 0:
+
+            # Collect the finished tasks.
+            for name in [n for n in running if running[n].ready()]:
+
+                name, ok, dt = running.pop(name).get()
+
+                finish(todo.pop(name), "run" if ok else "failed", dt)
+
+                print("* %-40s %s (%.1f s)" % (name, "done" if ok else "FAILED", dt))
+
+            ## Were any tasks started (or skipped) this time round?
+            progress = False
+
+            for name in sorted(todo.keys()):
+
+                task = todo[name]
+
+                if name in running or any(dep in todo for dep in task["deps"]):
+                    continue
+
+                progress = True
+
+                if any(done.get(dep) == "failed" for dep in task["deps"]):
+                    finish(todo.pop(name), "failed")
+                    #
+                    print("* %-40s SKIPPED (a dependency failed)" % (name))
+                    continue
+
+                if not (force or any(dep in rerun for dep in task["deps"]) or is_task_stale(outputpath, task)):
+                    finish(todo.pop(name), "skipped")
+                    continue
+
+                if dry_run:
+                    # Pretend the task has run, so its dependents show as stale.
+                    print("* %-40s would run: %s %s" % (name, task["script"], " ".join(task["args"])))
+                    #
+                    finish(todo.pop(name), "run")
+                    continue
+
+                running[name] = pool.apply_async(run_task, (task,))
+
+            if not progress and len(running) > 0:
+                time.sleep(0.1)
+            elif not progress and len(todo) > 0:
+                raise IOError("* ERROR: the pipeline has circular dependencies: %s" % (", ".join(sorted(todo.keys()))))
+
+    finally:
+        pool.close()
+        pool.join()
+
+    return report
+
+def get_run_days(datapath):
+    """
+    Get the days ("%Y-%m-%d") covered by a condensed data file.
+
+    @param [in] datapath The path to the condensed data file.
+    """
+
+    #...for reading the condensed data (only needed once a run is condensed).
+    import numpy as np
+    #
+    from timestuff.rollup import read_condensed, get_period_starts, get_period_key
+
+    ## The day starts of the frames.
+    day_starts = np.unique(get_period_starts("day", read_condensed(datapath)["start_time"]))
+
+    return [get_period_key("day", int(ds)) for ds in day_starts]
+
+def make_mafalda_tasks(rootpath, outputpath):
+    """
+    Make the tasks for a (Mafalda) run - condense it, then its plots, pages and tiles.
+
+    The outputs are written to <outputpath>/bin, plots/<run ID> (with a
+    directory for each day) and tiles/<run ID>.
+
+    @param [in] rootpath The path to the run's ROOT file.
+    @param [in] outputpath The output directory.
+    """
+
+    ## The run ID (as per condense-time-info.py).
+    run_id = os.path.basename(rootpath).split(".")[0]
+
+    ## The condensed data directory.
+    binpath = os.path.join(outputpath, "bin")
+
+    ## The condensed data file.
+    datapath = os.path.join(binpath, "%s.bin" % (run_id))
+
+    ## The run's plot and tile directories.
+    plotpath, tilepath = os.path.join(outputpath, "plots", run_id), os.path.join(outputpath, "tiles", run_id)
+
+    for path in [binpath, plotpath, tilepath]:
+        if not os.path.isdir(path):
+            os.makedirs(path)
+
+    def make_day_tasks(task):
+
+        ## The day plot and page tasks.
+        day_tasks = []
+
+        for day in get_run_days(datapath):
+
+            ## The day's plot directory.
+            daypath = os.path.join(plotpath, day)
+
+            day_tasks.append(make_task("plot-day/%s/%s" % (run_id, day), "plot", "plot-run-time-day.py", [datapath, plotpath, day, -1, 0, "-p", 1, "--payload", "--metrics-name", "%s_%s" % (run_id, day)], [datapath], [os.path.join(daypath, "hours.json")], ["condense/%s" % (run_id)]))
+            #
+            day_tasks.append(make_task("page-day/%s/%s" % (run_id, day), "page", "make-day-page.py", [daypath, daypath, "-p", 1, "--site-root", outputpath, "--metrics-name", "%s_%s" % (run_id, day)], [os.path.join(daypath, "hours.json")], [os.path.join(daypath, "plots.html")], ["plot-day/%s/%s" % (run_id, day)]))
+
+        return day_tasks
+
+    return [
+        make_task("condense/%s" % (run_id), "condense", "condense-time-info.py", [rootpath, binpath, -1, 0, "--metrics-name", run_id], [rootpath], [datapath], expand=make_day_tasks),
+        make_task("plot-all/%s" % (run_id), "plot", "plot-run-time-all.py", [datapath, plotpath, -1, 0, "-p", 1, "--metrics-name", run_id], [datapath], [], ["condense/%s" % (run_id)]),
+        make_task("page-all/%s" % (run_id), "page", "make-all-page.py", [plotpath, plotpath, "-p", 1, "--site-root", outputpath, "--metrics-name", run_id], [datapath], [os.path.join(plotpath, "plots.html")], ["plot-all/%s" % (run_id)]),
+        make_task("tiles/%s" % (run_id), "tiles", "make-tiles.py", [datapath, tilepath, "-p", 1, "--metrics-name", run_id], [datapath], [os.path.join(tilepath, "tiles.html")], ["condense/%s" % (run_id)]),
+        ]
+
+def make_dsc_tasks(rootpaths, outputpath):
+    """
+    Make the tasks for (DSC) datasets - profile each one, then the profile pages.
+
+    The profile catalog and pages are written to <outputpath>/profiles.
+
+    @param [in] rootpaths The paths to the datasets' ROOT files.
+    @param [in] outputpath The output directory.
+    """
+
+    ## The profile directory.
+    profilepath = os.path.join(outputpath, "profiles")
+    #
+    if not os.path.isdir(profilepath):
+        os.makedirs(profilepath)
+
+    ## The profile tasks.
+    tasks = []
+
+    for rootpath in rootpaths:
+        tasks.append(make_task("profile/%s" % (os.path.basename(rootpath)), "profile", "profile-dataset.py", [rootpath, profilepath, -1, 0, "--metrics-name", os.path.basename(rootpath).split(".")[0]], [rootpath]))
+
+    # The profile pages are shared by all of the datasets.
+    tasks.append(make_task("page-profiles", "page", "display-profile.py", [profilepath, profilepath, "--site-root", outputpath], [os.path.join(profilepath, CATALOG_NAME)], [os.path.join(profilepath, "profiles.html")], [task["name"] for task in tasks]))
+
+    return tasks
@@ -21,39 +21,248 @@ import time
 #...for even more MATH.
 import numpy as np
 
-# Import the plotting libraries.
-import pylab as plt
+# Import the plotting libraries - the object-oriented API with the Agg
+# canvas, so that no pyplot global state is shared between plots (and
+# plots can be rendered concurrently in worker processes).
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 
 #...for the colours. Oh, the colours!
 from matplotlib.colors import LogNorm
 
-# Load the LaTeX text plot libraries.
-from matplotlib import rc
-
-# Uncomment to use LaTeX for the plot text.
-rc('font',**{'family':'serif','serif':['Computer Modern']})
-rc('text', usetex=True)
+#...for the render profiles (LaTeX or mathtext plot text).
+from matplotlib import rc_context
 
 #...for plotting arbitrary rectangles on the plots.
 from matplotlib.patches import Rectangle
 
+#...for plotting many rectangles (frames) at once.
+from matplotlib.collections import PolyCollection
+
+#...for the default patch styling.
+from matplotlib import rcParams
+
+#...for setting the bar properties.
+from matplotlib.artist import setp
+
 #...for custom axis tickers.
 import matplotlib.ticker as ticker
 
+## The render profiles { profile name:matplotlib rc parameters }.
+#
+# "fast" uses matplotlib's own mathtext for the plot text, so no external
+# LaTeX (or dvipng) runs are needed - use this for the web page PNGs.
+# "publication" uses LaTeX for the plot text (for the PostScript used in
+# publications) and so requires a working TeX installation.
+RENDER_PROFILES = {
+    "fast" : {
+        "text.usetex"      : False,
+        "font.family"      : "serif",
+        "mathtext.fontset" : "cm",
+        },
+    "publication" : {
+        "text.usetex" : True,
+        "font.family" : "serif",
+        "font.serif"  : ["Computer Modern"],
+        },
+    }
+
+def render_profile(name):
+    """
+    Get a context manager that applies the named render profile.
+
+    Plot text is set up when the figure is made and drawn when it is saved,
+    so both should happen within the same profile.
+
+    @param [in] name The name of the render profile (see RENDER_PROFILES).
+    """
+
+    if name not in RENDER_PROFILES:
+        raise IOError("* ERROR: unknown render profile '%s'!" % (name))
+
+    return rc_context(RENDER_PROFILES[name])
+
+## The supported output formats.
+#
+# PNG (and SVG) are for the HTML pages, PostScript and PDF for publications.
+OUTPUT_FORMATS = ["png", "svg", "ps", "pdf"]
+
+## The output formats written by default.
+DEFAULT_FORMATS = ["png", "ps"]
+
+def save_figure(fig, profile, outputpath, name, formats=None):
+    """
+    Save a figure in each of the requested output formats.
+
+    @param [in] fig The matplotlib figure to save.
+    @param [in] profile The render profile to save the figure with.
+    @param [in] outputpath The directory to save the figure to.
+    @param [in] name The name of the figure (without the file extension).
+    @param [in] formats List of output formats (None for DEFAULT_FORMATS).
+
+    @return A list of the paths of the saved figures.
+    """
+
+    if formats is None:
+        formats = DEFAULT_FORMATS
+
+    ## The paths of the saved figures.
+    paths = []
+
+    with render_profile(profile):
+        for fmt in formats:
+
+            if fmt not in OUTPUT_FORMATS:
+                raise IOError("* ERROR: unknown output format '%s'!" % (fmt))
+
+            ## The path of the figure in this format.
+            path = os.path.join(outputpath, "%s.%s" % (name, fmt))
+            #
+            fig.savefig(path, format=fmt)
+            #
+            paths.append(path)
+
+    print("* Saved figures %s." % (", ".join("'%s'" % (p) for p in paths)))
+    lg.info("* Saved figures %s." % (", ".join("'%s'" % (p) for p in paths)))
+
+    return paths
+
+def frame_arrays(data_hour):
+    """
+    Get the frame bars for an hour as arrays.
+
+    @param [in] data_hour DataHour object for the hour.
+
+    @return The bars' x positions (frame start time - the hour's start
+    time) [s], widths (acquisition times) [s] and heights (pixels per
+    second), and the mask of the noisy frames (more than 30000 pixels).
+    """
+
+    ## The frame start times relative to the hour's start time [s].
+    xs = np.asarray(data_hour.getStartTimes(), dtype=float) - data_hour.getStartTime()
+
+    ## The frame acquisition times [s] - the widths of the bars.
+    ws = np.asarray(data_hour.getAcqTimes(), dtype=float)
+
+    ## The number of pixels in each frame.
+    nps = np.asarray(data_hour.getNumberOfPixels(), dtype=float)
+
+    ## The heights of the bars - the pixels per second.
+    #
+    # This means the area of each bar is the total number of pixels
+    # in the frame.
+    hs = nps / ws
+
+    ## Mask of the noisy frames (i.e. more than 30000 hit pixels).
+    noisy = nps > 30000
+
+    return xs, ws, hs, noisy
+
+def frame_collection(xs, ws, hs, frame_color, bottoms=0.0):
+    """
+    Make a single collection of bars representing the frames.
+
+    @param [in] xs The x positions of the bars (frame start times) [s].
+    @param [in] ws The widths of the bars (acquisition times) [s].
+    @param [in] hs The heights of the bars (pixels per second).
+    @param [in] frame_color The face and edge colour of the bars.
+    @param [in] bottoms The bottoms of the bars (pixels per second).
+    """
+
+    ## The bar vertices - shape (number of frames, 4, 2).
+    verts = np.empty((len(xs), 4, 2))
+    #
+    verts[:, 0, 0] = xs
+    verts[:, 1, 0] = xs
+    verts[:, 2, 0] = xs + ws
+    verts[:, 3, 0] = xs + ws
+    #
+    verts[:, 0, 1] = bottoms
+    verts[:, 1, 1] = hs
+    verts[:, 2, 1] = hs
+    verts[:, 3, 1] = bottoms
+
+    # Match the look of the individual Rectangle patches (same face and
+    # edge colour, default patch line width).
+    return PolyCollection(verts, facecolors=frame_color, edgecolors=frame_color, linewidths=rcParams['patch.linewidth'])
+
+
+def bin_frames(xs, hs, noisy, bin_width, n_bins):
+    """
+    Aggregate frames into fixed-width time bins.
+
+    @param [in] xs The frame start times (relative to the start of the bins) [s].
+    @param [in] hs The frame pixels per second.
+    @param [in] noisy Mask of the noisy frames.
+    @param [in] bin_width The width of the bins [s].
+    @param [in] n_bins The number of bins.
+
+    @return Dictionary of arrays (one entry per bin) - the number of frames
+    ("n_frames") and noisy frames ("n_noisy"), the minimum, maximum and
+    mean pixels per second of the normal frames ("min", "max", "mean") and
+    the maximum pixels per second of the noisy frames ("noisy_max").
+    """
+
+    ## The bin index of each frame.
+    idx = np.clip((xs / bin_width).astype(int), 0, n_bins - 1)
+
+    ## Mask of the normal frames.
+    normal = ~noisy
+
+    ## The number of normal frames in each bin.
+    n_normal = np.bincount(idx[normal], minlength=n_bins)
+
+    ## The binned frame data.
+    bins = {}
+    #
+    bins["n_frames"] = np.bincount(idx, minlength=n_bins)
+    #
+    bins["n_noisy"] = bins["n_frames"] - n_normal
+    #
+    bins["min"] = np.zeros(n_bins)
+    bins["min"][n_normal > 0] = np.inf
+    np.minimum.at(bins["min"], idx[normal], hs[normal])
+    #
+    bins["max"] = np.zeros(n_bins)
+    np.maximum.at(bins["max"], idx[normal], hs[normal])
+    #
+    bins["mean"] = np.bincount(idx[normal], weights=hs[normal], minlength=n_bins) / np.maximum(n_normal, 1)
+    #
+    bins["noisy_max"] = np.zeros(n_bins)
+    np.maximum.at(bins["noisy_max"], idx[noisy], hs[noisy])
+
+    return bins
+
 class MonthPlot:
     """ Wrapper class for the monthly plots. """
 
-    def __init__(self, data_month, **kwargs):
+    def __init__(self, data_month=None, **kwargs):
         """
         Constructor.
 
+        The static parts of the figure (the figure itself, the axes labels,
+        gridlines, etc.) are created here. If no month is supplied, the
+        object can be used as a template: call update() with each month's
+        data and then save_plot().
+
         @param [in] data_month DataMonth object for the month to plot.
         """
 
         lg.info(" * Initialising MonthPlot object...")
 
-        # Reset the matplot lib plotting stuff.
-        plt.close()
+        ## The render profile (see RENDER_PROFILES).
+        self.__profile = "fast"
+        #
+        if "profile" in kwargs.keys():
+            self.__profile = kwargs["profile"]
+
+        with render_profile(self.__profile):
+            self.__make_figure(data_month, **kwargs)
+
+        lg.info(" *")
+
+    def __make_figure(self, data_month, **kwargs):
+        """ Makes the static parts of the figure (and plots any data). """
 
         # Here we create the figure on which we'll be plotting our results.
         # We assign the figure a number, a size (5" x 3"), set the resolution
@@ -63,7 +272,7 @@ class MonthPlot:
         self.__fig_w = 5.0
         #
         if "fig_width" in kwargs.keys():
-            self.__fig_width = kwargs["fig_width"]
+            self.__fig_w = kwargs["fig_width"]
 
         ## The figure height [inches].
         self.__fig_h = 5.0
@@ -72,7 +281,10 @@ class MonthPlot:
             self.__fig_h = kwargs["fig_height"]
 
         ## The histogram.
-        self.__plot = plt.figure(101, figsize=(self.__fig_w, self.__fig_h), dpi=150, facecolor='w', edgecolor='w')
+        self.__plot = Figure(figsize=(self.__fig_w, self.__fig_h), dpi=150, facecolor='w', edgecolor='w')
+
+        ## The Agg canvas for rendering the figure.
+        self.__canvas = FigureCanvasAgg(self.__plot)
 
         # Then we give a bit of clearance for the axes.
         self.__plot.subplots_adjust(bottom=0.17, left=0.15)
@@ -88,7 +300,7 @@ class MonthPlot:
         if "x_label" in kwargs.keys():
             self.__x_label = kwargs["x_label"]
         #
-        plt.xlabel(self.__x_label)
+        self.__plot_ax.set_xlabel(self.__x_label)
 
         ## The y axis label.
         self.__y_label = "$y$"
@@ -96,14 +308,56 @@ class MonthPlot:
         if "y_label" in kwargs.keys():
             self.__y_label = kwargs["y_label"]
         #
-        plt.ylabel(self.__y_label)
-
-        # Plot the number of frames.
+        self.__plot_ax.set_ylabel(self.__y_label)
 
         # Should be we use a logarithmic scale for the y axis?
         # Not yet, but we might do later.
         uselogy = False
 
+        ## The rectangle shading out the unused days (resized for each month).
+        self.__unused_days = Rectangle((32, 0), 0, 0, facecolor="#dddddd", edgecolor="#dddddd")
+        #
+        self.__plot_ax.add_patch(self.__unused_days)
+
+        # Add gridlines.
+        self.__plot_ax.grid(True)
+
+        ## The x axis maximum.
+        self.__x_max = 32.0
+        #
+        if "x_max" in kwargs.keys():
+            self.__x_max = kwargs["x_max"]
+
+        # Set the x axis limits.
+        self.__plot_ax.set_xlim([1, self.__x_max])
+
+        ## The data artists (swapped for each month).
+        self.__data_artists = []
+
+        if data_month is not None:
+            self.__draw_data(data_month, **kwargs)
+
+    def update(self, data_month, **kwargs):
+        """
+        Replace the plotted data with the supplied month's data.
+
+        @param [in] data_month DataMonth object for the month to plot.
+        """
+
+        with render_profile(self.__profile):
+            self.__draw_data(data_month, **kwargs)
+
+    def __draw_data(self, data_month, **kwargs):
+        """ Draws the month's data (replacing any previous data). """
+
+        # Remove the previous month's data.
+        for artist in self.__data_artists:
+            artist.remove()
+        #
+        self.__data_artists = []
+
+        # Plot the number of frames.
+
         # Firstly, we'll choose our plot bin values. We will use bin
         # widths of 1.
 
@@ -130,11 +384,13 @@ class MonthPlot:
         # using the bin edges defined above.
         #
         ## The bar chart patches.
-        patches_f = plt.bar(bins, data_month.getFramesInEachDay().values())
+        patches_f = self.__plot_ax.bar(bins, list(data_month.getFramesInEachDay().values()))
 
         # Set the display propertied of the "patches" (bars).
         # We're using translucent green bars with no outline.
-        plt.setp(patches_f, 'facecolor', '#AADDAA', 'alpha', 1.0, 'linewidth', 0.0)
+        setp(patches_f, 'facecolor', '#AADDAA', 'alpha', 1.0, 'linewidth', 0.0)
+        #
+        self.__data_artists.append(patches_f)
 
         ## The maximum y value.
         y_max = max(data_month.getFramesInEachDay().values())
@@ -143,54 +399,64 @@ class MonthPlot:
         y_max = 1000 * (np.floor(y_max/1000.) + 1)
         #
         if y_max > 0:
-            plt.ylim([0.0, y_max])
+            self.__plot_ax.set_ylim([0.0, y_max])
 
         # If supplied by the user, set the y axis limits.
         if "y_max" in kwargs.keys():
             y_max = kwargs["y_max"]
-            plt.ylim([0.0, y_max])
+            self.__plot_ax.set_ylim([0.0, y_max])
 
         # Shade out the unused days.
-        self.__plot_ax.add_patch(Rectangle((data_month.getNumberOfDays() + 1, 0), 31 - data_month.getNumberOfDays(), y_max, facecolor="#dddddd", edgecolor="#dddddd"))
-
-        # Add gridlines.
-        plt.grid(1)
-
-        ## The x axis maximum.
-        self.__x_max = 32.0
-        #
-        if "x_max" in kwargs.keys():
-            self.__x_max = kwargs["x_max"]
-
-        # Set the x axis limits.
-        plt.xlim([1, self.__x_max])
+        self.__unused_days.set_x(data_month.getNumberOfDays() + 1)
+        self.__unused_days.set_width(31 - data_month.getNumberOfDays())
+        self.__unused_days.set_height(y_max)
 
-        lg.info(" *")
+        # Keep the x axis limits (the bars may have changed them).
+        self.__plot_ax.set_xlim([1, self.__x_max])
 
-    def save_plot(self, outputpath, name):
-        """ Saves the figure. """
+    def save_plot(self, outputpath, name, formats=None):
+        """
+        Saves the figure.
 
-        # PNG (for HTML pages).
-        self.__plot.savefig(outputpath + "/%s.png" % (name))
+        @param [in] outputpath The directory to save the figure to.
+        @param [in] name The name of the figure (without the file extension).
+        @param [in] formats List of output formats (see OUTPUT_FORMATS).
+        """
 
-        # PostScript (for publications).
-        self.__plot.savefig(outputpath + "/%s.ps"  % (name))
+        return save_figure(self.__plot, self.__profile, outputpath, name, formats)
 
 
 class HourPlot:
     """ Wrapper class for the hourly plots. """
 
-    def __init__(self, data_hour, **kwargs):
+    def __init__(self, data_hour=None, **kwargs):
         """
         Constructor.
+
+        The static parts of the figure are created here. If no hour is
+        supplied, the object can be used as a template: call update() with
+        each hour's data and then save_plot().
+
+        @param [in] data_hour DataHour object for the hour to plot.
         """
 
         lg.info(" *")
         lg.info(" * Initialising HourPlot object...")
         #print(" * Initialising HourPlot object...")
 
-        # Reset the matplot lib plotting stuff.
-        plt.close()
+        ## The render profile (see RENDER_PROFILES).
+        self.__profile = "fast"
+        #
+        if "profile" in kwargs.keys():
+            self.__profile = kwargs["profile"]
+
+        with render_profile(self.__profile):
+            self.__make_figure(data_hour, **kwargs)
+
+        lg.info(" *")
+
+    def __make_figure(self, data_hour, **kwargs):
+        """ Makes the static parts of the figure (and plots any data). """
 
         # Here we create the figure on which we'll be plotting our results.
         # We assign the figure a number, a size (5" x 3"), set the resolution
@@ -200,7 +466,7 @@ class HourPlot:
         self.__fig_w = 42.0
         #
         if "fig_width" in kwargs.keys():
-            self.__fig_width = kwargs["fig_width"]
+            self.__fig_w = kwargs["fig_width"]
 
         ## The figure height [inches].
         self.__fig_h = 4.2
@@ -209,7 +475,10 @@ class HourPlot:
             self.__fig_h = kwargs["fig_height"]
 
         ## The histogram.
-        self.__plot = plt.figure(101, figsize=(self.__fig_w, self.__fig_h), dpi=150, facecolor='w', edgecolor='w')
+        self.__plot = Figure(figsize=(self.__fig_w, self.__fig_h), dpi=150, facecolor='w', edgecolor='w')
+
+        ## The Agg canvas for rendering the figure.
+        self.__canvas = FigureCanvasAgg(self.__plot)
 
         # Then we give a bit of clearance for the axes.
         self.__plot.subplots_adjust(bottom=0.15, left=0.02, right=0.99)
@@ -225,7 +494,7 @@ class HourPlot:
         if "x_label" in kwargs.keys():
             self.__x_label = kwargs["x_label"]
         #
-        plt.xlabel(self.__x_label)
+        self.__plot_ax.set_xlabel(self.__x_label)
 
         ## The y axis label.
         self.__y_label = "$y$"
@@ -233,105 +502,172 @@ class HourPlot:
         if "y_label" in kwargs.keys():
             self.__y_label = kwargs["y_label"]
         #
-        plt.ylabel(self.__y_label)
-
-        # Plot the number of frames.
+        self.__plot_ax.set_ylabel(self.__y_label)
 
         # Should be we use a logarithmic scale for the y axis?
         # Not yet, but we might do later.
         uselogy = False
 
+        # Add gridlines.
+        self.__plot_ax.grid(True)
+
+        ## The x axis maximum.
+        self.__x_max = 3600.0
+        #
+        if "x_max" in kwargs.keys():
+            self.__x_max = kwargs["x_max"]
+
+        # Set the x axis limits.
+        self.__plot_ax.set_xlim([0, self.__x_max])
+
+        # Set the x axis tickers.
+        self.__plot_ax.xaxis.set_ticks(np.arange(0.0, self.__x_max + 100, 100))
+
+        #self.__plot_ax.xaxis.set_major_formatter(ticker.FormatStrFormatter('%0.1f'))
+
+        ## The data artists (swapped for each hour).
+        self.__data_artists = []
+
+        if data_hour is not None:
+            self.__draw_data(data_hour, **kwargs)
+
+    def update(self, data_hour, **kwargs):
+        """
+        Replace the plotted data with the supplied hour's data.
+
+        @param [in] data_hour DataHour object for the hour to plot.
+        """
+
+        with render_profile(self.__profile):
+            self.__draw_data(data_hour, **kwargs)
+
+    def __draw_data(self, data_hour, **kwargs):
+        """ Draws the hour's data (replacing any previous data). """
+
+        # Remove the previous hour's data.
+        for artist in self.__data_artists:
+            artist.remove()
+        #
+        self.__data_artists = []
+
+        # Plot the number of frames.
+
         ## The hour's start time.
         h_st = data_hour.getStartTime()
 
         lg.info(" * The hour's start time: %d [s]" % (h_st))
 
-        ## The maximum y value.
-        y_max = 1.0
+        ## The frame bars and the mask of the noisy frames.
+        xs, ws, hs, noisy = frame_arrays(data_hour)
 
-        # Loop over the frames found.
-        for i, st in enumerate(data_hour.getStartTimes()):
-
-            ## The frame's acquisition time [s].
-            acq_time = data_hour.getAcqTimes()[i]
+        ## The maximum y value (from the normal frames only).
+        y_max = 1.0
+        #
+        if np.any(~noisy):
+            y_max = max(y_max, hs[~noisy].max())
 
-            ## The number of pixels in the frame.
-            n_pixels = data_hour.getNumberOfPixels()[i]
+        ## The level-of-detail mode ("auto", "on" or "off").
+        lod = "auto"
+        #
+        if "lod" in kwargs.keys():
+            lod = kwargs["lod"]
 
-            #lg.info(" * Found new frame: %s (%f [s], % 7d pixels)." % (time.asctime(time.gmtime(st)), acq_time, n_pixels))
+        ## The width of a pixel on the x axis [s].
+        pixel_w = self.__x_max / (self.__plot_ax.get_position().width * self.__fig_w * self.__plot.dpi)
 
-            ## The x position of the frame's bar (frame - hour's start time).
-            x = st - h_st
+        ## Mask of the frames narrower than a pixel.
+        narrow = ws < pixel_w
 
-            ## The y position of the frame's bar.
-            y = 0
+        ## Should we draw the (binned) envelope of the narrow frames?
+        use_lod = (lod == "on") or (lod == "auto" and np.count_nonzero(narrow) * pixel_w > self.__x_max)
 
-            ## The width of the bar - the acquition time.
-            w = acq_time
-            #
-            ## The height of the bar - the pixels per second.
-            #
-            # This means the area of the bar is the total number of pixels
-            # in the frame.
-            h = float(n_pixels) / float(acq_time)
+        if use_lod:
+            lg.info(" * Drawing %d frames as pixel-width bins." % (np.count_nonzero(narrow)))
 
-            ## The "normal" frame colour.
-            frame_color = "#44aa44"
+            self.__draw_binned_frames(xs[narrow], hs[narrow], noisy[narrow], pixel_w)
 
-            # Check if we have a noisy frame.
-            if n_pixels > 30000:
-                # Set the frame color to indicate an error (i.e. noise).
-                frame_color = "#882222"
-            else:
-                # If normal, check if we have a new maximum.
-                if h > y_max:
-                    y_max = h
+            # The wider frames are still drawn individually.
+            xs, ws, hs, noisy = xs[~narrow], ws[~narrow], hs[~narrow], noisy[~narrow]
 
-            # Add a rectangle representing the frame to the plot.
-            self.__plot_ax.add_patch(Rectangle((x, y), w, h, facecolor=frame_color, edgecolor=frame_color))
+        # Add the frames to the plot as one collection per frame class
+        # rather than as one Rectangle patch per frame.
+        for mask, frame_color in [(~noisy, "#44aa44"), (noisy, "#882222")]:
+            if not np.any(mask):
+                continue
+            self.__data_artists.append(self.__plot_ax.add_collection(frame_collection(xs[mask], ws[mask], hs[mask], frame_color), autolim=False))
 
         # Round up to the nearest 10.
         y_max = 10 * (np.floor(y_max/10.) + 1)
         #
         if y_max > 0:
-            plt.ylim([0.0, y_max])
+            self.__plot_ax.set_ylim([0.0, y_max])
 
         # If supplied by the user, set the y axis limits.
         if "y_max" in kwargs.keys():
             y_max = kwargs["y_max"]
-            plt.ylim([0.0, y_max])
+            self.__plot_ax.set_ylim([0.0, y_max])
 
-        # Add gridlines.
-        plt.grid(1)
+    def getFigure(self):
+        return self.__plot
 
-        ## The x axis maximum.
-        self.__x_max = 3600.0
-        #
-        if "x_max" in kwargs.keys():
-            self.__x_max = kwargs["x_max"]
+    def getAxes(self):
+        return self.__plot_ax
 
-        # Set the x axis limits.
-        plt.xlim([0, self.__x_max])
+    def getProfile(self):
+        return self.__profile
 
-        # Set the x axis tickers.
-        self.__plot_ax.xaxis.set_ticks(np.arange(0.0, self.__x_max + 100, 100))
+    def __draw_binned_frames(self, xs, hs, noisy, bin_width):
+        """
+        Draws the envelope of the frames binned in time (level of detail).
 
-        #self.__plot_ax.xaxis.set_major_formatter(ticker.FormatStrFormatter('%0.1f'))
+        Each bin is drawn as a bar from the minimum to the maximum pixels
+        per second of its normal frames, with a line showing the mean. Bins containing
+        noisy frames are drawn in the noisy frame colour.
 
-        lg.info(" *")
+        @param [in] xs The frame start times (relative to the hour) [s].
+        @param [in] hs The frame pixels per second.
+        @param [in] noisy Mask of the noisy frames.
+        @param [in] bin_width The width of the bins [s].
+        """
 
-    def save_plot(self, outputpath, name):
-        """ Saves the figure. """
+        ## The binned frame data.
+        bins = bin_frames(xs, hs, noisy, bin_width, int(np.ceil(self.__x_max / bin_width)))
 
-        # The PNG path (for HTML pages).
-        png_path = os.path.join(outputpath, "%s.png" % (name))
-        #
-        self.__plot.savefig(png_path)
+        ## The bin start times [s].
+        bin_xs = np.arange(len(bins["n_frames"])) * bin_width
 
-        ## The PostScript path (for publications).
-        ps_path = os.path.join(outputpath, "%s.ps" % (name))
-        #
-        self.__plot.savefig(ps_path)
+        ## Mask of the bins with normal frames.
+        has_normal = bins["n_frames"] > bins["n_noisy"]
+
+        ## Mask of the bins with noisy frames.
+        has_noisy = bins["n_noisy"] > 0
+
+        if np.any(has_normal):
+
+            ## The envelope (minimum to maximum) of the normal frames.
+            env = frame_collection(bin_xs[has_normal], np.full(np.count_nonzero(has_normal), bin_width), bins["max"][has_normal], "#44aa44", bins["min"][has_normal])
+            #
+            self.__data_artists.append(self.__plot_ax.add_collection(env, autolim=False))
+
+            ## The mean pixels per second (with gaps where there's no data).
+            means = np.ma.masked_where(~has_normal, bins["mean"])
+            #
+            self.__data_artists += self.__plot_ax.plot(bin_xs + 0.5 * bin_width, means, color="#226622", linewidth=0.5, drawstyle="steps-mid")
+
+        if np.any(has_noisy):
+
+            ## The noisy frames' bins.
+            nsy = frame_collection(bin_xs[has_noisy], np.full(np.count_nonzero(has_noisy), bin_width), bins["noisy_max"][has_noisy], "#882222")
+            #
+            self.__data_artists.append(self.__plot_ax.add_collection(nsy, autolim=False))
+
+    def save_plot(self, outputpath, name, formats=None):
+        """
+        Saves the figure.
+
+        @param [in] outputpath The directory to save the figure to.
+        @param [in] name The name of the figure (without the file extension).
+        @param [in] formats List of output formats (see OUTPUT_FORMATS).
+        """
 
-        print("* Saved figures '%s' and '%s'." % (png_path, ps_path))
-        lg.info("* Saved figures '%s' and '%s'." % (png_path, ps_path))
+        return save_figure(self.__plot, self.__profile, outputpath, name, formats)
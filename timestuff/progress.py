@@ -0,0 +1,227 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+
+CERN@school: Data Profiling - Time Stuff - Progress reporting.
+
+Long runs (condensing a ROOT file, rendering a run's plots) report their
+progress - the frames (or plots) done, the rate, the bytes read and the
+ETA - at most once every so many seconds, both to the screen and to a
+(JSON) status file that the pipeline or a daemon can poll.
+
+The reporter only looks at the clock when it's updated, and the per-frame
+loops only update it every PROGRESS_STRIDE frames, so the reporting costs
+well under 1% of the throughput.
+
+See http://cernatschool.web.cern.ch for more information.
+
+"""
+
+#...for the OS stuff.
+import os
+
+#...for the logging.
+import logging as lg
+
+# Import the JSON library.
+import json
+
+#...for the time (being).
+import time
+
+## The default time between progress reports [s].
+PROGRESS_INTERVAL = 10.0
+
+## The number of frames between progress updates in the per-frame loops.
+PROGRESS_STRIDE = 1000
+
+def format_eta(eta_s):
+    """ Format an ETA [s] as H:MM:SS ("?" if unknown). """
+
+    if eta_s is None:
+        return "?"
+
+    ## The ETA in whole seconds.
+    s = int(round(eta_s))
+
+    return "%d:%02d:%02d" % (s // 3600, (s // 60) % 60, s % 60)
+
+def write_status(statuspath, status):
+    """
+    Write a status file (replacing it in one go, so it's never read half written).
+
+    @param [in] statuspath The path of the status file.
+    @param [in] status Dictionary of the status.
+    """
+
+    ## The temporary file (one per process, so writers can't clash).
+    tmppath = statuspath + ".%d.tmp" % (os.getpid())
+
+    with open(tmppath, "w") as sf:
+        json.dump(status, sf, sort_keys=True)
+    #
+    os.rename(tmppath, statuspath)
+
+def read_status(statuspath):
+    """
+    Read a status file.
+
+    @param [in] statuspath The path of the status file.
+
+    @return Dictionary of the status (None if there isn't one yet).
+    """
+
+    if not os.path.exists(statuspath):
+        return None
+
+    with open(statuspath, "r") as sf:
+        return json.load(sf)
+
+class ProgressReporter:
+    """ Reports the progress of a long run, at most once every so many seconds. """
+
+    def __init__(self, name, unit="frames", interval=PROGRESS_INTERVAL, statuspath=None, verbose=True):
+        """
+        Constructor.
+
+        @param [in] name The name of the run (e.g. the input file).
+        @param [in] unit What's being counted (e.g. "frames" or "plots").
+        @param [in] interval The minimum time between reports [s].
+        @param [in] statuspath The path of the status file (None for no file).
+        @param [in] verbose Print the reports (as well as logging them)?
+        """
+
+        ## The name of the run.
+        self.__name = name
+
+        ## What's being counted.
+        self.__unit = unit
+
+        ## The minimum time between reports [s].
+        self.__interval = interval
+
+        ## The path of the status file.
+        self.__statuspath = statuspath
+
+        ## Print the reports?
+        self.__verbose = verbose
+
+        ## The total number of frames (or plots) to do (None if unknown).
+        self.__n_total = None
+
+        ## The start time [s].
+        self.__t0 = time.time()
+
+        ## The time of the next report [s].
+        self.__t_next = self.__t0 + interval
+
+    def start(self, n_total=None):
+        """
+        Start (or restart) the clock.
+
+        @param [in] n_total The total number of frames (or plots) to do (None if unknown).
+        """
+
+        self.__n_total = n_total
+
+        self.__t0 = time.time()
+        #
+        self.__t_next = self.__t0 + self.__interval
+
+        self.__report(0, 0, self.__t0, "running")
+
+    def update(self, n_done, n_bytes=0):
+        """
+        Update the progress, reporting it if it's time to.
+
+        @param [in] n_done The number of frames (or plots) done so far.
+        @param [in] n_bytes The number of bytes read so far.
+        """
+
+        ## The time now [s].
+        t = time.time()
+
+        if t >= self.__t_next:
+
+            self.__report(n_done, n_bytes, t, "running")
+
+            self.__t_next = t + self.__interval
+
+    def finish(self, n_done, n_bytes=0):
+        """
+        Report the final progress.
+
+        @param [in] n_done The number of frames (or plots) done.
+        @param [in] n_bytes The number of bytes read.
+
+        @return Dictionary of the final status.
+        """
+
+        return self.__report(n_done, n_bytes, time.time(), "done")
+
+    def getStatus(self, n_done, n_bytes, t, state):
+        """
+        Get the status of the run.
+
+        @return Dictionary of the status - the frames (or plots) done, the
+        total, the rate [/s], the bytes read, the elapsed time and ETA [s].
+        """
+
+        ## The time elapsed [s].
+        elapsed = t - self.__t0
+
+        ## The rate [/s].
+        rate = n_done / elapsed if elapsed > 0 else 0.0
+
+        ## The estimated time to go [s] (None if unknown).
+        eta = None
+        #
+        if state == "done":
+            eta = 0.0
+        elif self.__n_total is not None and rate > 0:
+            eta = max(0, self.__n_total - n_done) / rate
+
+        return {
+            "name"      : self.__name,
+            "unit"      : self.__unit,
+            "state"     : state,
+            "done"      : n_done,
+            "total"     : self.__n_total,
+            "rate"      : rate,
+            "bytes"     : n_bytes,
+            "elapsed_s" : elapsed,
+            "eta_s"     : eta,
+            "updated"   : t,
+            "pid"       : os.getpid(),
+            }
+
+    def __report(self, n_done, n_bytes, t, state):
+
+        ## The status.
+        status = self.getStatus(n_done, n_bytes, t, state)
+
+        ## The report line.
+        line = "%s: %d" % (self.__name, n_done)
+        #
+        if self.__n_total:
+            line += "/%d %s (%.1f%%)" % (self.__n_total, self.__unit, 100.0 * n_done / self.__n_total)
+        else:
+            line += " %s" % (self.__unit)
+        #
+        line += ", %.0f %s/s" % (status["rate"], self.__unit)
+        #
+        if n_bytes > 0:
+            line += ", %.1f MB read" % (n_bytes / 1.0e6)
+        #
+        line += ", %s %s" % ("done in" if state == "done" else "ETA", format_eta(status["elapsed_s"] if state == "done" else status["eta_s"]))
+
+        if self.__verbose:
+            print("* %s" % (line))
+
+        lg.info(" * %s" % (line))
+
+        if self.__statuspath is not None:
+            write_status(self.__statuspath, status)
+
+        return status
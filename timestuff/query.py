@@ -0,0 +1,293 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+
+CERN@school: Data Profiling - Time Stuff - Time range queries.
+
+Queries for the frames recorded by a chip in a time window. The files that
+can't overlap the window are skipped using the first and last times from
+the profile catalog (or the time index), and only the blocks of frames
+that overlap the window are read, using a time index of each condensed
+data file.
+
+See http://cernatschool.web.cern.ch for more information.
+
+"""
+
+#...for the OS stuff.
+import os, glob
+
+#...for the logging.
+import logging as lg
+
+#...for the time (being).
+import time, calendar
+
+#...for even more MATH.
+import numpy as np
+
+#...for reading the condensed frame data.
+from timestuff.rollup import FRAME_DTYPE, read_condensed
+
+#...for the dataset profiles and chip IDs.
+from timestuff.catalog import read_catalog, get_chip_id
+
+## The number of frames in each time index block.
+INDEX_BLOCK = 4096
+
+## The time index file extension (added to the condensed data file name).
+INDEX_EXTENSION = ".tidx.npz"
+
+## The time formats accepted for the query times (or seconds since the epoch).
+TIME_FORMATS = ["%Y-%m-%dT%H:%M:%S", "%Y-%m-%d %H:%M:%S", "%Y-%m-%d-%H%M%S", "%Y-%m-%d"]
+
+def parse_time(s):
+    """
+    Parse a query time (UTC) into seconds since the epoch.
+
+    @param [in] s The time - seconds since the epoch, or one of TIME_FORMATS.
+    """
+
+    if s.isdigit():
+        return int(s)
+
+    for fmt in TIME_FORMATS:
+        try:
+            return calendar.timegm(time.strptime(s, fmt))
+        except ValueError:
+            pass
+
+    raise IOError("* ERROR: can't parse the time '%s'!" % (s))
+
+def make_time_index(datapath, block=INDEX_BLOCK):
+    """
+    Make the time index of a condensed data file.
+
+    The index holds the earliest and latest start time of each block of
+    frames, so the frames don't need to be in time order.
+
+    @param [in] datapath The path to the condensed data file.
+    @param [in] block The number of frames in each block.
+
+    @return Dictionary of the index { "block", "mins", "maxs" }.
+    """
+
+    ## The frame start times.
+    sts = read_condensed(datapath)["start_time"]
+
+    ## The number of blocks.
+    n_blocks = (len(sts) + block - 1) // block
+
+    ## The start times padded out to whole blocks.
+    padded = np.empty(n_blocks * block, dtype=np.int64)
+    #
+    padded[:len(sts)] = sts
+
+    # Pad with the last start time so the padding doesn't change the ranges.
+    padded[len(sts):] = sts[-1] if len(sts) > 0 else 0
+
+    padded = padded.reshape(n_blocks, block)
+
+    return {"block":block, "mins":padded.min(axis=1), "maxs":padded.max(axis=1)}
+
+def get_time_index(datapath):
+    """
+    Get the time index of a condensed data file (making it if needed).
+
+    The index is written next to the data file, and remade if the data file
+    is newer than it.
+
+    @param [in] datapath The path to the condensed data file.
+    """
+
+    ## The path to the time index.
+    index_path = datapath + INDEX_EXTENSION
+
+    if os.path.exists(index_path) and os.path.getmtime(index_path) >= os.path.getmtime(datapath):
+        with np.load(index_path) as npz:
+            return {"block":int(npz["block"]), "mins":npz["mins"], "maxs":npz["maxs"]}
+
+    lg.info(" * Making the time index for '%s'." % (datapath))
+
+    ## The time index.
+    index = make_time_index(datapath)
+
+    with open(index_path, "wb") as xf:
+        np.savez(xf, **index)
+
+    return index
+
+class FrameQuery:
+    """ Time range queries over a directory of condensed data files. """
+
+    def __init__(self, datapath, catalogpath=None):
+        """
+        Constructor.
+
+        @param [in] datapath The directory of condensed data (.bin) files.
+        @param [in] catalogpath The path to the profile catalog (optional).
+        """
+
+        ## The condensed data files { run ID:path }.
+        self.__paths = {}
+        #
+        for bp in sorted(glob.glob(os.path.join(datapath, "*.bin"))):
+            self.__paths[os.path.basename(bp)[:-4]] = bp
+
+        ## The profiles of the datasets { run ID (file name stem):profile }.
+        self.__profiles = {}
+        #
+        if catalogpath is not None and os.path.exists(catalogpath):
+            for jd in read_catalog(catalogpath).values():
+                self.__profiles[os.path.splitext(jd["file_name"])[0]] = jd
+
+        lg.info(" * Frame query: %d file(s), %d with profiles." % (len(self.__paths), len([r for r in self.__paths if r in self.__profiles])))
+
+    def getChipId(self, run_id):
+        """ Get the chip ID of a run (None if unknown). """
+
+        if run_id in self.__profiles:
+            return self.__profiles[run_id]["chip_id"]
+
+        return get_chip_id(run_id)
+
+    def getTimeRange(self, run_id):
+        """ Get the first and last frame start times of a run [s]. """
+
+        if run_id in self.__profiles:
+
+            ## The run's profile.
+            jd = self.__profiles[run_id]
+
+            return jd["start_time_s"], int(np.ceil(jd["start_time_s"] + jd["Delta_T"]))
+
+        ## The run's time index.
+        index = get_time_index(self.__paths[run_id])
+
+        if len(index["mins"]) == 0:
+            return None, None
+
+        return int(index["mins"].min()), int(index["maxs"].max())
+
+    def getRuns(self, t_start, t_end, chip_id=None):
+        """
+        Get the runs that (may) have frames in the time window.
+
+        @param [in] t_start The start of the window [s] (inclusive).
+        @param [in] t_end The end of the window [s] (exclusive).
+        @param [in] chip_id The chip ID (None for all chips).
+        """
+
+        ## The runs overlapping the window.
+        runs = []
+
+        for run_id in sorted(self.__paths.keys()):
+
+            if chip_id is not None and self.getChipId(run_id) != chip_id:
+                continue
+
+            first, last = self.getTimeRange(run_id)
+
+            if first is None or last < t_start or first >= t_end:
+                continue
+
+            runs.append(run_id)
+
+        return runs
+
+    def iterFrames(self, t_start, t_end, chip_id=None):
+        """
+        Iterate over the frames in the time window, one array per read.
+
+        Only the blocks of each file that overlap the window are read.
+
+        @param [in] t_start The start of the window [s] (inclusive).
+        @param [in] t_end The end of the window [s] (exclusive).
+        @param [in] chip_id The chip ID (None for all chips).
+
+        @return Generator of (run ID, structured array of frames) pairs.
+        """
+
+        for run_id in self.getRuns(t_start, t_end, chip_id):
+
+            ## The run's time index.
+            index = get_time_index(self.__paths[run_id])
+
+            ## The overlapping blocks.
+            blocks = np.nonzero((index["maxs"] >= t_start) & (index["mins"] < t_end))[0]
+
+            if len(blocks) == 0:
+                continue
+
+            ## The breaks between runs of consecutive blocks.
+            breaks = np.nonzero(np.diff(blocks) > 1)[0]
+
+            # Read each run of consecutive blocks in one go.
+            for b0, b1 in zip(np.r_[blocks[0], blocks[breaks + 1]], np.r_[blocks[breaks], blocks[-1]]):
+
+                ## The frames in the blocks.
+                frames = read_condensed(self.__paths[run_id], int(b0) * index["block"], int(b1 - b0 + 1) * index["block"])
+
+                ## Mask of the frames in the window.
+                m = (frames["start_time"] >= t_start) & (frames["start_time"] < t_end)
+
+                if np.any(m):
+                    yield run_id, frames[m]
+
+    def getFrames(self, t_start, t_end, chip_id=None):
+        """
+        Get the frames in the time window (in file order).
+
+        @param [in] t_start The start of the window [s] (inclusive).
+        @param [in] t_end The end of the window [s] (exclusive).
+        @param [in] chip_id The chip ID (None for all chips).
+
+        @return A structured array of the frames (see rollup.FRAME_DTYPE).
+        """
+
+        ## The selected frames.
+        frames = [f for run_id, f in self.iterFrames(t_start, t_end, chip_id)]
+
+        if len(frames) == 0:
+            return np.zeros(0, dtype=FRAME_DTYPE)
+
+        return np.concatenate(frames)
+
+    def getTotals(self, t_start, t_end, chip_id=None):
+        """
+        Get the totals for the frames in the time window.
+
+        @param [in] t_start The start of the window [s] (inclusive).
+        @param [in] t_end The end of the window [s] (exclusive).
+        @param [in] chip_id The chip ID (None for all chips).
+
+        @return Dictionary of the number of runs, frames and noisy frames,
+        and the number of pixels and live time of the normal frames (as
+        per rollup.make_rollup).
+        """
+
+        ## The totals.
+        totals = {"runs":0, "frames":0, "noisy":0, "pixels":0, "live_time":0.0}
+
+        ## The runs with frames in the window.
+        runs = set()
+
+        for run_id, frames in self.iterFrames(t_start, t_end, chip_id):
+
+            runs.add(run_id)
+
+            ## The number of pixels in each frame.
+            nps = frames["n_pixels"].astype(np.int64)
+
+            ## Mask of the noisy frames (as per HourPlot).
+            noisy = nps > 30000
+
+            totals["frames"]    += len(frames)
+            totals["noisy"]     += int(noisy.sum())
+            totals["pixels"]    += int(nps[~noisy].sum())
+            totals["live_time"] += float(np.power(10.0, frames["acq_code"][~noisy]).sum())
+
+        totals["runs"] = len(runs)
+
+        return totals
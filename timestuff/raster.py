@@ -0,0 +1,252 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+
+CERN@school: Data Profiling - Time Stuff - Direct hour strip rasterizer.
+
+The hour strips are simple (time on x, pixels per second as the bar
+height, two colours), so the bars can be filled straight into a pixel
+buffer with NumPy. The axes, labels, ticks and gridlines are drawn once
+by matplotlib (see HourPlot) and reused as a template.
+
+See http://cernatschool.web.cern.ch for more information.
+
+"""
+
+#...for the OS stuff.
+import os
+
+#...for the logging.
+import logging as lg
+
+#...for writing the PNG files.
+import struct, zlib
+
+#...for even more MATH.
+import numpy as np
+
+#...for the default patch styling.
+from matplotlib import rcParams
+
+#...for the template (axes, labels, ticks and gridlines).
+from timestuff.plots import HourPlot, frame_arrays, render_profile
+
+## The "normal" frame colour (RGBA).
+NORMAL_COLOR = (0x44, 0xaa, 0x44, 0xff)
+
+## The noisy frame colour (RGBA).
+NOISY_COLOR = (0x88, 0x22, 0x22, 0xff)
+
+def pack_color(color):
+    """ Pack an RGBA colour into a single (native byte order) uint32. """
+
+    return np.array(color, dtype=np.uint8).view(np.uint32)[0]
+
+def write_png(path, image, level=1):
+    """
+    Write an RGBA image to a PNG file.
+
+    @param [in] path The path of the PNG file.
+    @param [in] image The image - a (height, width, 4) array of uint8.
+    @param [in] level The zlib compression level (speed over size).
+    """
+
+    height, width = image.shape[0], image.shape[1]
+
+    ## The image rows.
+    rows = image.reshape(height, width * 4)
+
+    ## The raw image data - each row is preceded by its filter type.
+    #
+    # We use the "Up" filter (the difference from the row above): the bars
+    # are vertical, so most of each row is zeros and compresses quickly.
+    raw = np.full((height, 1 + width * 4), 2, dtype=np.uint8)
+    #
+    raw[0, 1:] = rows[0]
+    #
+    raw[1:, 1:] = rows[1:] - rows[:-1]
+
+    def chunk(tag, data):
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xffffffff)
+
+    with open(path, "wb") as pf:
+        pf.write(b"\x89PNG\r\n\x1a\n")
+        pf.write(chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0)))
+        pf.write(chunk(b"IDAT", zlib.compress(raw.tobytes(), level)))
+        pf.write(chunk(b"IEND", b""))
+
+def column_heights(c0s, c1s, hs, width):
+    """
+    Get the maximum bar height in each pixel column.
+
+    @param [in] c0s The first pixel column of each bar.
+    @param [in] c1s The pixel column after the last column of each bar.
+    @param [in] hs The height of each bar [pixels].
+    @param [in] width The number of pixel columns.
+    """
+
+    ## The maximum bar height in each column.
+    col_hs = np.zeros(width)
+
+    if len(hs) == 0:
+        return col_hs
+
+    ## The number of columns covered by each bar.
+    n_cols = c1s - c0s
+
+    ## The column index of each (bar, column) pair.
+    cols = np.repeat(c0s, n_cols) + (np.arange(n_cols.sum()) - np.repeat(np.cumsum(n_cols) - n_cols, n_cols))
+
+    np.maximum.at(col_hs, cols, np.repeat(hs, n_cols))
+
+    return col_hs
+
+class HourRaster:
+    """ Wrapper class for the directly rasterized hourly plots. """
+
+    def __init__(self, data_hour=None, **kwargs):
+        """
+        Constructor.
+
+        @param [in] data_hour DataHour object for the hour to plot.
+        """
+
+        lg.info(" *")
+        lg.info(" * Initialising HourRaster object...")
+
+        ## The keyword arguments for the (matplotlib) template.
+        self.__template_kwargs = dict((k, v) for k, v in kwargs.items() if k not in ["y_max", "lod"])
+
+        ## Dictionary of the templates { y max:(image, axes box, overlay mask) }.
+        self.__templates = {}
+
+        ## The rasterized image.
+        self.__image = None
+
+        if data_hour is not None:
+            self.update(data_hour, **kwargs)
+
+    def __getTemplate(self, y_max):
+        """ Get (or render) the template for the y axis maximum. """
+
+        if y_max not in self.__templates:
+
+            lg.info(" * Rendering the hour strip template (y max = %f)." % (y_max))
+
+            ## The (empty) matplotlib plot.
+            p = HourPlot(**self.__template_kwargs)
+            #
+            p.getAxes().set_ylim([0.0, y_max])
+
+            with render_profile(p.getProfile()):
+                p.getFigure().canvas.draw()
+
+            ## The rendered template image (RGBA, one uint32 per pixel).
+            image = np.ascontiguousarray(np.asarray(p.getFigure().canvas.buffer_rgba())).view(np.uint32)[:, :, 0]
+
+            ## The axes box in display coordinates (origin at the bottom left).
+            bb = p.getAxes().get_window_extent()
+
+            ## The axes box as image rows and columns (inside the spines).
+            box = (int(round(image.shape[0] - bb.y1)) + 1, int(round(image.shape[0] - bb.y0)), int(round(bb.x0)) + 1, int(round(bb.x1)))
+
+            r0, r1, c0, c1 = box
+
+            ## The axes background colour.
+            bg = pack_color(np.round(np.array(p.getAxes().get_facecolor()) * 255))
+
+            ## Mask of the template pixels drawn over the bars (gridlines).
+            overlay = image[r0:r1, c0:c1] != bg
+
+            self.__templates[y_max] = (image, box, overlay)
+
+        return self.__templates[y_max]
+
+    def update(self, data_hour, **kwargs):
+        """
+        Rasterize the supplied hour's data.
+
+        @param [in] data_hour DataHour object for the hour to plot.
+        """
+
+        ## The frame bars and the mask of the noisy frames.
+        xs, ws, hs, noisy = frame_arrays(data_hour)
+
+        # The y axis maximum - as per HourPlot.
+        if "y_max" in kwargs.keys():
+            y_max = kwargs["y_max"]
+        else:
+            y_max = 1.0
+            #
+            if np.any(~noisy):
+                y_max = max(y_max, hs[~noisy].max())
+            #
+            # Round up to the nearest 10.
+            y_max = 10 * (np.floor(y_max/10.) + 1)
+
+        ## The x axis maximum.
+        x_max = 3600.0
+        #
+        if "x_max" in kwargs.keys():
+            x_max = kwargs["x_max"]
+
+        template, (r0, r1, c0, c1), overlay = self.__getTemplate(float(y_max))
+
+        ## The size of the data area [pixels].
+        height, width = r1 - r0, c1 - c0
+
+        ## Half the width of the bar edges (as drawn by HourPlot) [pixels].
+        pad = int(round(rcParams["patch.linewidth"] * 150.0 / 72.0 / 2.0))
+
+        # Convert the bars to pixel columns (at least one wide) and heights.
+        c0s = np.clip(np.floor(xs * width / x_max) - pad, 0, width).astype(int)
+        c1s = np.clip(np.maximum(np.ceil((xs + ws) * width / x_max), c0s + 1) + pad, 0, width).astype(int)
+        #
+        phs = np.round(hs * height / y_max)
+
+        ## The template's data area (top row first).
+        area = template[r0:r1, c0:c1]
+
+        ## The pixel row heights (measured from the bottom of the area).
+        row_hs = np.arange(height, 0, -1).reshape(height, 1)
+
+        ## The rasterized data area.
+        #
+        # The normal frames, then the noisy frames on top.
+        raster = area
+        #
+        for mask, color in [(~noisy, NORMAL_COLOR), (noisy, NOISY_COLOR)]:
+            raster = np.where(row_hs <= column_heights(c0s[mask], c1s[mask], phs[mask], width), pack_color(color), raster)
+
+        # Put the gridlines back on top.
+        raster = np.where(overlay, area, raster)
+
+        ## The rasterized image (one uint32 per pixel).
+        image = template.copy()
+        #
+        image[r0:r1, c0:c1] = raster
+
+        self.__image = image.view(np.uint8).reshape(image.shape[0], image.shape[1], 4)
+
+    def save_plot(self, outputpath, name, formats=None):
+        """
+        Saves the rasterized image (PNG only).
+
+        @param [in] outputpath The directory to save the image to.
+        @param [in] name The name of the image (without the file extension).
+        @param [in] formats List of output formats (PNG only).
+        """
+
+        if formats is not None and list(formats) != ["png"]:
+            raise IOError("* ERROR: the hour strip rasterizer only writes PNG files!")
+
+        ## The PNG path (for HTML pages).
+        png_path = os.path.join(outputpath, "%s.png" % (name))
+        #
+        write_png(png_path, self.__image)
+
+        print("* Saved figure '%s'." % (png_path))
+        lg.info("* Saved figure '%s'." % (png_path))
+
+        return [png_path]
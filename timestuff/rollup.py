@@ -0,0 +1,212 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+
+CERN@school: Data Profiling - Time Stuff - Rollup aggregates.
+
+The condensed frame data (see condense-time-info.py) is rolled up into
+fixed-size time bins at the month, day, hour and minute zoom levels.
+
+See http://cernatschool.web.cern.ch for more information.
+
+"""
+
+#...for the time (being).
+import time, calendar
+
+#...for even more MATH.
+import numpy as np
+
+#...for the run metrics.
+from timestuff.metrics import timed, add_count
+
+## The condensed frame record - start time [s], log10(acq. time), pixels.
+#
+# This matches the struct format "IhH" used by condense-time-info.py.
+FRAME_DTYPE = np.dtype([("start_time", "<u4"), ("acq_code", "<i2"), ("n_pixels", "<u2")])
+
+## The zoom levels (coarsest first).
+ROLLUP_LEVELS = ["month", "day", "hour", "minute"]
+
+## The time formats of the period keys at each zoom level.
+KEY_FORMATS = {
+    "month"  : "%Y-%m",
+    "day"    : "%Y-%m-%d",
+    "hour"   : "%Y-%m-%d-%H",
+    "minute" : "%Y-%m-%d-%H%M",
+    }
+
+## The lengths of the (fixed length) periods at each zoom level [s].
+PERIOD_LENGTHS = {
+    "day"    : 60 * 60 * 24,
+    "hour"   : 60 * 60,
+    "minute" : 60,
+    }
+
+## The number of time bins in each period (i.e. the tile width in pixels).
+ROLLUP_BINS = 256
+
+def read_condensed(datapath, start_frame=0, n_frames=-1):
+    """
+    Read the frames from a condensed (binary) data file.
+
+    @param [in] datapath The path to the condensed data file.
+    @param [in] start_frame The first frame to read.
+    @param [in] n_frames The number of frames to read (-1 for all).
+
+    @return A structured array of the frames (see FRAME_DTYPE).
+    """
+
+    with timed("read"), open(datapath, "rb") as bf:
+
+        bf.seek(start_frame * FRAME_DTYPE.itemsize)
+
+        ## The frames.
+        frames = np.fromfile(bf, dtype=FRAME_DTYPE, count=n_frames)
+
+    add_count("frames_read", len(frames))
+    #
+    add_count("bytes_read", frames.nbytes)
+
+    return frames
+
+def get_period_starts(level, start_times):
+    """
+    Get the start time of the period containing each start time.
+
+    @param [in] level The zoom level (see ROLLUP_LEVELS).
+    @param [in] start_times Array of start times [s].
+    """
+
+    start_times = np.asarray(start_times, dtype=np.int64)
+
+    if level in PERIOD_LENGTHS:
+        return start_times - (start_times % PERIOD_LENGTHS[level])
+
+    # Months aren't all the same length - use the calendar.
+    return np.array([calendar.timegm(time.gmtime(st)[:2] + (1, 0, 0, 0)) for st in start_times], dtype=np.int64)
+
+def get_period_end(level, period_start):
+    """
+    Get the end time (the start of the next period) of a period [s].
+
+    @param [in] level The zoom level (see ROLLUP_LEVELS).
+    @param [in] period_start The start time of the period [s].
+    """
+
+    if level in PERIOD_LENGTHS:
+        return period_start + PERIOD_LENGTHS[level]
+
+    ## The period's year and month.
+    y, m = time.gmtime(period_start)[:2]
+
+    return calendar.timegm((y + m // 12, m % 12 + 1, 1, 0, 0, 0))
+
+def get_period_key(level, period_start):
+    """
+    Get the key (e.g. "2012-09-01-13" for an hour) of a period.
+
+    @param [in] level The zoom level (see ROLLUP_LEVELS).
+    @param [in] period_start The start time of the period [s].
+    """
+
+    return time.strftime(KEY_FORMATS[level], time.gmtime(period_start))
+
+def make_rollup(frames, level, n_bins=ROLLUP_BINS):
+    """
+    Roll the frames up into the periods (with data) at a zoom level.
+
+    @param [in] frames Structured array of frames (see FRAME_DTYPE).
+    @param [in] level The zoom level (see ROLLUP_LEVELS).
+    @param [in] n_bins The number of time bins in each period.
+
+    @return Dictionary of the periods { key:period }. Each period is a
+    dictionary of its start and end times and arrays (one entry per time
+    bin) of the number of frames ("frames") and noisy frames ("noisy"),
+    and the number of pixels ("pixels") and the live (acquisition) time
+    ("live_time") of the normal frames.
+    """
+
+    ## The rollup { key:period }.
+    rollup = {}
+
+    if len(frames) == 0:
+        return rollup
+
+    ## The frame start times [s].
+    sts = frames["start_time"].astype(np.int64)
+
+    ## The frame acquisition times [s].
+    ats = np.power(10.0, frames["acq_code"])
+
+    ## The number of pixels in each frame.
+    nps = frames["n_pixels"].astype(np.float64)
+
+    ## Mask of the noisy frames (as per HourPlot).
+    noisy = nps > 30000
+
+    ## The period start of each frame.
+    if level in PERIOD_LENGTHS:
+        period_starts = sts - (sts % PERIOD_LENGTHS[level])
+    else:
+        # Months aren't all the same length - look up each distinct day.
+        days, day_idx = np.unique(sts - (sts % PERIOD_LENGTHS["day"]), return_inverse=True)
+        #
+        period_starts = get_period_starts(level, days)[day_idx]
+
+    ## The frames sorted by period.
+    order = np.argsort(period_starts, kind="mergesort")
+
+    ## The periods with data and the index of their first (sorted) frame.
+    pss, firsts = np.unique(period_starts[order], return_index=True)
+
+    for ps, i0, i1 in zip(pss, firsts, list(firsts[1:]) + [len(order)]):
+
+        ## The end of the period (the start of the next one).
+        pe = get_period_end(level, int(ps))
+
+        ## The indices of the frames in the period.
+        m = order[i0:i1]
+
+        ## The time bin of each frame in the period.
+        b = np.clip(((sts[m] - ps) * n_bins) // (pe - ps), 0, n_bins - 1)
+
+        ## Mask of the normal frames in the period.
+        normal = ~noisy[m]
+
+        ## The period's rollup.
+        period = {
+            "start_time" : int(ps),
+            "end_time"   : int(pe),
+            "frames"     : np.bincount(b, minlength=n_bins),
+            "noisy"      : np.bincount(b[~normal], minlength=n_bins),
+            "pixels"     : np.bincount(b[normal], weights=nps[m][normal], minlength=n_bins),
+            "live_time"  : np.bincount(b[normal], weights=ats[m][normal], minlength=n_bins),
+            }
+
+        rollup[get_period_key(level, int(ps))] = period
+
+    return rollup
+
+def get_rollup_summary(rollup):
+    """
+    Get the JSON-friendly totals of each period in a rollup.
+
+    @param [in] rollup Dictionary of the periods (see make_rollup).
+    """
+
+    ## The summary { key:totals }.
+    summary = {}
+
+    for key, period in rollup.items():
+        summary[key] = {
+            "start_time" : period["start_time"],
+            "end_time"   : period["end_time"],
+            "frames"     : int(period["frames"].sum()),
+            "noisy"      : int(period["noisy"].sum()),
+            "pixels"     : int(period["pixels"].sum()),
+            "live_time"  : float(period["live_time"].sum()),
+            }
+
+    return summary
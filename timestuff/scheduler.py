@@ -0,0 +1,295 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+
+CERN@school: Data Profiling - Time Stuff - Plot rendering scheduler.
+
+See http://cernatschool.web.cern.ch for more information.
+
+"""
+
+#...for the OS stuff.
+import os, glob
+
+#...for the logging.
+import logging as lg
+
+#...for storing the deferred plot jobs.
+import pickle
+
+#...for naming the deferred plot jobs.
+import hashlib
+
+#...for the worker processes.
+import multiprocessing
+
+#...for passing options to the workers.
+from functools import partial
+
+#...for the plots to render.
+from timestuff.plots import MonthPlot, HourPlot, DEFAULT_FORMATS
+
+#...for the directly rasterized hour strips.
+from timestuff.raster import HourRaster
+
+#...for skipping unchanged plots.
+from timestuff.cache import RenderCache, get_plot_job_key
+
+## Dictionary of the plot classes { plot type:class }.
+PLOT_TYPES = {
+    "month" : MonthPlot,
+    "hour"  : HourPlot,
+    "hour_raster" : HourRaster,
+    }
+
+## The plot types to use for the publication (deferred) formats.
+PUBLICATION_TYPES = {
+    "hour_raster" : "hour",
+    }
+
+## The plot keyword arguments that define the static figure (scaffold).
+TEMPLATE_KWARGS = ["profile", "fig_width", "fig_height", "x_label", "y_label", "x_max"]
+
+## The (per-process) cache of plot templates { template key:plot object }.
+_templates = {}
+
+def get_plot_template(plot_type, **kwargs):
+    """
+    Get the plot template for the plot type and static keyword arguments.
+
+    The template's figure, axes, labels and gridlines are built once per
+    process; only the data artists and limits are swapped for each plot.
+
+    @param [in] plot_type The type of plot ("month" or "hour").
+    @param [in] kwargs The keyword arguments for the plot.
+    """
+
+    ## The template key - the plot type and the static keyword arguments.
+    key = (plot_type,) + tuple((k, kwargs[k]) for k in TEMPLATE_KWARGS if k in kwargs)
+
+    if key not in _templates:
+        lg.info(" * Building a new '%s' plot template." % (plot_type))
+        _templates[key] = PLOT_TYPES[plot_type](**dict(key[1:]))
+
+    return _templates[key]
+
+def make_plot_job(plot_type, data, outputpath, name, formats=None, **kwargs):
+    """
+    Make a plot job - an independent unit of work for a worker process.
+
+    @param [in] plot_type The type of plot ("month", "hour" or "hour_raster").
+    @param [in] data The data slice to plot (DataMonth or DataHour object).
+    @param [in] outputpath The directory to save the plot to.
+    @param [in] name The name of the plot (without the file extension).
+    @param [in] formats List of output formats (None for DEFAULT_FORMATS).
+    @param [in] kwargs The keyword arguments for the plot constructor.
+    """
+
+    if plot_type not in PLOT_TYPES:
+        raise IOError("* ERROR: unknown plot type '%s'!" % (plot_type))
+
+    if formats is None:
+        formats = DEFAULT_FORMATS
+
+    return {
+        "plot_type"   : plot_type,
+        "data"        : data,
+        "output_path" : outputpath,
+        "name"        : name,
+        "formats"     : formats,
+        "kwargs"      : kwargs,
+        }
+
+def render_plot_job(job, use_templates=True):
+    """
+    Render and save a single plot job.
+
+    @param [in] job The plot job dictionary (see make_plot_job).
+    @param [in] use_templates Reuse the static figure for each plot type?
+    """
+
+    if use_templates:
+        ## The plot object - a (re)used template.
+        p = get_plot_template(job["plot_type"], **job["kwargs"])
+        #
+        # Swap in the job's data.
+        p.update(job["data"], **job["kwargs"])
+    else:
+        p = PLOT_TYPES[job["plot_type"]](job["data"], **job["kwargs"])
+
+    # Save the plot.
+    p.save_plot(job["output_path"], job["name"], job["formats"])
+
+    return job["name"]
+
+def render_plot_jobs(jobs, processes=None, use_templates=True, use_cache=True, progress=None):
+    """
+    Render the supplied plot jobs across a pool of worker processes.
+
+    @param [in] jobs List of plot job dictionaries.
+    @param [in] processes The number of worker processes (None for all cores).
+    @param [in] use_templates Reuse the static figure for each plot type?
+    @param [in] use_cache Skip plots whose data and options haven't changed?
+    @param [in] progress The ProgressReporter to update as each plot is done (None for none).
+
+    @return A list of the names of the rendered plots.
+    """
+
+    if use_cache:
+
+        ## The render cache.
+        cache = RenderCache()
+
+        ## The keys of the plot jobs.
+        keys = [get_plot_job_key(job) for job in jobs]
+
+        ## The plot jobs (and keys) that need rendering.
+        todo = [(job, key) for job, key in zip(jobs, keys) if not cache.isCached(job, key)]
+
+        lg.info(" * Render cache: %d of %d plot(s) unchanged." % (len(jobs) - len(todo), len(jobs)))
+
+        ## The names of the rendered plots.
+        names = render_plot_jobs([job for job, key in todo], processes, use_templates, False, progress)
+
+        # Record the newly rendered plots.
+        for job, key in todo:
+            cache.add(job, key)
+        #
+        cache.save()
+
+        return names
+
+    if len(jobs) == 0:
+        return []
+
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+
+    # Don't start more workers than there are jobs.
+    processes = max(1, min(processes, len(jobs)))
+
+    lg.info(" * Rendering %d plot(s) with %d process(es)." % (len(jobs), processes))
+
+    if progress is not None:
+        progress.start(len(jobs))
+
+    # Render in-process if there's nothing to gain from a pool.
+    if processes == 1:
+
+        ## The names of the rendered plots.
+        names = []
+        #
+        for job in jobs:
+
+            names.append(render_plot_job(job, use_templates))
+
+            if progress is not None:
+                progress.update(len(names))
+
+    else:
+
+        ## The pool of worker processes.
+        pool = multiprocessing.Pool(processes)
+        #
+        try:
+            ## The names of the rendered plots.
+            names = []
+
+            # One job per task - plots vary a lot in their rendering cost.
+            for name in pool.imap(partial(render_plot_job, use_templates=use_templates), jobs, chunksize=1):
+
+                names.append(name)
+
+                if progress is not None:
+                    progress.update(len(names))
+        finally:
+            pool.close()
+            pool.join()
+
+    if progress is not None:
+        progress.finish(len(names))
+
+    return names
+
+def defer_plot_jobs(jobs, queuepath, formats, profile="publication"):
+    """
+    Add plot jobs to the deferred queue, to be rendered later.
+
+    The plot data and keyword arguments are stored in the queue directory,
+    so the (slow, large) publication formats can be rendered on demand
+    with render_deferred_plot_jobs.
+
+    @param [in] jobs List of plot job dictionaries.
+    @param [in] queuepath The deferred queue directory.
+    @param [in] formats List of output formats to render later.
+    @param [in] profile The render profile to render them with.
+
+    @return A list of the paths of the queued jobs.
+    """
+
+    if not os.path.isdir(queuepath):
+        os.makedirs(queuepath)
+
+    ## The paths of the queued jobs.
+    queued = []
+
+    for job in jobs:
+
+        ## The deferred job - the same plot, in the deferred formats.
+        deferred_job = dict(job)
+        #
+        deferred_job["plot_type"] = PUBLICATION_TYPES.get(job["plot_type"], job["plot_type"])
+        #
+        deferred_job["formats"] = list(formats)
+        #
+        deferred_job["kwargs"] = dict(job["kwargs"], profile=profile)
+
+        ## The job's ID (unique to the plot's output path and name).
+        job_id = hashlib.sha1(("%s/%s" % (job["output_path"], job["name"])).encode("utf-8")).hexdigest()
+
+        ## The path of the queued job.
+        job_path = os.path.join(queuepath, "%s_%s.pkl" % (job["plot_type"], job_id))
+        #
+        with open(job_path, "wb") as qf:
+            pickle.dump(deferred_job, qf, pickle.HIGHEST_PROTOCOL)
+
+        queued.append(job_path)
+
+    lg.info(" * Deferred %d plot(s) (%s) to '%s'." % (len(queued), ", ".join(formats), queuepath))
+
+    return queued
+
+def render_deferred_plot_jobs(queuepath, processes=None, use_templates=True):
+    """
+    Render (and remove) the plot jobs waiting in the deferred queue.
+
+    @param [in] queuepath The deferred queue directory.
+    @param [in] processes The number of worker processes (None for all cores).
+    @param [in] use_templates Reuse the static figure for each plot type?
+
+    @return A list of the names of the rendered plots.
+    """
+
+    ## The paths of the queued jobs.
+    job_paths = sorted(glob.glob(os.path.join(queuepath, "*.pkl")))
+
+    ## The queued jobs.
+    jobs = []
+    #
+    for job_path in job_paths:
+        with open(job_path, "rb") as qf:
+            jobs.append(pickle.load(qf))
+
+    if len(jobs) == 0:
+        lg.info(" * No deferred plots found in '%s'." % (queuepath))
+        return []
+
+    ## The names of the rendered plots.
+    names = render_plot_jobs(jobs, processes, use_templates, False)
+
+    # Only remove the jobs once they've all been rendered.
+    for job_path in job_paths:
+        os.remove(job_path)
+
+    return names
@@ -0,0 +1,523 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+
+CERN@school: Data Profiling - Time Stuff - Local profile service.
+
+A small HTTP server that serves the profile table, the rollup summaries
+and month and hour plots rendered on demand from the condensed data. The
+plots are content-addressed (see cache.get_plot_job_key), so they are kept
+in an in-memory LRU cache and on disk (where the least recently used are
+removed once the plots take up too much space), and only rendered the
+first time that someone asks for them.
+
+See http://cernatschool.web.cern.ch for more information.
+
+"""
+
+#...for the OS stuff.
+import os, glob
+
+#...for the logging.
+import logging as lg
+
+# Import the JSON library.
+import json
+
+#...for the threads.
+import threading
+
+#...for the worker processes.
+import multiprocessing
+
+#...for the LRU cache.
+from collections import OrderedDict
+
+#...for the HTTP server.
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+    from urllib.parse import urlparse, parse_qs
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+    from urlparse import urlparse, parse_qs
+
+#...for the time (being).
+import time, calendar
+
+#...for the data wrappers.
+from timestuff.wrappers import DataMonth, DataHour
+
+#...for the plot rendering.
+from timestuff.scheduler import make_plot_job, render_plot_job
+
+#...for the plot keys.
+from timestuff.cache import get_plot_job_key
+
+#...for the time range queries.
+from timestuff.query import FrameQuery
+
+#...for the rollups.
+from timestuff.rollup import ROLLUP_LEVELS, get_period_end, make_rollup, get_rollup_summary
+
+#...for the profile catalog.
+from timestuff.catalog import read_catalog
+
+#...for the plot options.
+from timestuff.stages import MONTH_PLOT_KWARGS, HOUR_PLOT_KWARGS
+
+#...for the profile page.
+from helpers import make_profile_page
+
+class LRUCache:
+    """ A (thread-safe) least recently used cache, limited by size. """
+
+    def __init__(self, max_bytes):
+        """
+        Constructor.
+
+        @param [in] max_bytes The maximum total size of the cached values [B].
+        """
+
+        ## The maximum total size of the cached values [B].
+        self.__max_bytes = max_bytes
+
+        ## The cached values { key:value }, least recently used first.
+        self.__values = OrderedDict()
+
+        ## The total size of the cached values [B].
+        self.__n_bytes = 0
+
+        ## The lock.
+        self.__lock = threading.Lock()
+
+    def get(self, key):
+        """ Get a cached value (None if it isn't cached). """
+
+        with self.__lock:
+
+            if key not in self.__values:
+                return None
+
+            ## The value (moved to the most recently used end).
+            value = self.__values.pop(key)
+            #
+            self.__values[key] = value
+
+            return value
+
+    def put(self, key, value):
+        """ Cache a value (bytes or a string), evicting the least recently used. """
+
+        with self.__lock:
+
+            if key in self.__values:
+                self.__n_bytes -= len(self.__values.pop(key))
+
+            self.__values[key] = value
+            #
+            self.__n_bytes += len(value)
+
+            while self.__n_bytes > self.__max_bytes and len(self.__values) > 1:
+                self.__n_bytes -= len(self.__values.popitem(last=False)[1])
+
+class ProfileService:
+    """ The profiles, rollups and plots served by the profile server. """
+
+    def __init__(self, datapath, cachepath, catalogpath=None, processes=None, max_bytes=64*1024*1024, max_disk_bytes=1024*1024*1024):
+        """
+        Constructor.
+
+        @param [in] datapath The directory of condensed data (.bin) files.
+        @param [in] cachepath The directory for the rendered plots.
+        @param [in] catalogpath The path to the profile catalog (optional).
+        @param [in] processes The number of rendering processes (None for all cores).
+        @param [in] max_bytes The size of the in-memory cache [B].
+        @param [in] max_disk_bytes The size of the disk cache (the rendered plots) [B].
+        """
+
+        ## The directory of condensed data files.
+        self.__datapath = datapath
+
+        ## The directory for the rendered plots.
+        self.__cachepath = cachepath
+        #
+        if not os.path.isdir(cachepath):
+            os.makedirs(cachepath)
+
+        ## The path to the profile catalog.
+        self.__catalogpath = catalogpath
+
+        ## The in-memory cache.
+        self.__cache = LRUCache(max_bytes)
+
+        ## The maximum total size of the rendered plots [B].
+        self.__max_disk_bytes = max_disk_bytes
+
+        ## The lock for the disk cache.
+        self.__disk_lock = threading.Lock()
+        #
+        # Remove any plots left half rendered (by a service that was killed).
+        for tmp_path in glob.glob(os.path.join(cachepath, "*.tmp.png")):
+            os.remove(tmp_path)
+        #
+        self.trimDiskCache()
+
+        ## The time range query (and the state of the data it was made from).
+        self.__query, self.__version = None, None
+
+        ## The lock for the query.
+        self.__lock = threading.Lock()
+
+        ## The plots being rendered { key:event set when it's done } (so each is only rendered once).
+        self.__renders = {}
+
+        ## The lock for the plots being rendered.
+        self.__render_lock = threading.Lock()
+
+        ## The pool of rendering processes.
+        #
+        # matplotlib's rc settings (see plots.render_profile) and the plot
+        # templates aren't thread-safe, so each plot is rendered in a worker.
+        self.__pool = multiprocessing.Pool(processes)
+
+    def close(self):
+        """ Shut down the rendering processes. """
+
+        self.__pool.close()
+        self.__pool.join()
+
+    def getVersion(self):
+        """ Get the state (names, sizes and mtimes) of the data files. """
+
+        ## The data files.
+        paths = sorted(glob.glob(os.path.join(self.__datapath, "*.bin")))
+        #
+        if self.__catalogpath is not None and os.path.exists(self.__catalogpath):
+            paths.append(self.__catalogpath)
+
+        return tuple((p, os.path.getsize(p), os.path.getmtime(p)) for p in paths)
+
+    def getQuery(self):
+        """ Get the time range query (remade if the data files have changed). """
+
+        ## The state of the data files.
+        version = self.getVersion()
+
+        with self.__lock:
+
+            if version != self.__version:
+
+                lg.info(" * Profile service: (re)loading the data from '%s'." % (self.__datapath))
+
+                self.__query, self.__version = FrameQuery(self.__datapath, self.__catalogpath), version
+
+            return self.__query, self.__version
+
+    def getProfilePage(self):
+        """ Get the profile table page (HTML). """
+
+        if self.__catalogpath is None or not os.path.exists(self.__catalogpath):
+            raise IOError("* ERROR: no profile catalog!")
+
+        ## The cache key.
+        key = ("profiles", os.path.getmtime(self.__catalogpath))
+
+        ## The page.
+        page = self.__cache.get(key)
+        #
+        if page is None:
+            page = make_profile_page(read_catalog(self.__catalogpath)).encode("utf-8")
+            #
+            self.__cache.put(key, page)
+
+        return page
+
+    def getRollupSummary(self, level, chip_id=None):
+        """
+        Get the rollup summary of all of the data at a zoom level (JSON).
+
+        @param [in] level The zoom level (see rollup.ROLLUP_LEVELS).
+        @param [in] chip_id The chip ID (None for all chips).
+        """
+
+        if level not in ROLLUP_LEVELS:
+            raise IOError("* ERROR: unknown zoom level '%s'!" % (level))
+
+        query, version = self.getQuery()
+
+        ## The cache key.
+        key = ("rollup", level, chip_id, version)
+
+        ## The summary (as JSON).
+        summary_json = self.__cache.get(key)
+        #
+        if summary_json is None:
+
+            ## The summary { key:totals }.
+            summary = {}
+
+            # Roll up a block of frames at a time (so the frames needn't all
+            # be in memory at once).
+            for run_id, frames in query.iterFrames(0, 2**32, chip_id):
+                for period_key, totals in get_rollup_summary(make_rollup(frames, level)).items():
+
+                    if period_key not in summary:
+                        summary[period_key] = totals
+                        continue
+
+                    for k in ["frames", "noisy", "pixels", "live_time"]:
+                        summary[period_key][k] += totals[k]
+
+            summary_json = json.dumps(summary, sort_keys=True).encode("utf-8")
+            #
+            self.__cache.put(key, summary_json)
+
+        return summary_json
+
+    def getPlot(self, job):
+        """
+        Get a plot (PNG), rendering it if it isn't cached.
+
+        @param [in] job The plot job dictionary (see scheduler.make_plot_job).
+        """
+
+        ## The plot's (content-addressed) key.
+        key = get_plot_job_key(job)
+
+        while True:
+
+            ## The plot.
+            png = self.__cache.get(key)
+            #
+            if png is not None:
+                return png
+
+            with self.__render_lock:
+
+                ## The event set when the plot's done (if another thread is getting it).
+                event = self.__renders.get(key)
+                #
+                if event is None:
+                    event = self.__renders[key] = threading.Event()
+                    break
+
+            # Wait for the other thread, then look again (getting the plot
+            # here if the other thread failed).
+            event.wait()
+
+        try:
+            png = self.readPlot(job, key)
+
+            self.__cache.put(key, png)
+        finally:
+            with self.__render_lock:
+                del self.__renders[key]
+            #
+            event.set()
+
+        return png
+
+    def readPlot(self, job, key):
+        """
+        Read a plot from the disk cache, rendering it first if it isn't there.
+
+        The plot is rendered under a temporary name and moved into place, so
+        a half-written (or interrupted) render is never read as the plot.
+        The plots' modification times are their last access times (for
+        trimDiskCache).
+
+        @param [in] job The plot job dictionary (see scheduler.make_plot_job).
+        @param [in] key The plot's (content-addressed) key.
+
+        @return The plot (PNG).
+        """
+
+        ## The rendered plot's path.
+        png_path = os.path.join(self.__cachepath, "%s.png" % (key))
+
+        try:
+            os.utime(png_path, None)
+
+            with open(png_path, "rb") as pf:
+                return pf.read()
+        except (IOError, OSError):
+            # It hasn't been rendered (or has been removed from the disk cache).
+            pass
+
+        ## The temporary name of the plot.
+        job["name"] = "%s.%d.tmp" % (key, os.getpid())
+
+        ## The temporary path of the plot.
+        tmp_path = os.path.join(self.__cachepath, "%s.png" % (job["name"]))
+
+        try:
+            self.__pool.apply(render_plot_job, (job,))
+            #
+            os.rename(tmp_path, png_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        with open(png_path, "rb") as pf:
+            png = pf.read()
+
+        self.trimDiskCache()
+
+        return png
+
+    def trimDiskCache(self):
+        """ Remove the least recently used plots from the disk cache until they fit in its size. """
+
+        with self.__disk_lock:
+
+            ## The rendered plots [(last access time [s], size [B], path)].
+            plots = []
+            #
+            for png_path in glob.glob(os.path.join(self.__cachepath, "*.png")):
+                if not png_path.endswith(".tmp.png"):
+                    try:
+                        plots.append((os.path.getmtime(png_path), os.path.getsize(png_path), png_path))
+                    except OSError:
+                        pass
+
+            ## The total size of the rendered plots [B].
+            n_bytes = sum(size for t, size, png_path in plots)
+
+            for t, size, png_path in sorted(plots):
+
+                if n_bytes <= self.__max_disk_bytes:
+                    break
+
+                try:
+                    os.remove(png_path)
+                except OSError:
+                    continue
+
+                n_bytes -= size
+
+                lg.info(" * Profile service: removed '%s' from the disk cache." % (png_path))
+
+    def getMonthPlot(self, month_id, chip_id=None):
+        """
+        Get the plot of the frames recorded in each day of a month (PNG).
+
+        @param [in] month_id The month ("%Y-%m").
+        @param [in] chip_id The chip ID (None for all chips).
+        """
+
+        ## The start and end of the month [s].
+        st_s = calendar.timegm(time.strptime(month_id, "%Y-%m"))
+        #
+        et_s = get_period_end("month", st_s)
+
+        ## The month.
+        month = DataMonth(st_s, et_s - 1)
+
+        for run_id, frames in self.getQuery()[0].iterFrames(st_s, et_s, chip_id):
+            month.addFrames(frames["start_time"])
+
+        return self.getPlot(make_plot_job("month", month, self.__cachepath, month_id, ["png"], **MONTH_PLOT_KWARGS))
+
+    def getHourPlot(self, hour_id, chip_id=None, renderer="matplotlib"):
+        """
+        Get the hour strip plot (PNG).
+
+        @param [in] hour_id The hour ("%Y-%m-%d-%H").
+        @param [in] chip_id The chip ID (None for all chips).
+        @param [in] renderer The hour strip renderer ("matplotlib" or "raster").
+        """
+
+        ## The start of the hour [s].
+        st_s = calendar.timegm(time.strptime(hour_id, "%Y-%m-%d-%H"))
+
+        ## The hour.
+        hour = DataHour(st_s, st_s + 60 * 60 - 1)
+
+        for run_id, frames in self.getQuery()[0].iterFrames(st_s, st_s + 60 * 60, chip_id):
+            for st, acq_code, n_pixels in frames.tolist():
+                hour.addFrame(st, 10.0 ** acq_code, n_pixels)
+
+        ## The plot type.
+        plot_type = {"matplotlib":"hour", "raster":"hour_raster"}[renderer]
+
+        return self.getPlot(make_plot_job(plot_type, hour, self.__cachepath, hour_id, ["png"], **HOUR_PLOT_KWARGS))
+
+class ProfileRequestHandler(BaseHTTPRequestHandler):
+    """
+    The profile server's request handler.
+
+    The routes are:
+    - /profiles.html - the profile table;
+    - /rollup/<level>.json - the rollup summary at a zoom level;
+    - /month/<YYYY-MM>.png - the month plot;
+    - /hour/<YYYY-MM-DD-HH>.png - the hour strip (?renderer=raster for the
+      direct rasterizer).
+    Each of the data routes takes an optional ?chip=<chip ID>.
+    """
+
+    def do_GET(self):
+
+        ## The request URL.
+        url = urlparse(self.path)
+
+        ## The query parameters.
+        params = dict((k, v[0]) for k, v in parse_qs(url.query).items())
+
+        ## The service.
+        service = self.server.service
+
+        ## The path parts.
+        parts = url.path.strip("/").split("/")
+
+        try:
+            if url.path in ["/", "/profiles.html"]:
+                self.send(service.getProfilePage(), "text/html; charset=utf-8")
+            elif len(parts) == 2 and parts[0] == "rollup" and parts[1].endswith(".json"):
+                self.send(service.getRollupSummary(parts[1][:-5], params.get("chip")), "application/json")
+            elif len(parts) == 2 and parts[0] == "month" and parts[1].endswith(".png"):
+                self.send(service.getMonthPlot(parts[1][:-4], params.get("chip")), "image/png")
+            elif len(parts) == 2 and parts[0] == "hour" and parts[1].endswith(".png"):
+                self.send(service.getHourPlot(parts[1][:-4], params.get("chip"), params.get("renderer", "matplotlib")), "image/png")
+            else:
+                self.send_error(404)
+        except (IOError, ValueError, KeyError) as e:
+            lg.error(" * Bad request '%s': %s" % (self.path, e))
+            self.send_error(400, str(e).strip("* "))
+        except Exception as e:
+            # e.g. a plot that failed to render.
+            lg.exception(" * Failed request '%s': %s" % (self.path, e))
+            self.send_error(500, str(e).strip("* "))
+
+    def send(self, body, content_type):
+        """ Send a (successful) response. """
+
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, fmt, *args):
+        lg.info(" * %s - %s" % (self.address_string(), fmt % args))
+
+class ProfileServer(ThreadingMixIn, HTTPServer):
+    """ The profile server (a thread per request). """
+
+    daemon_threads = True
+
+    def __init__(self, service, port=8000, host="127.0.0.1"):
+        """
+        Constructor.
+
+        @param [in] service The ProfileService to serve.
+        @param [in] port The port to listen on.
+        @param [in] host The address to bind to (localhost by default).
+        """
+
+        HTTPServer.__init__(self, (host, port), ProfileRequestHandler)
+
+        ## The service.
+        self.service = service
@@ -0,0 +1,173 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+
+CERN@school: Data Profiling - Time Stuff - Incremental site builder.
+
+Each page is built from a set of input files (profile JSONs, plot images,
+payloads) and some parameters (the stylesheet, the page options). The
+signature of the inputs is recorded in a manifest in the output directory,
+so that only the pages whose inputs have changed are rebuilt.
+
+See http://cernatschool.web.cern.ch for more information.
+
+"""
+
+#...for the OS stuff.
+import os
+
+#...for the logging.
+import logging as lg
+
+# Import the JSON library.
+import json
+
+#...for the content hashes.
+import hashlib
+
+#...for the shared stylesheet.
+from timestuff.pages import make_css
+
+## The name of the site build manifest file (one per output directory).
+SITE_MANIFEST_NAME = ".site_build.json"
+
+def get_file_hash(path):
+    """ Get the SHA-1 hash of a file's contents. """
+
+    ## The hash.
+    h = hashlib.sha1()
+
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+
+    return h.hexdigest()
+
+def write_stylesheet(siterootpath, pagepath=None):
+    """
+    Write the shared stylesheet (once, at the site root), named after the hash of its contents.
+
+    As the name changes whenever the CSS does, browsers can cache it and
+    every page that uses it is rebuilt when it changes.
+
+    @param [in] siterootpath The site's root directory.
+    @param [in] pagepath The directory of the pages that use it (None for the site root).
+
+    @return The stylesheet's href, relative to the pages' directory (e.g. "../style.<hash>.css").
+    """
+
+    ## The CSS.
+    css = make_css()
+
+    ## The stylesheet's file name.
+    css_name = "style.%s.css" % (hashlib.sha1(css.encode("utf-8")).hexdigest()[:10])
+
+    ## The stylesheet's path.
+    css_path = os.path.join(siterootpath, css_name)
+    #
+    if not os.path.exists(css_path):
+        with open(css_path, "w") as cf:
+            cf.write(css)
+
+        lg.info(" * Written the stylesheet '%s'." % (css_path))
+
+    if pagepath is None:
+        return css_name
+
+    return os.path.relpath(css_path, pagepath).replace(os.sep, "/")
+
+class SiteBuilder:
+    """ Wrapper class for the site build manifests. """
+
+    def __init__(self, outputpath, use_hashes=False, force=False):
+        """
+        Constructor.
+
+        @param [in] outputpath The site directory.
+        @param [in] use_hashes Compare the inputs by content (not mtime and size).
+        @param [in] force Rebuild every page, whether it has changed or not.
+        """
+
+        ## The site directory.
+        self.__outputpath = outputpath
+
+        ## Compare the inputs by content?
+        self.__use_hashes = use_hashes
+
+        ## Rebuild every page?
+        self.__force = force
+
+        ## The manifest path.
+        self.__manifest_path = os.path.join(outputpath, SITE_MANIFEST_NAME)
+
+        ## The manifest { page name:signature }.
+        self.__manifest = {}
+        #
+        if os.path.exists(self.__manifest_path):
+            with open(self.__manifest_path, "r") as mf:
+                self.__manifest = json.load(mf)
+
+        ## The number of pages built and skipped.
+        self.__n_built, self.__n_skipped = 0, 0
+
+    def getSignature(self, inputs, params=None):
+        """
+        Get the signature of a page's inputs.
+
+        @param [in] inputs The paths of the input files.
+        @param [in] params JSON-friendly parameters that the page depends on.
+        """
+
+        ## The state of each input { path:state }.
+        states = {}
+
+        for path in inputs:
+            if self.__use_hashes:
+                states[path] = get_file_hash(path)
+            else:
+                st = os.stat(path)
+                #
+                states[path] = [st.st_mtime, st.st_size]
+
+        ## The content to hash.
+        content = {"inputs":states, "params":params}
+
+        return hashlib.sha1(json.dumps(content, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def isStale(self, name, signature):
+        """
+        Does the page need to be (re)built?
+
+        @param [in] name The page's file name (relative to the site directory).
+        @param [in] signature The signature of the page's inputs (see getSignature).
+        """
+
+        if self.__force or self.__manifest.get(name) != signature or not os.path.exists(os.path.join(self.__outputpath, name)):
+            self.__n_built += 1
+            return True
+
+        lg.info(" * Page '%s' is up to date." % (name))
+
+        self.__n_skipped += 1
+
+        return False
+
+    def add(self, name, signature):
+        """
+        Record that the page has been built from inputs with this signature.
+
+        @param [in] name The page's file name (relative to the site directory).
+        @param [in] signature The signature of the page's inputs (see getSignature).
+        """
+
+        self.__manifest[name] = signature
+
+    def save(self):
+        """ Write out the manifest. """
+
+        with open(self.__manifest_path, "w") as mf:
+            json.dump(self.__manifest, mf, sort_keys=True, indent=0)
+
+        print("* Pages built: %d, up to date: %d." % (self.__n_built, self.__n_skipped))
+        lg.info(" * Pages built: %d, up to date: %d." % (self.__n_built, self.__n_skipped))
@@ -0,0 +1,866 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+
+CERN@school: Data Profiling - Time Stuff - Pipeline stages.
+
+Each of the toolkit's stages (condense -> profile -> plot -> page) as a
+function that takes and returns in-memory arrays and dictionaries, so that
+they can be composed in a single process (see process_run). The scripts
+are thin command line wrappers around these.
+
+See http://cernatschool.web.cern.ch for more information.
+
+"""
+
+#...for the OS stuff.
+import os, glob
+
+#...for the logging.
+import logging as lg
+
+#...for writing out files.
+import codecs
+
+# Import the JSON library.
+import json
+
+#...for the time (being).
+import time, calendar
+
+#...for even more MATH.
+import numpy as np
+
+#...for the run metrics.
+from timestuff.metrics import timed, add_count
+
+#...for the progress reporting (in the per-frame loops).
+from timestuff.progress import PROGRESS_STRIDE
+
+#...for the condensed frame data.
+from timestuff.rollup import FRAME_DTYPE, ROLLUP_LEVELS, get_period_starts, get_period_key
+
+#...for the timeline tiles.
+from timestuff.tiles import make_tiles, write_tile_indexes
+
+#...for the month start times.
+from timestuff.constants import month_start_times
+
+#...for the data wrappers.
+from timestuff.wrappers import DataMonth, DataDay
+
+#...for the plot rendering.
+from timestuff.scheduler import make_plot_job, render_plot_jobs, defer_plot_jobs
+
+#...for the day pages.
+from timestuff.pages import make_day_payload, make_day_plot_page, make_day_canvas_page, make_tile_page
+
+#...for the plot thumbnails.
+from timestuff.thumbs import make_thumbnails
+
+#...for the site builder and stylesheet.
+from timestuff.site import SiteBuilder, write_stylesheet
+
+#...for the chip IDs and profile catalog.
+from timestuff.catalog import CATALOG_NAME, get_chip_id, add_to_catalog, read_catalog
+
+#...for the handler functions.
+from handlers import getPixelmanTimeString, make_time_dir
+
+#...for the plot and profile pages.
+from helpers import make_plot_page, write_profile_page, get_profile_page_key, get_profile_page_name, make_profile_nav, make_profile_index, make_profile_search_page
+
+## The (skeleton) Frame class library - the ROOT file format interface.
+FRAME_LIB = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Frame_C")
+
+## The month plot options.
+MONTH_PLOT_KWARGS = {"y_max":16000, "y_label":"Frames"}
+
+## The hour plot options.
+HOUR_PLOT_KWARGS = {"y_max":30, "y_label":"Pixels per second / [$\\mathrm{s}^{-1}$]"}
+
+## The acquisition time thresholds for the log10 codes [s] (-3 below the first).
+ACQ_TIME_THRESHOLDS = [0.001, 0.01, 0.1, 1.0]
+
+def encode_acq_time(acq_time):
+    """
+    Encode a frame acquisition time as (roughly) its log10.
+
+    @param [in] acq_time The acquisition time [s].
+
+    @return The code, from -3 (< 1 ms) to 1 (>= 1 s).
+    """
+
+    ## The code.
+    code = -3
+    #
+    for threshold in ACQ_TIME_THRESHOLDS:
+        if acq_time >= threshold:
+            code += 1
+
+    return code
+
+def condense_dataset(rootpath, start_frame=0, n_frames=-1, progress=None):
+    """
+    Condense the frames of a (Mafalda) ROOT file.
+
+    @param [in] rootpath The path to the ROOT file.
+    @param [in] start_frame The first frame to condense.
+    @param [in] n_frames The number of frames to condense (-1 for all).
+    @param [in] progress The ProgressReporter to update (None for none).
+
+    @return A structured array of the frames (see rollup.FRAME_DTYPE).
+    """
+
+    #...for the ROOT stuff (only needed for this stage).
+    from ROOT import TFile, gSystem
+
+    # Load in the (skeleton) Frame class - a bare-minimum class that
+    # provides the ROOT file format interface.
+    gSystem.Load(FRAME_LIB)
+
+    ## The ROOT file itself.
+    f = TFile(rootpath)
+
+    ## The condensed frames (from the TTree containing the data).
+    frames = condense_tree(f.Get('MPXTree'), start_frame, n_frames, rootpath, progress)
+
+    f.Close()
+
+    return frames
+
+def condense_tree(chain, start_frame=0, n_frames=-1, name="MPXTree", progress=None):
+    """
+    Condense the frames of a (Mafalda) MPXTree.
+
+    @param [in] chain The TTree - or anything with the same interface (see trees.py).
+    @param [in] start_frame The first frame to condense.
+    @param [in] n_frames The number of frames to condense (-1 for all).
+    @param [in] name The name of the tree (for the logging).
+    @param [in] progress The ProgressReporter to update (None for none).
+
+    @return A structured array of the frames (see rollup.FRAME_DTYPE).
+    """
+
+    ## The number of frames in the file.
+    n_frames_found = chain.GetEntriesFast()
+    #
+    if n_frames == -1:
+        n_frames = n_frames_found
+    #
+    if start_frame > n_frames_found:
+        raise IOError("* ERROR: start frame is greater than the number of frames present.")
+
+    lg.info(" * Condensing '%s': %d frame(s) from frame %d (%d found)." % (name, n_frames, start_frame, n_frames_found))
+
+    ## The number of frames to condense (at most).
+    n_rows = max(0, min(n_frames, n_frames_found - start_frame))
+
+    ## The condensed frames (filled in as they're read, and trimmed if the tree ends early).
+    frames = np.zeros(n_rows, dtype=FRAME_DTYPE)
+
+    ## The start times [s], acquisition time codes and numbers of pixels (views of the frames).
+    sts, acq_codes, nps = frames["start_time"], frames["acq_code"], frames["n_pixels"]
+
+    ## The number of frames condensed.
+    n_done = 0
+
+    ## The number of bytes read from the tree.
+    n_bytes = 0
+
+    ## The frame at which to next update the progress (-1 for never).
+    check_fn = -1
+    #
+    if progress is not None:
+        progress.start(n_rows)
+        #
+        check_fn = start_frame + PROGRESS_STRIDE
+
+    with timed("read"):
+
+        # Loop over the frames in the file.
+        for fn in range(start_frame, start_frame + n_rows):
+
+            if fn == check_fn:
+
+                progress.update(fn - start_frame, n_bytes)
+
+                check_fn += PROGRESS_STRIDE
+
+            # Load the TTree.
+            chain.LoadTree(fn)
+
+            ## The number of bytes in the entry (copied into memory).
+            nb = chain.GetEntry(fn)
+            #
+            if nb == 0:
+                break
+
+            n_bytes += nb
+
+            sts[n_done] = int(chain.FramesData.GetStartTime())
+            #
+            acq_codes[n_done] = encode_acq_time(chain.FramesData.GetAcqTime())
+
+            ## The number of hit pixels in the frame.
+            n_pixels = len(chain.FramesData.GetFrameXC())
+
+            # If we do have a fully occupied frame, set it to one below to avoid
+            # a 2 byte penalty for the whole dataset(!).
+            nps[n_done] = min(n_pixels, 256*256 - 1)
+
+            n_done += 1
+
+    if progress is not None:
+        progress.finish(n_done, n_bytes)
+
+    add_count("frames_read", n_done)
+    #
+    add_count("bytes_read", n_bytes)
+
+    if n_done < n_rows:
+        frames = frames[:n_done].copy()
+
+    return frames
+
+def write_condensed(datapath, frames):
+    """
+    Write frames to a condensed (binary) data file.
+
+    @param [in] datapath The path to the condensed data file.
+    @param [in] frames A structured array of the frames (see rollup.FRAME_DTYPE).
+    """
+
+    with timed("write"), open(datapath, "wb") as bf:
+        np.asarray(frames, dtype=FRAME_DTYPE).tofile(bf)
+
+    add_count("bytes_written", len(frames) * FRAME_DTYPE.itemsize)
+
+    lg.info(" * Written %d frame(s) to '%s'." % (len(frames), datapath))
+
+def profile_dataset(rootpath, start_frame=0, n_frames=-1, progress=None):
+    """
+    Profile a (DSC) dataset.
+
+    @param [in] rootpath The path to the dataset's ROOT file.
+    @param [in] start_frame The first frame to profile.
+    @param [in] n_frames The number of frames to profile (-1 for all).
+    @param [in] progress The ProgressReporter to update (None for none).
+
+    @return The dataset's run ID and JSON information (for the catalog).
+    """
+
+    #...for the ROOT stuff (only needed for this stage).
+    from ROOT import TFile
+
+    ## The ROOT file containing the dataset to be profiled.
+    f = TFile(rootpath, "READ")
+
+    ## The run ID and dataset information (from the TTree containing the data).
+    run_id, jd = profile_tree(f.Get('dscData'), os.path.basename(rootpath), os.path.getsize(rootpath), start_frame, n_frames, progress)
+
+    # Close the ROOT file.
+    f.Close()
+
+    return run_id, jd
+
+def profile_tree(dataset_chain, dataset_file_name, file_size, start_frame=0, n_frames=-1, progress=None):
+    """
+    Profile a (DSC) dataset's tree.
+
+    @param [in] dataset_chain The TTree - or anything with the same interface (see trees.py).
+    @param [in] dataset_file_name The dataset filename (for the chip ID).
+    @param [in] file_size The size of the dataset's ROOT file [B].
+    @param [in] start_frame The first frame to profile.
+    @param [in] n_frames The number of frames to profile (-1 for all).
+    @param [in] progress The ProgressReporter to update (None for none).
+
+    @return The dataset's run ID and JSON information (for the catalog).
+    """
+
+    ## The chip ID, determined from the dataset filename.
+    chip_id = get_chip_id(dataset_file_name)
+    #
+    if chip_id is None:
+        raise IOError("* ERROR! Invalid chip ID!")
+
+    ## The number of frames in the file.
+    n_frames_found = dataset_chain.GetEntriesFast()
+    #
+    if n_frames == -1:
+        n_frames = n_frames_found
+    #
+    if start_frame > n_frames_found:
+        raise IOError("* ERROR! Starting frame number greater than the number of frames.")
+
+    lg.info(" * Profiling '%s' (%s): %d frame(s) from frame %d (%d found)." % (dataset_file_name, chip_id, n_frames, start_frame, n_frames_found))
+
+    ## List of the start times.
+    st_s = []
+
+    ## The number of bytes read from the tree.
+    n_bytes = 0
+
+    ## The frame at which to next update the progress (-1 for never).
+    check_fn = -1
+    #
+    if progress is not None:
+        progress.start(max(0, min(n_frames_found, start_frame + n_frames) - start_frame))
+        #
+        check_fn = start_frame + PROGRESS_STRIDE
+
+    with timed("read"):
+
+        # Loop over the frames.
+        for fn in range(start_frame, min(n_frames_found, start_frame + n_frames)):
+
+            if fn == check_fn:
+
+                progress.update(fn - start_frame, n_bytes)
+
+                check_fn += PROGRESS_STRIDE
+
+            # Load the TTree.
+            dataset_chain.LoadTree(fn)
+
+            # Copy the entry into memory.
+            n_bytes += dataset_chain.GetEntry(fn)
+
+            st_s.append(float(dataset_chain.Start_time))
+
+    if progress is not None:
+        progress.finish(len(st_s), n_bytes)
+
+    add_count("frames_read", len(st_s))
+    #
+    add_count("bytes_read", n_bytes)
+
+    ## The acquisition time for the frame (from the last frame).
+    delta_t = dataset_chain.Acq_time
+
+    # Sort the list of start times.
+    st_s = sorted(st_s)
+
+    ## The total length of time covered by the dataset [s].
+    Delta_T = st_s[-1] - st_s[0]
+
+    # Create the dataset information JSON.
+    jd = {
+        "chip_id"      : chip_id,
+        "start_time_s" : getPixelmanTimeString(st_s[0])[0],
+        "Delta_T"      : Delta_T,
+        "Delta_t"      : Delta_T / (len(st_s) - 1),
+        "delta_t"      : delta_t,
+        "file_name"    : dataset_file_name,
+        "n_frames"     : n_frames_found,
+        "file_size"    : file_size,
+        }
+
+    lg.info(" * First start time: %s (%f)" % (getPixelmanTimeString(st_s[ 0])[2], st_s[ 0]))
+    lg.info(" * Last  start time: %s (%f)" % (getPixelmanTimeString(st_s[-1])[2], st_s[-1]))
+    lg.info(" * Delta_{T} = %f [s], Delta_{t} = %f [s]" % (jd["Delta_T"], jd["Delta_t"]))
+
+    return "%s_%s" % (chip_id, make_time_dir(st_s[0])), jd
+
+@timed("aggregate")
+def make_months(frames, months=None):
+    """
+    Count the frames recorded in each day of each month.
+
+    @param [in] frames A structured array of the frames (see rollup.FRAME_DTYPE).
+    @param [in] months The months to add the frames to (None for new ones) -
+    so a run can be counted a block of frames at a time.
+
+    @return Dictionary of the month wrapper objects { month ID ("%Y-%m"):DataMonth }.
+    """
+
+    ## The month start times.
+    start_times = sorted(month_start_times.values())
+
+    ## The frame start times [s].
+    sts = frames["start_time"].astype(np.int64)
+
+    if months is None:
+
+        ## Dictionary of the month wrapper objects.
+        months = {}
+        #
+        for st_s, next_st_s in zip(start_times[:-1], start_times[1:]):
+            months[time.strftime("%Y-%m", time.gmtime(st_s))] = DataMonth(st_s, next_st_s - 1)
+
+    ## The number of frames added.
+    n_added = 0
+
+    for st_s, next_st_s in zip(start_times[:-1], start_times[1:]):
+
+        ## The frame start times in the month [s].
+        month_sts = sts[(sts >= st_s) & (sts < next_st_s)]
+
+        months[time.strftime("%Y-%m", time.gmtime(st_s))].addFrames(month_sts)
+
+        n_added += len(month_sts)
+
+    if n_added != len(sts):
+        raise IOError("* ERROR: frames found outside of the months %s to %s!" % (min(months.keys()), max(months.keys())))
+
+    return months
+
+@timed("aggregate")
+def make_day(frames, day_string):
+    """
+    Collect the frames recorded in a day (UTC), hour by hour.
+
+    @param [in] frames A structured array of the frames (see rollup.FRAME_DTYPE).
+    @param [in] day_string The day ("%Y-%m-%d").
+
+    @return The DataDay object for the day.
+    """
+
+    ## The start time (seconds since epoch) of the day [s].
+    day_start_s = calendar.timegm(time.strptime(day_string, "%Y-%m-%d"))
+
+    ## The day.
+    day = DataDay(day_start_s, day_start_s + 60 * 60 * 24 - 1)
+
+    ## Mask of the frames in the day.
+    m = (frames["start_time"] >= day_start_s) & (frames["start_time"] < day_start_s + 60 * 60 * 24)
+
+    day.addFrames(frames["start_time"][m], np.power(10.0, frames["acq_code"][m]), frames["n_pixels"][m])
+
+    return day
+
+def make_month_plot_jobs(months, outputpath, formats=None, **kwargs):
+    """
+    Make the plot jobs for the months.
+
+    @param [in] months Dictionary of the months (see make_months).
+    @param [in] outputpath The directory to save the plots to.
+    @param [in] formats List of output formats.
+    @param [in] kwargs Extra keyword arguments for the plots (e.g. profile).
+    """
+
+    return [make_plot_job("month", months[month_id], outputpath, month_id, formats, **dict(MONTH_PLOT_KWARGS, **kwargs)) for month_id in sorted(months.keys())]
+
+def make_hour_plot_jobs(day, outputpath, formats=None, renderer="matplotlib", **kwargs):
+    """
+    Make the plot jobs for the hours of a day.
+
+    @param [in] day The DataDay object for the day (see make_day).
+    @param [in] outputpath The directory to save the plots to.
+    @param [in] formats List of output formats.
+    @param [in] renderer The hour strip renderer ("matplotlib" or "raster").
+    @param [in] kwargs Extra keyword arguments for the plots (e.g. profile, lod).
+    """
+
+    ## The plot type for the hour strips.
+    plot_type = {"matplotlib":"hour", "raster":"hour_raster"}[renderer]
+
+    return [make_plot_job(plot_type, day.getHour(hour), outputpath, hour, formats, **dict(HOUR_PLOT_KWARGS, **kwargs)) for hour in range(day.getNumberOfHours())]
+
+def render_plots(jobs, processes=None, use_templates=True, use_cache=True, deferred_formats=(), queuepath=None, progress=None):
+    """
+    Render the plot jobs, and queue up the deferred formats.
+
+    @param [in] jobs List of plot job dictionaries.
+    @param [in] processes The number of worker processes (None for all cores).
+    @param [in] use_templates Reuse the static figure for each plot type?
+    @param [in] use_cache Skip the plots whose data hasn't changed?
+    @param [in] deferred_formats List of output formats to defer.
+    @param [in] queuepath The deferred render queue directory.
+    @param [in] progress The ProgressReporter to update (None for none).
+    """
+
+    # Render and save the plots (if there are any formats to render now).
+    if len(jobs) > 0 and len(jobs[0]["formats"]) > 0:
+
+        with timed("render"):
+            render_plot_jobs(jobs, processes, use_templates, use_cache, progress)
+
+        add_count("plots", len(jobs))
+
+    # Queue up the deferred (publication) formats.
+    if len(deferred_formats) > 0:
+        defer_plot_jobs(jobs, queuepath, deferred_formats)
+
+@timed("write")
+def write_day_payload(day, outputpath):
+    """
+    Write a day's data payload (for the canvas day page).
+
+    @param [in] day The DataDay object for the day.
+    @param [in] outputpath The day's output directory.
+
+    @return The path of the payload JSON file.
+    """
+
+    ## The path of the payload JSON file.
+    payload_path = os.path.join(outputpath, "hours.json")
+    #
+    with open(payload_path, "w") as pf:
+        json.dump(make_day_payload(day), pf, separators=(',', ':'))
+
+    lg.info(" * Written the day's payload to '%s'." % (payload_path))
+
+    return payload_path
+
+@timed("pages")
+def build_plot_page(plotpath, outputpath, builder, css_href=None, thumbs=True, processes=None):
+    """
+    Build the page of month plots (if its inputs have changed).
+
+    @param [in] plotpath The directory of the plot images.
+    @param [in] outputpath The directory for the page.
+    @param [in] builder The SiteBuilder for the output directory.
+    @param [in] css_href The shared stylesheet (None to put the CSS inline).
+    @param [in] thumbs Make thumbnails of the plots?
+    @param [in] processes The number of thumbnail processes.
+    """
+
+    ## Dictionary for the plot images { month ID ("%Y-%m"):file name }.
+    plot_paths = {}
+    #
+    for fn in sorted(glob.glob(os.path.join(plotpath, "*.png"))):
+        plot_paths[os.path.basename(fn).split(".")[0]] = os.path.basename(fn)
+
+    ## The plot thumbnails.
+    thumb_names = None
+    #
+    if thumbs:
+        thumb_names = make_thumbnails(plotpath, list(plot_paths.values()), processes)
+
+    ## The signature of the page's inputs (the plots).
+    sig = builder.getSignature([os.path.join(plotpath, fn) for fn in sorted(plot_paths.values())], [not thumbs, css_href])
+
+    if builder.isStale("plots.html", sig):
+
+        with codecs.open(os.path.join(outputpath, "plots.html"), 'w', 'utf-8') as f:
+            f.write(make_plot_page(plot_paths, thumb_names, css_href))
+
+        builder.add("plots.html", sig)
+
+@timed("pages")
+def build_day_page(plotpath, outputpath, builder, css_href=None, canvas=False, thumbs=True, processes=None):
+    """
+    Build the page of a day's hour plots (if its inputs have changed).
+
+    @param [in] plotpath The day's directory of plot images (and payload).
+    @param [in] outputpath The directory for the page.
+    @param [in] builder The SiteBuilder for the output directory.
+    @param [in] css_href The shared stylesheet (None to put the CSS inline).
+    @param [in] canvas Draw the hours in the browser from the day's payload?
+    @param [in] thumbs Make thumbnails of the plots?
+    @param [in] processes The number of thumbnail processes.
+    """
+
+    if canvas:
+
+        ## The path to the day's payload.
+        payload_path = os.path.join(plotpath, "hours.json")
+        #
+        if not os.path.exists(payload_path):
+            raise IOError("* ERROR: '%s' payload does not exist!" % (payload_path))
+
+        ## The page's inputs.
+        inputs = [payload_path]
+
+    else:
+
+        ## Dictionary for the plot images { hour:file name }.
+        plot_paths = {}
+        #
+        for fn in sorted(glob.glob(os.path.join(plotpath, "*.png"))):
+            plot_paths[int(os.path.basename(fn).split(".")[0])] = os.path.basename(fn)
+
+        ## The plot thumbnails.
+        thumb_names = None
+        #
+        if thumbs:
+            thumb_names = make_thumbnails(plotpath, list(plot_paths.values()), processes)
+
+        ## The page's inputs.
+        inputs = [os.path.join(plotpath, fn) for fn in sorted(plot_paths.values())]
+
+    ## The signature of the page's inputs.
+    sig = builder.getSignature(inputs, [canvas, not thumbs, css_href])
+
+    if not builder.isStale("plots.html", sig):
+        return
+
+    if canvas:
+
+        with open(payload_path, "r") as pf:
+            page = make_day_canvas_page(json.load(pf), css_href=css_href)
+
+    else:
+        page = make_day_plot_page(plot_paths, thumb_names, css_href)
+
+    with codecs.open(os.path.join(outputpath, "plots.html"), 'w', 'utf-8') as f:
+        f.write(page)
+
+    builder.add("plots.html", sig)
+
+@timed("pages")
+def build_profile_pages(jds, outputpath, builder, paginate="month", css_href=None):
+    """
+    Build the dataset profile pages (those whose inputs have changed).
+
+    @param [in] jds Dictionary of the datasets' JSON information { run ID:info }.
+    @param [in] outputpath The directory for the pages.
+    @param [in] builder The SiteBuilder for the output directory.
+    @param [in] paginate How to split the pages (see helpers.PROFILE_PAGINATIONS).
+    @param [in] css_href The shared stylesheet (None to put the CSS inline).
+    """
+
+    ## The signature of the (single or search) page's inputs (all of the runs).
+    sig = builder.getSignature([], [paginate, css_href, jds])
+
+    if paginate == "none":
+
+        if builder.isStale("profiles.html", sig):
+
+            with codecs.open(os.path.join(outputpath, "profiles.html"), 'w', 'utf-8') as f:
+                write_profile_page(f, ((run_id, jds[run_id]) for run_id in sorted(jds.keys())), css_href=css_href)
+
+            builder.add("profiles.html", sig)
+
+        return
+
+    ## The run IDs on each page { page key:[run ID] }.
+    pages = {}
+    #
+    for run_id in sorted(jds.keys()):
+        pages.setdefault(get_profile_page_key(jds[run_id], paginate), []).append(run_id)
+
+    # Write the (paginated) profile pages.
+    for page_key in sorted(pages.keys()):
+
+        ## The page's file name.
+        page_name = get_profile_page_name(page_key)
+
+        ## The page's navigation links.
+        nav = make_profile_nav(sorted(pages.keys()), page_key)
+
+        ## The signature of the page's inputs (just the runs on the page).
+        page_sig = builder.getSignature([], [paginate, css_href, nav, [[run_id, jds[run_id]] for run_id in pages[page_key]]])
+
+        if not builder.isStale(page_name, page_sig):
+            continue
+
+        with codecs.open(os.path.join(outputpath, page_name), 'w', 'utf-8') as f:
+            write_profile_page(f, ((run_id, jds[run_id]) for run_id in pages[page_key]), nav, css_href)
+
+        builder.add(page_name, page_sig)
+
+        lg.info(" * Page '%s': %d run(s)." % (page_key, len(pages[page_key])))
+
+    if builder.isStale("profiles.html", sig):
+
+        ## The search index of the runs.
+        index = make_profile_index(jds, paginate)
+        #
+        with open(os.path.join(outputpath, "profiles-index.json"), "w") as jf:
+            json.dump(index, jf, separators=(',', ':'))
+
+        # Write the search page (with the index inline).
+        with codecs.open(os.path.join(outputpath, "profiles.html"), 'w', 'utf-8') as f:
+            f.write(make_profile_search_page(index, css_href=css_href))
+
+        builder.add("profiles.html", sig)
+
+@timed("tiles")
+def build_tiles(frames, outputpath, levels=ROLLUP_LEVELS, y_max=30.0, processes=None):
+    """
+    Make the timeline tiles, rollup summaries and timeline page for a run.
+
+    The tiles (and the finer levels' summaries, for the page to load as
+    they're zoomed into) are written to <outputpath>/tiles, with all of
+    the summaries (rollup.json) and page (tiles.html) in the output
+    directory.
+
+    @param [in] frames A structured array of the frames (see rollup.FRAME_DTYPE).
+    @param [in] outputpath The output directory.
+    @param [in] levels The zoom levels to make the tiles for.
+    @param [in] y_max The pixels per second at the top of the tiles.
+    @param [in] processes The number of rendering processes (None for all cores).
+
+    @return Dictionary of the rollup summaries { level:{ key:totals } }.
+    """
+
+    ## The rollup summaries { level:{ key:totals } }.
+    summaries = make_tiles(frames, os.path.join(outputpath, "tiles"), levels, y_max, processes)
+
+    # Write out the rollup summaries.
+    with open(os.path.join(outputpath, "rollup.json"), "w") as rf:
+        json.dump(summaries, rf, sort_keys=True)
+
+    write_tile_indexes(summaries, os.path.join(outputpath, "tiles"))
+
+    with codecs.open(os.path.join(outputpath, "tiles.html"), 'w', 'utf-8') as f:
+        f.write(make_tile_page(summaries))
+
+    return summaries
+
+def process_run(frames, outputpath, formats=("png",), processes=None, use_cache=True, force=False, siterootpath=None, **kwargs):
+    """
+    Plot a (condensed) run and make its pages, all in this process.
+
+    The month plots and page are written to the output directory, and the
+    hour plots, payload and page for each day to <outputpath>/<day> (the
+    same layout as pipeline.make_mafalda_tasks).
+
+    @param [in] frames A structured array of the frames (see rollup.FRAME_DTYPE).
+    @param [in] outputpath The output directory.
+    @param [in] formats List of output formats.
+    @param [in] processes The number of plotting processes (None for all cores).
+    @param [in] use_cache Skip the plots (and pages) whose data hasn't changed?
+    @param [in] force Rebuild the pages, even if their inputs haven't changed.
+    @param [in] siterootpath Where to write the shared stylesheet (None for the output directory).
+    @param [in] kwargs Extra keyword arguments for the plots (e.g. profile).
+
+    @return A list of the days ("%Y-%m-%d") plotted.
+    """
+
+    if siterootpath is None:
+        siterootpath = outputpath
+
+    ## The shared stylesheet (relative to the month page; the day pages are one level down).
+    css_href = write_stylesheet(siterootpath, outputpath)
+
+    ## The plot jobs (for all of the months and days, rendered in one go).
+    jobs = make_month_plot_jobs(make_months(frames), outputpath, list(formats), **kwargs)
+
+    ## The days covered by the run.
+    days = [get_period_key("day", int(ds)) for ds in np.unique(get_period_starts("day", frames["start_time"]))]
+
+    ## The days' DataDay objects { day:DataDay }.
+    data_days = {}
+
+    for day in days:
+
+        ## The day's output directory.
+        daypath = os.path.join(outputpath, day)
+        #
+        if not os.path.isdir(daypath):
+            os.mkdir(daypath)
+
+        data_days[day] = make_day(frames, day)
+
+        jobs += make_hour_plot_jobs(data_days[day], daypath, list(formats), **kwargs)
+
+        write_day_payload(data_days[day], daypath)
+
+    render_plots(jobs, processes, use_cache=use_cache)
+
+    ## The site builder for the month page.
+    builder = SiteBuilder(outputpath, force=force)
+    #
+    build_plot_page(outputpath, outputpath, builder, css_href, processes=processes)
+    #
+    builder.save()
+
+    for day in days:
+
+        ## The day's output directory.
+        daypath = os.path.join(outputpath, day)
+
+        ## The site builder for the day's page.
+        builder = SiteBuilder(daypath, force=force)
+        #
+        build_day_page(daypath, daypath, builder, "../" + css_href, processes=processes)
+        #
+        builder.save()
+
+    return days
+
+def process_mafalda_file(rootpath, outputpath, formats=("png",), processes=None, force=False, **kwargs):
+    """
+    Condense, plot and tile a (Mafalda) run, all in this process.
+
+    The frames are only read from the ROOT file once; the condensed data
+    file is still written (for the queries and profile service), but is
+    never read back. The outputs are written to <outputpath>/bin,
+    plots/<run ID> and tiles/<run ID> (as per pipeline.make_mafalda_tasks),
+    and the shared stylesheet to <outputpath>.
+
+    @param [in] rootpath The path to the run's ROOT file.
+    @param [in] outputpath The output directory.
+    @param [in] formats List of output formats for the plots.
+    @param [in] processes The number of plotting processes (None for all cores).
+    @param [in] force Redo the plots and pages, even if they're up to date.
+    @param [in] kwargs Extra keyword arguments for process_run.
+
+    @return Dictionary of the time taken by each stage { stage:time [s] }
+    (the plots include their pages).
+    """
+
+    ## The run ID (as per condense-time-info.py).
+    run_id = os.path.basename(rootpath).split(".")[0]
+
+    ## The condensed data, plot and tile directories.
+    binpath, plotpath, tilepath = [os.path.join(outputpath, d) for d in ["bin", os.path.join("plots", run_id), os.path.join("tiles", run_id)]]
+    #
+    for path in [binpath, plotpath, tilepath]:
+        if not os.path.isdir(path):
+            os.makedirs(path)
+
+    ## The time taken by each stage [s].
+    times = {}
+
+    t0 = time.time()
+
+    ## The condensed frames.
+    frames = condense_dataset(rootpath)
+
+    write_condensed(os.path.join(binpath, "%s.bin" % (run_id)), frames)
+
+    times["condense"], t0 = time.time() - t0, time.time()
+
+    process_run(frames, plotpath, formats, processes, use_cache=not force, force=force, siterootpath=outputpath, **kwargs)
+
+    times["plot"], t0 = time.time() - t0, time.time()
+
+    build_tiles(frames, tilepath, processes=processes)
+
+    times["tiles"] = time.time() - t0
+
+    return times
+
+def process_dsc_files(rootpaths, outputpath, paginate="month", force=False):
+    """
+    Profile (DSC) datasets and update the profile pages, all in this process.
+
+    The profiles are added to the catalog in <outputpath>/profiles (as per
+    pipeline.make_dsc_tasks), and the pages made from the catalog.
+
+    @param [in] rootpaths The paths to the datasets' ROOT files.
+    @param [in] outputpath The output directory.
+    @param [in] paginate How to split the pages (see helpers.PROFILE_PAGINATIONS).
+    @param [in] force Rebuild all of the pages, even if their inputs haven't changed.
+
+    @return Dictionary of the datasets' JSON information { run ID:info }.
+    """
+
+    ## The profile directory.
+    profilepath = os.path.join(outputpath, "profiles")
+    #
+    if not os.path.isdir(profilepath):
+        os.makedirs(profilepath)
+
+    ## The path to the profile catalog.
+    catalogpath = os.path.join(profilepath, CATALOG_NAME)
+
+    for rootpath in rootpaths:
+        add_to_catalog(catalogpath, *profile_dataset(rootpath))
+
+    ## The profiles of all of the datasets in the catalog.
+    jds = read_catalog(catalogpath)
+
+    ## The site builder for the profile pages.
+    builder = SiteBuilder(profilepath, force=force)
+    #
+    build_profile_pages(jds, profilepath, builder, paginate, write_stylesheet(outputpath, profilepath))
+    #
+    builder.save()
+
+    return jds
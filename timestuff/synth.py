@@ -0,0 +1,283 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+
+CERN@school: Data Profiling - Time Stuff - Synthetic condensed data.
+
+Synthetic runs in the condensed (binary) format, for measuring the
+toolkit's performance without real data. The runs are made of fills
+(beam on) separated by gaps, with one acquisition time per fill:
+
+- each frame starts once the previous one has finished, i.e. after its
+  acquisition time plus a (random) readout time. The gaps between the
+  fills take up the rest of the requested duration - which is extended
+  if the frames won't fit in it (e.g. 1e9 frames of 1 s or more), but
+  only as far as the end of the months that the month plots cover (see
+  constants.month_start_times). If the frames still won't fit, the gaps
+  are shortened and the fills that would overrun use the shortest
+  acquisition time - and a run that can't fit at all is refused, unless
+  it's allowed to go past the months;
+- the number of pixels is Poisson distributed around the fill's pixel
+  rate times the acquisition time, with a few noisy (> 30000 pixels) and
+  fully occupied frames.
+
+The frames are made (and written) a block at a time, so runs of 1e9
+frames (8 GB) don't need to fit in memory.
+
+See http://cernatschool.web.cern.ch for more information.
+
+"""
+
+#...for the logging.
+import logging as lg
+
+#...for even more MATH.
+import math
+import numpy as np
+
+#...for the condensed frame data.
+from timestuff.rollup import FRAME_DTYPE
+
+#...for the months covered by the month plots.
+from timestuff.constants import month_start_times
+
+## The default start time of the synthetic runs [s] (2012-09-01 00:00:00 UTC).
+SYNTH_START_TIME = 1346457600
+
+## The default duration of the synthetic runs [s] (28 days).
+SYNTH_DURATION = 28 * 24 * 60 * 60
+
+## The start and end of the months covered by the month plots [s] (see stages.make_months).
+SYNTH_MONTHS_START, SYNTH_MONTHS_END = min(month_start_times.values()), max(month_start_times.values())
+
+## The number of frames made at a time.
+SYNTH_BLOCK = 1000000
+
+## The acquisition time codes (log10 of the acq. time [s]) and the fraction of fills using each.
+SYNTH_ACQ_CODES = {-3:0.05, -2:0.15, -1:0.30, 0:0.40, 1:0.10}
+
+## The mean number of frames in a fill.
+SYNTH_FILL_FRAMES = 20000
+
+## The minimum number of fills in a run.
+SYNTH_MIN_FILLS = 20
+
+## The minimum fraction of the run's duration spent in the gaps between fills.
+SYNTH_GAP_FRACTION = 0.3
+
+## The mean readout time between frames [s] (varies by up to 20%).
+SYNTH_READOUT_TIME = 0.02
+
+## The median pixel rate [pixels/s] (log-normal from fill to fill).
+SYNTH_PIXEL_RATE = 10.0
+
+## The fraction of noisy frames (as per HourPlot, > 30000 pixels).
+SYNTH_NOISY_FRACTION = 0.002
+
+## The fraction of fully occupied frames (256 x 256 - 1 pixels, as per the condensing).
+SYNTH_FULL_FRACTION = 0.0001
+
+def get_busy_time(n_frames, acq_codes=SYNTH_ACQ_CODES):
+    """
+    Get the expected time taken by the frames themselves (acquisition and readout).
+
+    @param [in] n_frames The number of frames.
+    @param [in] acq_codes The acquisition time codes and the fraction of fills using each.
+
+    @return The time [s].
+    """
+
+    ## The mean time taken by a frame [s].
+    frame_time = sum(10.0**code * f for code, f in acq_codes.items()) / sum(acq_codes.values()) + SYNTH_READOUT_TIME
+
+    return n_frames * frame_time
+
+def fit_synthetic_duration(n_frames, duration=SYNTH_DURATION, acq_codes=SYNTH_ACQ_CODES, start_time=SYNTH_START_TIME, in_months=True):
+    """
+    Get the duration of a synthetic run - extended, if need be, to fit its frames.
+
+    @param [in] n_frames The number of frames.
+    @param [in] duration The requested duration of the run [s].
+    @param [in] acq_codes The acquisition time codes and the fraction of fills using each.
+    @param [in] start_time The start time of the run [s].
+    @param [in] in_months Keep the run within the months covered by the month plots?
+
+    @return The duration [s].
+    """
+
+    ## The (minimum) duration needed for the frames and gaps [s].
+    needed = int(math.ceil(get_busy_time(n_frames, acq_codes) / (1.0 - SYNTH_GAP_FRACTION)))
+
+    if needed > duration:
+        lg.warning(" * %d frame(s) don't fit in %.1f days - extending the run to %.1f days." % (n_frames, duration / 86400.0, needed / 86400.0))
+
+    duration = max(duration, needed)
+
+    if not in_months:
+        return duration
+
+    ## The time left in the months covered from the start of the run [s].
+    available = SYNTH_MONTHS_END - start_time
+
+    # Even at the shortest acquisition time, with no gaps?
+    if start_time < SYNTH_MONTHS_START or get_busy_time(n_frames, {min(acq_codes.keys()):1.0}) > available:
+        raise IOError("* ERROR: %d frame(s) from %d can't fit in the months covered (%d to %d) - use fewer frames or shorter acquisition times, or let the run go past the months!" % (n_frames, start_time, SYNTH_MONTHS_START, SYNTH_MONTHS_END))
+
+    if duration > available:
+
+        lg.warning(" * Shortening the run to %.1f days (with shorter gaps) to stay within the months covered." % (available / 86400.0))
+
+        duration = available
+
+    return duration
+
+def make_synthetic_frames(n_frames, start_time=SYNTH_START_TIME, duration=SYNTH_DURATION, seed=1, block=SYNTH_BLOCK, acq_codes=SYNTH_ACQ_CODES, in_months=True):
+    """
+    Make the frames of a synthetic run, a block at a time.
+
+    @param [in] n_frames The number of frames.
+    @param [in] start_time The start time of the run [s].
+    @param [in] duration The duration of the run [s] (see fit_synthetic_duration).
+    @param [in] seed The random number generator seed (the same seed gives the same run).
+    @param [in] block The number of frames in each block.
+    @param [in] acq_codes The acquisition time codes and the fraction of fills using each.
+    @param [in] in_months Keep the run within the months covered by the month plots?
+
+    @return Generator of structured arrays of the frames (see rollup.FRAME_DTYPE).
+    """
+
+    ## The random number generator.
+    rng = np.random.RandomState(seed)
+
+    ## The acquisition time codes and their probabilities.
+    codes = sorted(acq_codes.keys())
+    #
+    probs = np.array([acq_codes[c] for c in codes], dtype=np.float64)
+    #
+    probs /= probs.sum()
+
+    ## The number of fills, and the mean number of frames in each.
+    n_fills = max(SYNTH_MIN_FILLS, n_frames // SYNTH_FILL_FRAMES)
+    #
+    fill_frames = float(n_frames) / n_fills
+
+    ## The duration of the run [s] (extended if the frames won't fit).
+    duration = fit_synthetic_duration(n_frames, duration, acq_codes, start_time, in_months)
+
+    ## The mean time taken by a frame [s].
+    frame_time = get_busy_time(1, acq_codes)
+
+    ## The time of the next frame [s] (carried between blocks).
+    t = float(start_time)
+
+    ## The (expected) end of the current fill [s] - for sizing the gaps.
+    t_fill_end = float(start_time)
+
+    ## The current fill's acq. code and pixel rate, and the frames left in it.
+    fill_code, fill_rate, fill_left = 0, SYNTH_PIXEL_RATE, 0
+
+    ## The number of frames made so far.
+    n_done = 0
+
+    while n_done < n_frames:
+
+        ## The number of frames in this block.
+        n = min(block, n_frames - n_done)
+
+        ## The acq. codes, pixel rates and gaps before each frame.
+        frame_codes, rates, gaps = np.empty(n, dtype=np.int16), np.empty(n), np.zeros(n)
+
+        ## The position in the block.
+        i = 0
+        #
+        while i < n:
+
+            if fill_left == 0:
+
+                # Start a new fill (after a gap, unless it's the first).
+                fill_code = codes[rng.choice(len(codes), p=probs)]
+                #
+                fill_rate = SYNTH_PIXEL_RATE * rng.lognormal(0.0, 0.5)
+                #
+                fill_left = max(1, int(fill_frames * rng.uniform(0.5, 1.5)))
+
+                ## The frames still to come (including this fill's).
+                frames_left = n_frames - n_done - i
+                #
+                if n_done + i > 0:
+
+                    # Share the time left, less what the frames will take, between the gaps to come.
+                    gaps[i] = max(0.0, start_time + duration - t_fill_end - frames_left * frame_time) / max(1.0, frames_left / fill_frames) * rng.uniform(0.5, 1.5)
+
+                # If the fill (with the frames after it) would overrun the run, use the
+                # shortest acquisition time - e.g. when the fills so far ran long.
+                if t_fill_end + gaps[i] + fill_left * (10.0**fill_code + SYNTH_READOUT_TIME) + max(0, frames_left - fill_left) * frame_time > start_time + duration:
+                    fill_code = codes[0]
+
+                t_fill_end += gaps[i] + fill_left * (10.0**fill_code + SYNTH_READOUT_TIME)
+
+            ## The number of frames from the fill in this block.
+            m = min(fill_left, n - i)
+
+            frame_codes[i:i+m], rates[i:i+m] = fill_code, fill_rate
+
+            fill_left -= m
+            #
+            i += m
+
+        ## The acquisition times [s].
+        acq_times = np.power(10.0, frame_codes.astype(np.float64))
+
+        ## The time taken by each frame [s] - the readout time varies by up to 20%.
+        frame_times = acq_times + SYNTH_READOUT_TIME * rng.uniform(0.8, 1.2, n)
+
+        ## The frame start times [s] - each after the gap (if any) and the previous frame.
+        sts = t + np.cumsum(gaps) + np.concatenate(([0.0], np.cumsum(frame_times)[:-1]))
+        #
+        t = sts[-1] + frame_times[-1]
+
+        ## The numbers of pixels.
+        nps = rng.poisson(rates * acq_times)
+
+        ## The noisy and fully occupied frames.
+        u = rng.random_sample(n)
+        #
+        nps[u < SYNTH_NOISY_FRACTION] = rng.randint(30001, 65535, int((u < SYNTH_NOISY_FRACTION).sum()))
+        #
+        nps[u < SYNTH_FULL_FRACTION] = 256*256 - 1
+
+        ## The block of frames.
+        frames = np.zeros(n, dtype=FRAME_DTYPE)
+        #
+        frames["start_time"] = sts.astype(np.uint32)
+        #
+        frames["acq_code"] = frame_codes
+        #
+        frames["n_pixels"] = np.minimum(nps, 256*256 - 1)
+
+        n_done += n
+
+        yield frames
+
+def write_synthetic_run(datapath, n_frames, start_time=SYNTH_START_TIME, duration=SYNTH_DURATION, seed=1, acq_codes=SYNTH_ACQ_CODES, in_months=True):
+    """
+    Write a synthetic run to a condensed (binary) data file.
+
+    @param [in] datapath The path to the condensed data file.
+    @param [in] n_frames The number of frames.
+    @param [in] start_time The start time of the run [s].
+    @param [in] duration The duration of the run [s] (see fit_synthetic_duration).
+    @param [in] seed The random number generator seed.
+    @param [in] acq_codes The acquisition time codes and the fraction of fills using each.
+    @param [in] in_months Keep the run within the months covered by the month plots?
+    """
+
+    # (Checked before the file's opened, so a run that can't fit doesn't leave an empty one.)
+    duration = fit_synthetic_duration(n_frames, duration, acq_codes, start_time, in_months)
+
+    with open(datapath, "wb") as bf:
+        for frames in make_synthetic_frames(n_frames, start_time, duration, seed, acq_codes=acq_codes, in_months=in_months):
+            frames.tofile(bf)
+
+    lg.info(" * Written a synthetic run of %d frame(s) to '%s'." % (n_frames, datapath))
@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+
+CERN@school: Data Profiling - Time Stuff - Plot thumbnails.
+
+See http://cernatschool.web.cern.ch for more information.
+
+"""
+
+#...for the OS stuff.
+import os
+
+#...for the logging.
+import logging as lg
+
+#...for the worker processes.
+import multiprocessing
+
+#...for the downscaling (no pyplot required).
+from matplotlib.image import thumbnail
+
+## The thumbnail scales { pixel density descriptor:scale }.
+THUMB_SCALES = {
+    "1x" : 0.25,
+    "2x" : 0.5,
+    }
+
+## The thumbnail directory (relative to the images).
+THUMB_DIR = "thumbs"
+
+def get_thumb_name(image_name, density):
+    """
+    Get the name of an image's thumbnail.
+
+    @param [in] image_name The file name of the (full resolution) image.
+    @param [in] density The pixel density descriptor (see THUMB_SCALES).
+    """
+
+    return "%s.%s.png" % (os.path.splitext(image_name)[0], density)
+
+def make_thumbnail_job(job):
+    """ Make a thumbnail - (image path, thumbnail path, scale) - in a worker. """
+
+    image_path, thumb_path, scale = job
+
+    thumbnail(image_path, thumb_path, scale=scale)
+
+    return thumb_path
+
+def make_thumbnails(imagepath, image_names, processes=None):
+    """
+    Make the (cached) thumbnails of the images.
+
+    Thumbnails are written to <imagepath>/thumbs/ and only remade if the
+    image is newer than its thumbnail.
+
+    @param [in] imagepath The directory containing the images.
+    @param [in] image_names The file names of the images.
+    @param [in] processes The number of worker processes (None for all cores).
+
+    @return Dictionary of the thumbnails { image name:{ density:path } },
+    with the paths relative to the image directory.
+    """
+
+    ## The thumbnail directory.
+    thumbpath = os.path.join(imagepath, THUMB_DIR)
+    #
+    if not os.path.isdir(thumbpath):
+        os.makedirs(thumbpath)
+
+    ## The thumbnails { image name:{ density:path } }.
+    thumbs = {}
+
+    ## The thumbnails to (re)make.
+    jobs = []
+
+    for image_name in image_names:
+
+        ## The path of the full resolution image.
+        image_path = os.path.join(imagepath, image_name)
+
+        thumbs[image_name] = {}
+
+        for density, scale in sorted(THUMB_SCALES.items()):
+
+            ## The thumbnail's file name.
+            thumb_name = get_thumb_name(image_name, density)
+
+            ## The thumbnail's path.
+            thumb_path = os.path.join(thumbpath, thumb_name)
+
+            # Only remake the thumbnail if the image has changed.
+            if not os.path.exists(thumb_path) or os.path.getmtime(thumb_path) < os.path.getmtime(image_path):
+                jobs.append((image_path, thumb_path, scale))
+
+            thumbs[image_name][density] = "%s/%s" % (THUMB_DIR, thumb_name)
+
+    lg.info(" * Thumbnails: %d of %d up to date." % (len(image_names) * len(THUMB_SCALES) - len(jobs), len(image_names) * len(THUMB_SCALES)))
+
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+
+    processes = max(1, min(processes, len(jobs)))
+
+    if processes == 1:
+        for job in jobs:
+            make_thumbnail_job(job)
+    else:
+        ## The pool of worker processes.
+        pool = multiprocessing.Pool(processes)
+        #
+        try:
+            pool.map(make_thumbnail_job, jobs, chunksize=1)
+        finally:
+            pool.close()
+            pool.join()
+
+    return thumbs
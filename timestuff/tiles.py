@@ -0,0 +1,183 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+
+CERN@school: Data Profiling - Time Stuff - Timeline tile pyramid.
+
+See http://cernatschool.web.cern.ch for more information.
+
+"""
+
+#...for the OS stuff.
+import os
+
+#...for the logging.
+import logging as lg
+
+# Import the JSON library.
+import json
+
+#...for the worker processes.
+import multiprocessing
+
+#...for even more MATH.
+import numpy as np
+
+#...for the rollup aggregates.
+from timestuff.rollup import ROLLUP_LEVELS, ROLLUP_BINS, make_rollup, get_rollup_summary
+
+#...for writing the tile images.
+from timestuff.raster import write_png, NORMAL_COLOR, NOISY_COLOR
+
+## The tile height [pixels] (the width is the number of rollup bins).
+TILE_HEIGHT = 96
+
+## The length of the parent period's key for each of the finer zoom levels.
+PARENT_KEY_LENGTHS = {"day":7, "hour":10, "minute":13}
+
+def render_tile(period, y_max, tilepath):
+    """
+    Render a timeline tile for a rolled up period.
+
+    Each column of the tile is a time bin. The bar height is the mean
+    pixels per second of the bin's normal frames, and the fraction of
+    noisy frames in the bin is drawn down from the top of the tile.
+
+    @param [in] period The period's rollup (see rollup.make_rollup).
+    @param [in] y_max The pixels per second at the top of the tile.
+    @param [in] tilepath The path of the tile PNG file.
+    """
+
+    ## The number of columns (time bins).
+    width = len(period["frames"])
+
+    ## The mean pixels per second of each bin's normal frames.
+    pps = period["pixels"] / np.maximum(period["live_time"], 1e-9)
+
+    ## The bar heights [pixels].
+    bar_hs = np.clip(np.round(pps * TILE_HEIGHT / y_max), 0, TILE_HEIGHT)
+    #
+    # Show that there was data, even with no hit pixels.
+    bar_hs[(period["frames"] > period["noisy"]) & (bar_hs == 0)] = 1
+
+    ## The noisy bar heights [pixels].
+    noisy_hs = np.ceil(TILE_HEIGHT * period["noisy"] / np.maximum(period["frames"], 1))
+
+    ## The pixel row heights (measured from the bottom of the tile).
+    row_hs = np.arange(TILE_HEIGHT, 0, -1).reshape(TILE_HEIGHT, 1)
+
+    ## The tile image.
+    image = np.full((TILE_HEIGHT, width, 4), 255, dtype=np.uint8)
+    #
+    image[row_hs <= bar_hs] = NORMAL_COLOR
+    #
+    image[(TILE_HEIGHT + 1 - row_hs) <= noisy_hs] = NOISY_COLOR
+
+    write_png(tilepath, image)
+
+def render_tile_job(job):
+    """ Render a tile job - (period, y max, tile path) - in a worker. """
+
+    render_tile(*job)
+
+    return job[2]
+
+def make_tiles(frames, outputpath, levels=ROLLUP_LEVELS, y_max=30.0, processes=None):
+    """
+    Generate the tile pyramid (only for the periods with data).
+
+    The tiles are written to <outputpath>/<level>/<key>.png.
+
+    @param [in] frames Structured array of frames (see rollup.FRAME_DTYPE).
+    @param [in] outputpath The tile directory.
+    @param [in] levels The zoom levels to generate.
+    @param [in] y_max The pixels per second at the top of the tiles.
+    @param [in] processes The number of worker processes (None for all cores).
+
+    @return Dictionary of the rollup summaries { level:{ key:totals } }.
+    """
+
+    ## The tile jobs.
+    jobs = []
+
+    ## The rollup summaries (e.g. for the tile index).
+    summaries = {}
+
+    for level in levels:
+
+        ## The rollup at this zoom level.
+        rollup = make_rollup(frames, level, ROLLUP_BINS)
+
+        lg.info(" * Zoom level %-6s: %d tile(s) with data." % (level, len(rollup)))
+
+        ## The level's tile directory.
+        level_path = os.path.join(outputpath, level)
+        #
+        if not os.path.isdir(level_path):
+            os.makedirs(level_path)
+
+        for key in sorted(rollup.keys()):
+            jobs.append((rollup[key], y_max, os.path.join(level_path, "%s.png" % (key))))
+
+        summaries[level] = get_rollup_summary(rollup)
+
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+
+    processes = max(1, min(processes, len(jobs)))
+
+    if processes == 1:
+        for job in jobs:
+            render_tile_job(job)
+    else:
+        ## The pool of worker processes.
+        pool = multiprocessing.Pool(processes)
+        #
+        try:
+            # The tiles are small, so hand them out in batches.
+            pool.map(render_tile_job, jobs, chunksize=64)
+        finally:
+            pool.close()
+            pool.join()
+
+    lg.info(" * Rendered %d tile(s)." % (len(jobs)))
+
+    return summaries
+
+def write_tile_indexes(summaries, outputpath):
+    """
+    Write the finer zoom levels' summaries, split by their parent period.
+
+    Each parent's summaries are written to <outputpath>/<level>/index-<parent key>.js
+    as a call to tileIndexLoaded(level, parent key, summaries) - so the
+    timeline page only loads them (with a script tag, which also works
+    for pages opened from disk) when the parent is zoomed into.
+
+    @param [in] summaries Dictionary of the rollup summaries { level:{ key:totals } }.
+    @param [in] outputpath The tile directory.
+
+    @return The number of index files written.
+    """
+
+    ## The number of index files written.
+    n_files = 0
+
+    for level in [l for l in PARENT_KEY_LENGTHS if l in summaries]:
+
+        ## The level's summaries for each parent period { parent key:{ key:totals } }.
+        parts = {}
+        #
+        for key, totals in summaries[level].items():
+            parts.setdefault(key[:PARENT_KEY_LENGTHS[level]], {})[key] = totals
+
+        for parent, part in parts.items():
+
+            with open(os.path.join(outputpath, level, "index-%s.js" % (parent)), "w") as jf:
+                jf.write('tileIndexLoaded("%s","%s",%s);\n' % (level, parent, json.dumps(part, separators=(',', ':'), sort_keys=True)))
+
+            n_files += 1
+
+    lg.info(" * Written %d tile index file(s)." % (n_files))
+
+    return n_files
@@ -0,0 +1,316 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+
+CERN@school: Data Profiling - Time Stuff - Tree readers.
+
+The ingest stages (see stages.condense_tree and stages.profile_tree) only
+use a small part of the ROOT TTree interface:
+
+- MPXTree (Mafalda): GetEntriesFast(), LoadTree(entry), GetEntry(entry)
+  and the FramesData getters GetStartTime(), GetAcqTime() and
+  GetFrameXC();
+- dscData (DSC): GetEntriesFast(), LoadTree(entry), GetEntry(entry) and
+  the Start_time and Acq_time branches.
+
+This module provides in-memory (fake) trees with the same interface, made
+from condensed frames (e.g. a synthetic run - see synth.py), so that the
+ingest stages can be run and benchmarked without ROOT or real data, and a
+wrapper that counts (and times) the accesses made to any tree - fake or
+real - for each entry.
+
+See http://cernatschool.web.cern.ch for more information.
+
+"""
+
+#...for the time (being).
+import time
+
+#...for even more MATH.
+import numpy as np
+
+#...for the condensed frame data.
+from timestuff.rollup import FRAME_DTYPE
+
+## The size of a fake MPXTree entry without its pixels [B] (roughly, as per ROOT's GetEntry).
+FAKE_FRAME_BYTES = 64
+
+## The size of each pixel in a fake MPXTree entry [B] (the X and C values).
+FAKE_PIXEL_BYTES = 8
+
+## The size of a fake dscData entry [B] (the Start_time and Acq_time doubles).
+FAKE_DSC_BYTES = 16
+
+## The fraction of a second added to the fake frame start times (Pixelman's are sub-second).
+FAKE_SUBSECOND = 0.25
+
+def get_fake_acq_time(acq_code):
+    """
+    Get an acquisition time that the condensing encodes as the given code.
+
+    (The codes are the upper bounds - e.g. 0 is 0.1 s <= t < 1 s - so 10**code
+    itself doesn't encode back to the same code.)
+
+    @param [in] acq_code The acquisition time code (see stages.encode_acq_time).
+
+    @return The acquisition time [s].
+    """
+
+    return 0.5 * 10.0**acq_code
+
+class FakeFramesData:
+    """ The frame (FramesData) of a fake MPXTree's current entry. """
+
+    def __init__(self):
+        """ Constructor. """
+
+        ## The frame start time [s].
+        self.__st = 0.0
+
+        ## The frame acquisition time [s].
+        self.__acq_time = 0.0
+
+        ## The number of hit pixels in the frame.
+        self.__n_pixels = 0
+
+    def setFrame(self, st, acq_time, n_pixels):
+        self.__st, self.__acq_time, self.__n_pixels = st, acq_time, n_pixels
+
+    def GetStartTime(self):
+        return self.__st
+
+    def GetAcqTime(self):
+        return self.__acq_time
+
+    def GetFrameXC(self):
+        # (Only the number of pixels is kept - the pixels themselves are a range.)
+        return range(self.__n_pixels)
+
+
+class FakeMPXTree:
+    """ An in-memory MPXTree, made from condensed frames. """
+
+    def __init__(self, frames):
+        """
+        Constructor.
+
+        @param [in] frames A structured array of the frames (see rollup.FRAME_DTYPE).
+        """
+
+        frames = np.asarray(frames, dtype=FRAME_DTYPE)
+
+        ## The frame start times [s] (as Python numbers, as per ROOT).
+        self.__sts = (frames["start_time"] + FAKE_SUBSECOND).tolist()
+
+        ## The frame acquisition times [s].
+        self.__acq_times = get_fake_acq_time(frames["acq_code"].astype(np.float64)).tolist()
+
+        ## The numbers of hit pixels in the frames.
+        self.__nps = frames["n_pixels"].tolist()
+
+        ## The number of entries.
+        self.__n_entries = len(frames)
+
+        ## The frame of the current entry.
+        self.FramesData = FakeFramesData()
+
+    def GetEntriesFast(self):
+        return self.__n_entries
+
+    def LoadTree(self, entry):
+        """ Load the tree for an entry (-2 if there is no such entry, as per ROOT). """
+
+        if entry < 0 or entry >= self.__n_entries:
+            return -2
+
+        return entry
+
+    def GetEntry(self, entry):
+        """
+        Copy an entry into memory (FramesData).
+
+        @return The number of bytes read (0 if there is no such entry, as per ROOT).
+        """
+
+        if entry < 0 or entry >= self.__n_entries:
+            return 0
+
+        self.FramesData.setFrame(self.__sts[entry], self.__acq_times[entry], self.__nps[entry])
+
+        return FAKE_FRAME_BYTES + FAKE_PIXEL_BYTES * self.__nps[entry]
+
+
+class FakeDSCTree:
+    """ An in-memory dscData tree, made from condensed frames. """
+
+    def __init__(self, frames):
+        """
+        Constructor.
+
+        @param [in] frames A structured array of the frames (see rollup.FRAME_DTYPE).
+        """
+
+        frames = np.asarray(frames, dtype=FRAME_DTYPE)
+
+        ## The frame start times [s].
+        self.__sts = (frames["start_time"] + FAKE_SUBSECOND).tolist()
+
+        ## The frame acquisition times [s].
+        self.__acq_times = get_fake_acq_time(frames["acq_code"].astype(np.float64)).tolist()
+
+        ## The number of entries.
+        self.__n_entries = len(frames)
+
+        ## The branches of the current entry.
+        self.Start_time, self.Acq_time = 0.0, 0.0
+
+    def GetEntriesFast(self):
+        return self.__n_entries
+
+    def LoadTree(self, entry):
+        """ Load the tree for an entry (-2 if there is no such entry, as per ROOT). """
+
+        if entry < 0 or entry >= self.__n_entries:
+            return -2
+
+        return entry
+
+    def GetEntry(self, entry):
+        """
+        Copy an entry into memory (Start_time and Acq_time).
+
+        @return The number of bytes read (0 if there is no such entry, as per ROOT).
+        """
+
+        if entry < 0 or entry >= self.__n_entries:
+            return 0
+
+        self.Start_time, self.Acq_time = self.__sts[entry], self.__acq_times[entry]
+
+        return FAKE_DSC_BYTES
+
+    def getFileSize(self):
+        """ Get the size the tree's ROOT file would be [B] (for the profile). """
+
+        return FAKE_DSC_BYTES * self.__n_entries
+
+
+class AccessCounter:
+    """ The number of accesses made to a tree (and its FramesData), and the time they took. """
+
+    def __init__(self):
+        """ Constructor. """
+
+        ## The number of calls (or reads) of each method (or branch) { name:calls }.
+        self.__calls = {}
+
+        ## The time spent in each method (or branch) [s] { name:time }.
+        self.__times = {}
+
+    def addAccess(self, name, dt):
+        """
+        Count an access.
+
+        @param [in] name The method (or branch) name, e.g. "GetEntry" or "FramesData.GetStartTime".
+        @param [in] dt The time the access took [s].
+        """
+
+        self.__calls[name] = self.__calls.get(name, 0) + 1
+        #
+        self.__times[name] = self.__times.get(name, 0.0) + dt
+
+    def getCalls(self):
+        return self.__calls
+
+    def getTimes(self):
+        return self.__times
+
+    def getNumberOfEntries(self):
+        """ Get the number of entries read (the number of GetEntry calls). """
+
+        return self.__calls.get("GetEntry", 0)
+
+    def getCostsPerEntry(self):
+        """
+        Get the cost of each access per entry read.
+
+        @return Dictionary of the costs { name:{ "calls":calls per entry, "us":time per entry [us] } }.
+        """
+
+        ## The number of entries read.
+        n_entries = max(1, self.getNumberOfEntries())
+
+        return dict((name, {"calls":float(calls) / n_entries, "us":1.0e6 * self.__times[name] / n_entries}) for name, calls in self.__calls.items())
+
+
+class CountingProxy:
+    """ Counts the accesses made to an object's methods and attributes (see CountingTree). """
+
+    def __init__(self, target, counter, prefix=""):
+        """
+        Constructor.
+
+        @param [in] target The object whose accesses are counted.
+        @param [in] counter The AccessCounter to count them with.
+        @param [in] prefix The prefix of the counted names (e.g. "FramesData.").
+        """
+
+        self.__target, self.__counter, self.__prefix = target, counter, prefix
+
+    def __getattr__(self, name):
+
+        t0 = time.perf_counter()
+        #
+        value = getattr(self.__target, name)
+
+        if name == "FramesData":
+
+            self.__counter.addAccess(name, time.perf_counter() - t0)
+
+            return CountingProxy(value, self.__counter, "FramesData.")
+
+        if not callable(value):
+
+            # A branch (e.g. Start_time).
+            self.__counter.addAccess(self.__prefix + name, time.perf_counter() - t0)
+
+            return value
+
+        ## The counted name of the method.
+        key = self.__prefix + name
+
+        ## The counter.
+        counter = self.__counter
+
+        def counted(*args):
+
+            t1 = time.perf_counter()
+            #
+            result = value(*args)
+            #
+            counter.addAccess(key, time.perf_counter() - t1)
+
+            return result
+
+        return counted
+
+
+class CountingTree(CountingProxy):
+    """ Wraps a tree (fake or ROOT's), counting and timing the accesses made to it. """
+
+    def __init__(self, tree, counter=None):
+        """
+        Constructor.
+
+        @param [in] tree The tree.
+        @param [in] counter The AccessCounter to use (None for a new one).
+        """
+
+        if counter is None:
+            counter = AccessCounter()
+
+        CountingProxy.__init__(self, tree, counter)
+
+        ## The access counter.
+        self.counter = counter
@@ -0,0 +1,198 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+
+CERN@school: Data Profiling - Time Stuff - Watching for new runs.
+
+The input directories are polled for new (or changed) ROOT files. A file
+is only ingested once it has stopped changing (for the debounce time), and
+is then run through the toolkit's pipeline - condensing, profiling,
+plotting and the pages - for just that run (see pipeline.py).
+
+See http://cernatschool.web.cern.ch for more information.
+
+"""
+
+#...for the OS stuff.
+import os, glob
+
+#...for the logging.
+import logging as lg
+
+# Import the JSON library.
+import json
+
+#...for the time (being).
+import time
+
+#...for the locks.
+import threading
+
+#...for the ingest tasks.
+from timestuff.pipeline import run_pipeline, make_mafalda_tasks, make_dsc_tasks
+
+## The name of the watch state file for each kind of input (in the output directory).
+WATCH_STATE_NAME = ".watch_state_%s.json"
+
+## Lock for the steps that update files shared between runs (e.g. the profile pages).
+shared_lock = threading.Lock()
+
+class DirectoryWatcher:
+    """ Polls directories for new or changed files. """
+
+    def __init__(self, paths, pattern="*.root", debounce=30.0, statepath=None):
+        """
+        Constructor.
+
+        @param [in] paths The directories to watch.
+        @param [in] pattern The file name pattern to watch for.
+        @param [in] debounce How long a file must be unchanged before it is ready [s].
+        @param [in] statepath The path of the state file (None to keep it in memory).
+        """
+
+        ## The directories to watch.
+        self.__paths = paths
+
+        ## The file name pattern.
+        self.__pattern = pattern
+
+        ## The debounce time [s].
+        self.__debounce = debounce
+
+        ## The path of the state file.
+        self.__statepath = statepath
+
+        ## The state of the files already processed { path:[size, mtime] }.
+        self.__done = {}
+        #
+        if statepath is not None and os.path.exists(statepath):
+            with open(statepath, "r") as sf:
+                self.__done = json.load(sf)
+
+        ## The changed files being debounced { path:(state, time first seen) }.
+        self.__pending = {}
+
+        ## The files being processed { path:state }.
+        self.__running = {}
+
+    def poll(self, limit=None):
+        """
+        Look for files that are new (or have changed) and have settled.
+
+        The files returned are then being processed until markDone is
+        called for them.
+
+        @param [in] limit The maximum number of files to return (None for all).
+
+        @return A list of the paths of the files ready to process.
+        """
+
+        ## The files ready to process.
+        ready = []
+
+        ## The current time [s].
+        now = time.time()
+
+        for path in self.__paths:
+            for fp in sorted(glob.glob(os.path.join(path, self.__pattern))):
+
+                try:
+                    st = os.stat(fp)
+                except OSError:
+                    # The file has gone away since the glob.
+                    continue
+
+                ## The file's state.
+                state = [st.st_size, st.st_mtime]
+
+                if self.__done.get(fp) == state or fp in self.__running:
+                    continue
+
+                # (Re)start the debounce if the file is new or still changing.
+                if fp not in self.__pending or self.__pending[fp][0] != state:
+                    self.__pending[fp] = (state, now)
+                    continue
+
+                if now - self.__pending[fp][1] >= self.__debounce and (limit is None or len(ready) < limit):
+                    ready.append(fp)
+                    #
+                    self.__running[fp] = self.__pending.pop(fp)[0]
+
+        return ready
+
+    def getNumberPending(self):
+        """ Get the number of changed files that haven't been processed yet. """
+
+        return len(self.__pending)
+
+    def markDone(self, path):
+        """
+        Record that a file has been processed (in the state it was found in).
+
+        Files that failed are marked as done too - they are only tried again
+        if they change.
+        """
+
+        self.__done[path] = self.__running.pop(path)
+
+        if self.__statepath is not None:
+            with open(self.__statepath, "w") as sf:
+                json.dump(self.__done, sf, sort_keys=True, indent=0)
+
+def ingest_mafalda_file(rootpath, outputpath):
+    """
+    Ingest a (Mafalda) run - condense it, then update its plots, pages and tiles.
+
+    @param [in] rootpath The path to the run's ROOT file.
+    @param [in] outputpath The output directory.
+
+    @return True if all of the tasks succeeded.
+    """
+
+    ## The pipeline report.
+    report = run_pipeline(make_mafalda_tasks(rootpath, outputpath), outputpath)
+
+    return all(totals["failed"] == 0 for totals in report.values())
+
+def ingest_dsc_file(rootpath, outputpath):
+    """
+    Ingest a (DSC) dataset - profile it and update the profile pages.
+
+    @param [in] rootpath The path to the dataset's ROOT file.
+    @param [in] outputpath The output directory.
+
+    @return True if all of the tasks succeeded.
+    """
+
+    # The profile pages are shared by all of the datasets.
+    with shared_lock:
+
+        ## The pipeline report.
+        report = run_pipeline(make_dsc_tasks([rootpath], outputpath), outputpath)
+
+    return all(totals["failed"] == 0 for totals in report.values())
+
+## The ingest function for each kind of input file.
+INGESTERS = {
+    "mafalda" : ingest_mafalda_file,
+    "dsc"     : ingest_dsc_file,
+    }
+
+def ingest_job(job):
+    """ Ingest a file - (kind, ROOT file path, output path) - in a worker. """
+
+    kind, rootpath, outputpath = job
+
+    ## The time taken [s].
+    t0 = time.time()
+
+    try:
+        ok = INGESTERS[kind](rootpath, outputpath)
+    except Exception as e:
+        lg.error(" * Ingesting '%s' failed: %s" % (rootpath, e))
+        ok = False
+
+    lg.info(" * Ingested '%s' (%s) in %.1f s." % (rootpath, "OK" if ok else "FAILED", time.time() - t0))
+
+    return rootpath, ok
@@ -15,6 +15,9 @@ import logging as lg
 #...for the time (being).
 import time
 
+#...for even more MATH.
+import numpy as np
+
 #...for the custom Pixelman time string.
 from handlers import getPixelmanTimeString
 
@@ -51,7 +54,7 @@ class DataMonth:
         self.__remainder_seconds = self.__Delta_s % (60 * 60 * 24)
 
         ## The number of days in the month [days].
-        self.__n_days = (self.__Delta_s - self.__remainder_seconds) / (60 * 60 * 24)
+        self.__n_days = (self.__Delta_s - self.__remainder_seconds) // (60 * 60 * 24)
         #
         if self.__remainder_seconds != 0:
             raise IOError("* Error! Month has %d remainder seconds." % (self.__remainder_seconds))
@@ -99,6 +102,21 @@ class DataMonth:
 
         self.__frames_in_a_day[day] += 1
 
+    def addFrames(self, sts):
+        """
+        Add several frames to the month at once.
+
+        @param [in] sts Array of the frame start times [s].
+        """
+
+        self.__num_frames += len(sts)
+
+        ## The number of frames in each day of the month (day 1 first).
+        counts = np.bincount((np.asarray(sts, dtype=np.int64) - self.__st_s) // (60 * 60 * 24), minlength=self.__n_days)
+
+        for day in range(1, self.__n_days + 1):
+            self.__frames_in_a_day[day] += int(counts[day - 1])
+
     def getNumberOfFrames(self):
         return self.__num_frames
 
@@ -198,6 +216,29 @@ class DataDay:
 
         self.__frames_in_an_hour[hour] += 1
 
+    def addFrames(self, sts, acq_times, n_pixels):
+        """
+        Add several frames to the day at once.
+
+        @param [in] sts Array of the frame start times [s].
+        @param [in] acq_times Array of the frame acquisition times [s].
+        @param [in] n_pixels Array of the number of hit pixels in each frame.
+        """
+
+        ## The hour of the day of each frame.
+        hours = (np.asarray(sts, dtype=np.int64) - self.__st_s) // (60 * 60)
+
+        for hour in np.unique(hours).tolist():
+
+            ## Mask of the frames in the hour.
+            m = hours == hour
+
+            self.__hours[hour].addFrames(np.asarray(sts)[m], np.asarray(acq_times)[m], np.asarray(n_pixels)[m])
+
+            self.__num_frames += int(m.sum())
+            #
+            self.__frames_in_an_hour[hour] += int(m.sum())
+
     def getNumberOfFrames(self):
         return self.__num_frames
 
@@ -297,6 +338,24 @@ class DataHour:
         #
         #lg.info(" * Found new frame: %s (%f [s], % 7d pixels)." % (time.asctime(time.gmtime(st)), acq_time, n_pixels))
 
+    def addFrames(self, sts, acq_times, n_pixels):
+        """
+        Add several frames to the hour at once.
+
+        @param [in] sts Array of the frame start times [s].
+        @param [in] acq_times Array of the frame acquisition times [s].
+        @param [in] n_pixels Array of the number of hit pixels in each frame.
+        """
+
+        self.__num_frames += len(sts)
+
+        # Add the frame data (as Python numbers, as per addFrame).
+        self.__f_sts.extend(np.asarray(sts).tolist())
+        #
+        self.__f_ats.extend(np.asarray(acq_times).tolist())
+        #
+        self.__f_nps.extend(np.asarray(n_pixels).tolist())
+
     def getNumberOfFrames(self):
         return self.__num_frames
 
@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+
+ CERN@school - Watching for (and ingesting) new runs.
+
+ See the README.md file and the GitHub wiki for more information.
+
+ http://cernatschool.web.cern.ch
+
+"""
+
+# Import the code needed to manage files.
+import os
+
+#...for parsing the arguments.
+import argparse
+
+#...for the logging.
+import logging as lg
+
+#...for the time (being).
+import time
+
+#...for the pool of ingest workers.
+from multiprocessing.pool import ThreadPool
+
+#...for watching the input directories.
+from timestuff.watch import DirectoryWatcher, WATCH_STATE_NAME, ingest_job
+
+if __name__ == "__main__":
+
+    print("*")
+    print("*=========================================*")
+    print("* CERN@school - watching for new datasets *")
+    print("*=========================================*")
+
+    # Get the paths from the command line.
+    parser = argparse.ArgumentParser()
+    parser.add_argument("outputPath",      help="The path for the output files.")
+    parser.add_argument("--mafalda",       help="A directory of (Mafalda) run ROOT files to condense and plot.", action="append", default=[])
+    parser.add_argument("--dsc",           help="A directory of (DSC) dataset ROOT files to profile.", action="append", default=[])
+    parser.add_argument("--interval",      help="How often to look for new files [s].", type=float, default=10.0)
+    parser.add_argument("--debounce",      help="How long a file must be unchanged before it is ingested [s].", type=float, default=30.0)
+    parser.add_argument("-w", "--workers", help="The number of files to ingest at once.", type=int, default=2)
+    parser.add_argument("--once",          help="Ingest the files that are already there, then stop.", action="store_true")
+    parser.add_argument("-v", "--verbose", help="Increase output verbosity", action="store_true")
+    args = parser.parse_args()
+
+    ## The output path.
+    outputpath = args.outputPath
+
+    # Check if the directories exist. If they don't, quit.
+    if not os.path.isdir(outputpath):
+        raise IOError("* ERROR: '%s' output directory does not exist!" % (outputpath))
+    #
+    for path in args.mafalda + args.dsc:
+        if not os.path.isdir(path):
+            raise IOError("* ERROR: '%s' input directory does not exist!" % (path))
+
+    # Set the logging level.
+    if args.verbose:
+        level=lg.DEBUG
+    else:
+        level=lg.INFO
+
+    # Configure the logging.
+    lg.basicConfig(filename=os.path.join(outputpath, 'log_watch-runs.log'), filemode='a', level=level, format="%(asctime)s %(message)s")
+
+    print("*")
+    print("* Output path         : '%s'" % (outputpath))
+    print("* Mafalda paths       : %s" % (", ".join(args.mafalda)))
+    print("* DSC paths           : %s" % (", ".join(args.dsc)))
+    print("*")
+
+    ## The watchers for each kind of file { kind:watcher }.
+    #
+    # The state is kept in the output directory, so files aren't ingested
+    # again when the daemon is restarted.
+    watchers = {}
+    #
+    for kind, paths in [("mafalda", args.mafalda), ("dsc", args.dsc)]:
+        if len(paths) > 0:
+            watchers[kind] = DirectoryWatcher(paths, "*.root", 0.0 if args.once else args.debounce, os.path.join(outputpath, WATCH_STATE_NAME % (kind)))
+
+    ## The pool of ingest workers.
+    pool = ThreadPool(args.workers)
+
+    ## The ingests in progress [(kind, async result)].
+    running = []
+
+    try:
+        while True:
+
+            # Collect the finished ingests.
+            for kind, result in [r for r in running if r[1].ready()]:
+
+                rootpath, ok = result.get()
+
+                watchers[kind].markDone(rootpath)
+
+                print("* %s '%s'." % ("Ingested" if ok else "FAILED to ingest", rootpath))
+
+                running.remove((kind, result))
+
+            # Hand out the new (or changed) files - but only as many as there
+            # are free workers, so the backlog stays with the watchers.
+            for kind in sorted(watchers.keys()):
+                for rootpath in watchers[kind].poll(max(0, args.workers - len(running))):
+
+                    lg.info(" * Ingesting '%s' (%s)." % (rootpath, kind))
+
+                    running.append((kind, pool.apply_async(ingest_job, ((kind, rootpath, outputpath),))))
+
+            if args.once and len(running) == 0 and all(w.getNumberPending() == 0 for w in watchers.values()):
+                break
+
+            time.sleep(1.0 if args.once else args.interval)
+
+    except KeyboardInterrupt:
+        pass
+    finally:
+        pool.close()
+        pool.join()